@@ -3,10 +3,8 @@ import streamlit as st
 import pandas as pd
 import plotly.express as px
 import gspread
-from gspread_dataframe import get_as_dataframe
 from google.oauth2.service_account import Credentials
-import re
-import numpy as np
+from utils import fake_sheets, base_dados, cubo, taxa_cartao, ranking
 
 st.set_page_config(layout="wide", page_title="Dashboard Salão JP", page_icon="💈")
 st.title("📊 Dashboard Salão JP")
@@ -16,7 +14,6 @@ st.title("📊 Dashboard Salão JP")
 # =========================
 SHEET_ID = "1qtOF1I7Ap4By2388ySThoVlZHbI3rAJv_haEcil0IUE"
 BASE_ABA = "Base de Dados"
-DATA_CORTE_UNICIDADE = pd.to_datetime("2025-05-11")
 
 MESES_PT = {
     1: "Janeiro", 2: "Fevereiro", 3: "Março", 4: "Abril",
@@ -29,19 +26,10 @@ NOMES_EXCLUIR_RANKINGS = ["boliviano", "brasileiro", "menino"]
 FUNC_JPAULO = "JPaulo"
 FUNC_VINICIUS = "Vinicius"
 
-# Produtos por nome do serviço
-REGEX_PRODUTO = re.compile(r"(produto|gel|pomad|shampoo|cera|spray|po\b|pó\b|p\u00f3\b)", re.IGNORECASE)
-
 # --- URNA: regra de divisão ---
 URNA_SPLIT_YEAR = 2025
 URNA_PCT_VINICIUS = 0.50
 
-# Linhas de URNA por nome do serviço
-REGEX_URNA = re.compile(
-    r"(caixinh[aã].*nat|caixinh[aã].*urna|urna.*caixinh[aã]|caixinh[aã]\s*natal|natal\s*caixinh[aã])",
-    re.IGNORECASE
-)
-
 # =========================
 # CSS (cards + blocos)
 # =========================
@@ -74,63 +62,71 @@ st.markdown("""
 # =========================
 @st.cache_resource
 def conectar_sheets():
+    if fake_sheets.backend_fake_ativo():
+        return fake_sheets.abrir_planilha_fake(SHEET_ID)
     info = st.secrets["GCP_SERVICE_ACCOUNT"]
     escopo = ["https://spreadsheets.google.com/feeds", "https://www.googleapis.com/auth/drive"]
     credenciais = Credentials.from_service_account_info(info, scopes=escopo)
     cliente = gspread.authorize(credenciais)
     return cliente.open_by_key(SHEET_ID)
 
+def detectar_col_conta(colunas):
+    return taxa_cartao.col_conta(colunas)
+
 @st.cache_data(show_spinner=False)
 def carregar_dados():
-    planilha = conectar_sheets()
-    aba = planilha.worksheet(BASE_ABA)
-    df = get_as_dataframe(aba).dropna(how="all")
-    df.columns = [str(c).strip() for c in df.columns]
-
-    # Datas e valores
-    df["Data"] = pd.to_datetime(df.get("Data"), errors="coerce")
+    # schema compacto: texto → category, R$ → float64, Data → datetime64 (utils/base_dados.py)
+    df = base_dados.carregar_base(conectar_sheets(), BASE_ABA)
+    if "Data" not in df.columns:
+        df["Data"] = pd.NaT
     df = df.dropna(subset=["Data"])
-    df["ValorNum"] = pd.to_numeric(df.get("Valor"), errors="coerce").fillna(0)
+    df["ValorNum"] = df["Valor"].fillna(0.0) if "Valor" in df.columns else 0.0
 
     # Caixinha (linhas dos atendimentos)
     cand_cx = ["CaixinhaDia", "Caixinha_Fundo", "CaixinhaFundo", "Caixinha", "Gorjeta"]
     existentes = [c for c in cand_cx if c in df.columns]
     for c in existentes:
-        df[c] = pd.to_numeric(df[c], errors="coerce").fillna(0)
-    df["CaixinhaDiaTotal"] = df[existentes].sum(axis=1) if existentes else 0
+        df[c] = df[c].fillna(0.0)
+    df["CaixinhaDiaTotal"] = df[existentes].sum(axis=1) if existentes else 0.0
 
     # Derivadas
-    df["Ano"] = df["Data"].dt.year
-    df["Mês"] = df["Data"].dt.month
-    df["Ano-Mês"] = df["Data"].dt.to_period("M").astype(str)
+    df["Ano"] = df["Data"].dt.year.astype("int16")
+    df["Mês"] = df["Data"].dt.month.astype("int8")
+    df["Ano-Mês"] = df["Data"].dt.to_period("M").astype(str).astype("category")
+
+    # Chave do atendimento: linha antes de 11/05/2025, (Cliente, dia) depois → contar = nunique
+    df["Visita"] = base_dados.chave_visita(df)
+
+    # Taxa de cartão por linha (TaxaCartaoCalc / MetodoTaxa) — total do período = soma mascarada
+    taxa_cartao.marcar_taxa_cartao(df, detectar_col_conta(df.columns))
 
-    # Flags
-    df["EhProduto"] = df["Serviço"].astype(str).apply(lambda s: bool(REGEX_PRODUTO.search(s)))
-    df["EhUrna"] = df["Serviço"].astype(str).apply(lambda s: bool(REGEX_URNA.search(s)))
-    df["EhServico"] = ~(df["EhProduto"] | df["EhUrna"])
-    return df
+    # Flags produto / URNA (base_dados.REGEX_PRODUTO / REGEX_URNA)
+    return base_dados.marcar_flags(df)
+
+@st.cache_data(show_spinner=False)
+def carregar_cubo(col_conta):
+    """Cubo diário (Data × Funcionário × Classe × Fiado × Fase); os KPIs só rolam ele."""
+    return cubo.montar_cubo(carregar_dados(), col_conta=col_conta)
+
+@st.cache_resource(show_spinner=False)
+def motor_ranking(recorte: str):
+    """Ranking de clientes por recorte de pagamento; a base nova só acrescenta as linhas do fim."""
+    return ranking.Ranking(col_valor="ValorNum")
 
 df_full = carregar_dados()
 
 # =========================
 # DETECÇÃO DE COLUNA DE PAGAMENTO / FIADO
 # =========================
-def _norm(s):  # normaliza nome de coluna
-    return re.sub(r"\s+", "", str(s).strip().lower())
-
-col_conta = next(
-    (c for c in df_full.columns
-     if _norm(c) in {
-         "conta","pagamento","status",
-         "formadepagamento","formapagamento",
-         "formapagdetalhe","formapagto","formapag"
-     }),
-    None
-)
+col_conta = detectar_col_conta(df_full.columns)
 if col_conta:
-    is_fiado_full = df_full[col_conta].astype(str).str.strip().str.lower().eq("fiado")
+    is_fiado_full = pd.Series(
+        base_dados.mapear_categorias(df_full[col_conta], lambda s: s.strip().lower() == "fiado").astype(bool),
+        index=df_full.index,
+    )
 else:
     is_fiado_full = pd.Series(False, index=df_full.index)
+cubo_full = carregar_cubo(col_conta)
 
 # =========================
 # SIDEBAR: FILTROS
@@ -171,8 +167,14 @@ if meses_selecionados:
 else:
     mask_periodo = (df_full["Ano"] == ano_escolhido)
 
-df_hist    = df_full[mask_historico_full & mask_periodo].copy()
-df_valores = df_full[mask_valores_full & mask_periodo].copy()
+# filtros equivalentes p/ o cubo
+fiado_valores = {"Apenas pagos": False, "Apenas fiado": True}.get(pagamento_opcao)
+meses_cubo = meses_numeros if meses_selecionados else None
+SEM_URNA = ["servico", "produto"]
+
+# só leitura daqui pra baixo → sem .copy() (a máscara booleana já materializa o recorte)
+df_hist    = df_full[mask_historico_full & mask_periodo]
+df_valores = df_full[mask_valores_full & mask_periodo]
 
 # =========================
 # AUX
@@ -181,102 +183,35 @@ def brl(x: float) -> str:
     return f"R$ {x:,.2f}".replace(",", "v").replace(".", ",").replace("v", ".")
 
 def _is_func(df, nome):
-    return df["Funcionário"].astype(str).str.casefold() == str(nome).casefold()
-
-# ===== Helpers de taxa =====
-def _to_num(s):
-    if s is None: return 0.0
-    if isinstance(s, (int, float, np.number)): return float(s)
-    s = str(s).strip().replace("R$", "")
-    s = s.replace(".", "").replace(",", ".")  # pt-BR -> float
-    try:
-        return float(s)
-    except:
-        return 0.0
-
-def _to_pct(x):
-    s = str(x).replace("%", "").strip()
-    v = _to_num(s)
-    if v > 1.0:  # 180 => 1.80%
-        v = v / 100.0
-    return float(max(0.0, min(v, 0.20)))
-
-def calcular_taxa_cartao(df_periodo: pd.DataFrame):
-    """
-    Retorna (total_taxa, metodo, coluna_usada).
-    PRIORIDADE:
-      (1) Usar EXCLUSIVAMENTE a coluna 'TaxaCartaoValor' (se existir no período filtrado).
-      (2) Se não existir, usar Diferença Bruto–Líquido (apenas linhas de cartão).
-      (3) Se não der, estimar por PCT.
-    """
-    if df_periodo.empty:
-        return 0.0, "vazio", None
-
-    # (1) SOMENTE TaxaCartaoValor
-    col_q = next((c for c in df_periodo.columns if _norm(c) == "taxacartaovalor"), None)
-    if col_q:
-        total_q = df_periodo[col_q].map(_to_num).sum()
-        return float(total_q), "valor(q)", col_q
-
-    # (2) Diferença Bruto–Líquido (somente cartão)
-    bruto_col = next((c for c in df_periodo.columns if _norm(c) in {"valorbrutorecebido","valorbruto","bruto"}), None)
-    liq_col   = next((c for c in df_periodo.columns if _norm(c) in {"valorliquidorecebido","valorliquido","valor"}), None)
-    if bruto_col and liq_col:
-        bruto = df_periodo[bruto_col].map(_to_num)
-        liq   = df_periodo[liq_col].map(_to_num)
-        diff  = (bruto - liq).clip(lower=0)
-        if col_conta:
-            patt = re.compile(r"(cart|cr[eé]dit|d[eé]bit|visa|master|elo|hiper|maquin|pos|sumup|pagbank|cielo|rede|nubank)", re.IGNORECASE)
-            mask_cartao = df_periodo[col_conta].astype(str).str.contains(patt, na=False)
-            diff = diff.where(mask_cartao, 0)
-        total = float(diff.sum())
-        if total > 0:
-            return total, "diff", f"{bruto_col}-{liq_col}"
-
-    # (3) Estimativa por PCT
-    pct_col = next((c for c in df_periodo.columns if "pct" in c.lower() or "%" in c.lower() or "taxacartaopct" in c.lower()), None)
-    if pct_col:
-        pct = df_periodo[pct_col].map(_to_pct)
-        if bruto_col:
-            base = df_periodo[bruto_col].map(_to_num)
-            est = float((base * pct).sum())
-            return max(est, 0.0), "pct", pct_col
-        elif liq_col:
-            net = df_periodo[liq_col].map(_to_num)
-            fee = net * pct / (1 - pct.clip(upper=0.99))
-            est = float(fee.sum())
-            return max(est, 0.0), "pct", pct_col
-
-    return 0.0, "vazio", None
+    alvo = str(nome).casefold()
+    return pd.Series(base_dados.mapear_categorias(df["Funcionário"], lambda s: s.casefold() == alvo).astype(bool),
+                     index=df.index)
 
 # =========================
 # KPIs
 # =========================
 # Receita operacional (sem URNA)
-receita_operacional = float(df_valores.loc[~df_valores["EhUrna"], "ValorNum"].sum())
+por_func_periodo = cubo.rolar(cubo_full, por=["Funcionário"], ano=ano_escolhido, meses=meses_cubo,
+                              Fiado=fiado_valores, Classe=SEM_URNA)
+receita_operacional = float(por_func_periodo["ValorNum"].sum())
 
 # Caixinha total (todas as pessoas)
-caixinha_periodo_total = float(df_valores.loc[~df_valores["EhUrna"], "CaixinhaDiaTotal"].sum())
+caixinha_periodo_total = float(por_func_periodo["CaixinhaDiaTotal"].sum())
 
 # Caixinha do JP entra na Receita Total
 cx_jp = float(
-    df_valores.loc[
-        (~df_valores["EhUrna"]) & _is_func(df_valores, FUNC_JPAULO),
-        "CaixinhaDiaTotal"
-    ].sum()
+    por_func_periodo.loc[_is_func(por_func_periodo, FUNC_JPAULO), "CaixinhaDiaTotal"].sum()
 )
 receita_total = receita_operacional + cx_jp
 
 # Atendimentos e clientes
-total_atendimentos = len(df_hist)
-antes = df_hist[df_hist["Data"] < DATA_CORTE_UNICIDADE]
-depois = df_hist[df_hist["Data"] >= DATA_CORTE_UNICIDADE].drop_duplicates(subset=["Cliente", "Data"])
-clientes_unicos = pd.concat([antes, depois])["Cliente"].nunique()
+total_atendimentos = int(df_hist["Visita"].nunique())
+clientes_unicos = df_hist["Cliente"].nunique()
 
 ticket_medio = (receita_total / total_atendimentos) if total_atendimentos else 0.0
 
 # Taxa de cartão
-taxa_cartao_total, taxa_metodo, taxa_col = calcular_taxa_cartao(df_valores.copy())
+taxa_cartao_total, taxa_metodo, taxa_col = taxa_cartao.resumo_taxa(df_valores)
 
 # KPIs (cards) — versão grid responsiva
 def kpi_card(title_html, value_html, sub_html=""):
@@ -304,9 +239,8 @@ col_a, col_b = st.columns([1.1, 1])
 with col_a:
     st.markdown('<div class="block"><b>🎁 Caixinha do Período — por Funcionário</b>', unsafe_allow_html=True)
     df_cx_func = (
-        df_valores.loc[~df_valores["EhUrna"]]
-        .groupby("Funcionário", dropna=False)["CaixinhaDiaTotal"]
-        .sum().reset_index().rename(columns={"CaixinhaDiaTotal":"Caixinha"})
+        por_func_periodo[["Funcionário", "CaixinhaDiaTotal"]]
+        .rename(columns={"CaixinhaDiaTotal":"Caixinha"})
         .sort_values("Caixinha", ascending=False)
     )
     if not df_cx_func.empty and df_cx_func["Caixinha"].sum() > 0:
@@ -319,9 +253,7 @@ with col_a:
 
 with col_b:
     st.markdown('<div class="block"><b>📅 Caixinha do Dia — Total no Ano</b>', unsafe_allow_html=True)
-    df_ano = df_full[df_full["Ano"] == ano_escolhido]
-    df_ano = df_ano[mask_valores_full.loc[df_ano.index]] if len(mask_valores_full) == len(df_full) else df_ano
-    cx_dia_ano = float(df_ano.loc[~df_ano["EhUrna"], "CaixinhaDiaTotal"].sum())
+    cx_dia_ano = cubo.total(cubo_full, "CaixinhaDiaTotal", ano=ano_escolhido, Fiado=fiado_valores, Classe=SEM_URNA)
     st.metric("Total no Ano (Dia)", brl(cx_dia_ano))
     st.markdown('</div>', unsafe_allow_html=True)
 
@@ -329,8 +261,8 @@ with col_b:
 # 🎄 Caixinha NATAL (URNA)
 # =========================
 st.markdown('<div class="block"><b>🎄 Caixinha NATAL (URNA) — Ano</b>', unsafe_allow_html=True)
-df_urna_ano = df_full[(df_full["Ano"] == ano_escolhido) & (df_full["EhUrna"])].copy()
-df_urna_ano = df_urna_ano[mask_valores_full.loc[df_urna_ano.index]] if len(mask_valores_full) == len(df_full) else df_urna_ano
+df_urna_ano = cubo.rolar(cubo_full, por=["Funcionário"], ano=ano_escolhido, Fiado=fiado_valores, Classe="urna")
+df_urna_ano = df_urna_ano[df_urna_ano["Linhas"] > 0]
 urna_total_ano = float(df_urna_ano["ValorNum"].sum())
 
 if ano_escolhido >= URNA_SPLIT_YEAR:
@@ -346,8 +278,7 @@ colu2.metric("Quota JPaulo",       brl(quota_jpaulo))
 colu3.metric("Quota Vinicius",     brl(quota_vinicius))
 
 if not df_urna_ano.empty:
-    df_urna_lanc = (df_urna_ano.groupby("Funcionário", dropna=False)["ValorNum"]
-                    .sum().reset_index().rename(columns={"ValorNum":"Valor Lançado"}))
+    df_urna_lanc = df_urna_ano[["Funcionário", "ValorNum"]].rename(columns={"ValorNum":"Valor Lançado"})
     df_urna_lanc["Valor Lançado"] = df_urna_lanc["Valor Lançado"].astype(float)
     st.dataframe(df_urna_lanc, use_container_width=True, hide_index=True)
 else:
@@ -358,11 +289,10 @@ st.markdown('</div>', unsafe_allow_html=True)
 # 📈 Tendência Mensal (ano selecionado)
 # =========================
 st.markdown('<div class="block"><b>📈 Tendência Mensal de Receita (Ano Selecionado)</b>', unsafe_allow_html=True)
-df_anual_val = df_full[(df_full["Ano"] == ano_escolhido)]
-df_anual_val = df_anual_val[mask_valores_full.loc[df_anual_val.index]] if len(mask_valores_full) == len(df_full) else df_anual_val
 df_mensal = (
-    df_anual_val.loc[~df_anual_val["EhUrna"]]
-    .groupby("Mês")["ValorNum"].sum().reset_index().sort_values("Mês")
+    cubo.rolar(cubo_full, por=["Mês"], ano=ano_escolhido, Fiado=fiado_valores, Classe=SEM_URNA,
+               medidas=["ValorNum"])
+    .sort_values("Mês")
 )
 if not df_mensal.empty:
     df_mensal["MêsNome"] = df_mensal["Mês"].map(MESES_PT)
@@ -380,10 +310,10 @@ col_p1, col_p2 = st.columns([1.2, 1])
 
 with col_p1:
     st.markdown('<div class="block"><b>🛍️ Produtos Vendidos (quantidade)</b>', unsafe_allow_html=True)
-    df_prod = df_valores.loc[~df_valores["EhUrna"] & df_valores["EhProduto"]].copy()
+    df_prod = df_valores.loc[~df_valores["EhUrna"] & df_valores["EhProduto"]]
     if not df_prod.empty:
         top_qty = (
-            df_prod.groupby("Serviço")["Serviço"].count()
+            df_prod.groupby("Serviço", observed=True)["Serviço"].count()
             .rename("Qtd").reset_index()
             .sort_values("Qtd", ascending=False).head(12)
         )
@@ -398,7 +328,7 @@ with col_p2:
     st.markdown('<div class="block"><b>🏆 Top Produtos por Valor</b>', unsafe_allow_html=True)
     if not df_prod.empty:
         top_val = (
-            df_prod.groupby("Serviço")["ValorNum"].sum()
+            df_prod.groupby("Serviço", observed=True)["ValorNum"].sum()
             .reset_index().rename(columns={"ValorNum":"Valor"})
             .sort_values("Valor", ascending=False).head(10)
         )
@@ -413,10 +343,10 @@ with col_p2:
 # ✂️ Serviços
 # =========================
 st.markdown('<div class="block"><b>✂️ Top Serviços por Valor</b>', unsafe_allow_html=True)
-df_serv = df_valores.loc[~df_valores["EhUrna"] & ~df_valores["EhProduto"]].copy()
+df_serv = df_valores.loc[~df_valores["EhUrna"] & ~df_valores["EhProduto"]]
 if not df_serv.empty:
     top_serv = (
-        df_serv.groupby("Serviço")["ValorNum"].sum()
+        df_serv.groupby("Serviço", observed=True)["ValorNum"].sum()
         .reset_index().rename(columns={"ValorNum":"Valor"})
         .sort_values("Valor", ascending=False).head(12)
     )
@@ -431,11 +361,15 @@ st.markdown('</div>', unsafe_allow_html=True)
 # 🥇 Top 10 Clientes
 # =========================
 st.markdown('<div class="block"><b>🥇 Top 10 Clientes</b>', unsafe_allow_html=True)
-cnt = df_hist.groupby("Cliente")["Serviço"].count().rename("Qtd_Serviços")
-val = df_valores.loc[~df_valores["EhUrna"]].groupby("Cliente")["ValorNum"].sum().rename("Valor")
-df_top = pd.concat([cnt, val], axis=1).reset_index().fillna(0)
-df_top = df_top[~df_top["Cliente"].str.lower().isin(NOMES_EXCLUIR_RANKINGS)]
-df_top = df_top.sort_values(by="Valor", ascending=False).head(10)
+# totais acumulados por (Ano, Mês, Cliente) no motor; aqui só o Top K do recorte (heap)
+rk_val = motor_ranking(f"valores:{pagamento_opcao}")
+rk_val.sincronizar(df_full[mask_valores_full & ~df_full["EhUrna"]])
+rk_hist = motor_ranking(f"historico:{pagamento_opcao if aplicar_hist else 'Incluir tudo'}")
+rk_hist.sincronizar(df_full[mask_historico_full])
+
+df_top = rk_val.top(10, por="Valor", ano=ano_escolhido, meses=meses_cubo,
+                    excluir=lambda c: c.lower() in NOMES_EXCLUIR_RANKINGS)
+df_top["Qtd_Serviços"] = rk_hist.medida("Linhas", df_top["Cliente"], ano=ano_escolhido, meses=meses_cubo)
 if not df_top.empty:
     df_top["Valor Formatado"] = df_top["Valor"].apply(brl)
     st.dataframe(df_top[["Cliente", "Qtd_Serviços", "Valor Formatado"]], use_container_width=True, hide_index=True)
@@ -444,4 +378,4 @@ else:
 st.markdown('</div>', unsafe_allow_html=True)
 
 st.markdown("---")
-st.caption("JPaulo ✨ | Receita inclui só Caixinha do JP • URNA com divisão 50/50 (≥2025) • Taxa = soma de TaxaCartaoValor (fallback: diff/% se a coluna não existir)")
+st.caption("JPaulo ✨ | Receita inclui só Caixinha do JP • URNA com divisão 50/50 (≥2025) • Taxa = TaxaCartaoValor por linha (fallback: diff/% quando vazia)")
@@ -0,0 +1,214 @@
+# -*- coding: utf-8 -*-
+# bench/benchmark.py — tempo e pico de memória por ETAPA sobre a planilha sintética
+# - Para cada tamanho (10k / 100k / 1M linhas): gera a planilha, carrega no Sheets fake
+#   (SHEETS_BACKEND=fake) e roda:
+#     • ler_base        → get_as_dataframe da "Base de Dados" (o que toda página faz)
+#     • app.py, 28_Comissoes_Vinicius, 30_Atendimentos_Por_Dia → via streamlit AppTest
+#     • notify_inline, top_3_salao_JP → script inteiro (Telegram desligado)
+# - Reporta tempo (s), pico de memória (MB, tracemalloc) e chamadas ao Sheets (leituras/escritas)
+# - --json salva o resultado; --comparar <json anterior> marca REGRESSÃO (> tolerância) e sai com 1
+#
+# Uso:
+#   python -m bench.benchmark --tamanhos 10k,100k
+#   python -m bench.benchmark --tamanhos 10k --json bench_10k.json
+#   python -m bench.benchmark --tamanhos 10k --comparar bench_10k.json --tolerancia 0.25
+
+import os
+import io
+import sys
+import json
+import time
+import runpy
+import argparse
+import tempfile
+import tracemalloc
+import contextlib
+from unittest import mock
+
+import requests
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if RAIZ not in sys.path:
+    sys.path.insert(0, RAIZ)
+
+from bench.gerar_base import gerar_planilha, salvar_csv  # noqa: E402
+from utils import fake_sheets, sheets_cache  # noqa: E402
+
+SHEET_ID = "1qtOF1I7Ap4By2388ySThoVlZHbI3rAJv_haEcil0IUE"
+PAGINAS = {
+    "app": "app.py",
+    "28_comissoes": "pages/28_Comissoes_Vinicius.py",
+    "30_atendimentos_dia": "pages/30_Atendimentos_Por_Dia.py",
+}
+JOBS = {
+    "notify_inline": "notify_inline.py",
+    "top_3": "top_3_salao_JP.py",
+}
+
+
+def _tamanho(txt: str) -> int:
+    t = txt.strip().lower()
+    mult = 1_000_000 if t.endswith("m") else (1_000 if t.endswith("k") else 1)
+    return int(float(t.rstrip("km")) * mult)
+
+def _resposta_ok(*args, **kwargs):
+    r = requests.Response()
+    r.status_code = 200
+    r._content = b'{"ok": true, "result": {}}'
+    return r
+
+# =========================
+# MEDIÇÃO
+# =========================
+class Medidor:
+    def __init__(self, memoria: bool = True):
+        self.memoria = memoria
+        self.linhas = []
+
+    @contextlib.contextmanager
+    def etapa(self, tamanho: str, nome: str):
+        cli = fake_sheets.cliente_fake()
+        cli.zerar_estatisticas()
+        if self.memoria:
+            tracemalloc.reset_peak()
+        erro = ""
+        t0 = time.perf_counter()
+        try:
+            yield
+        except Exception as e:  # registra e segue p/ a próxima etapa
+            erro = f"{type(e).__name__}: {e}"[:120]
+        dt = time.perf_counter() - t0
+        pico = tracemalloc.get_traced_memory()[1] / 2**20 if self.memoria else 0.0
+        st = cli.estatisticas()
+        self.linhas.append({
+            "tamanho": tamanho, "etapa": nome, "tempo_s": round(dt, 3), "pico_mb": round(pico, 1),
+            "leituras": st.get("__leitura__", 0), "escritas": st.get("__escrita__", 0), "erro": erro,
+        })
+        print(f"  {nome:<22} {dt:>8.2f}s  {pico:>9.1f} MB  R={st.get('__leitura__', 0):<4} W={st.get('__escrita__', 0):<4} {erro}")
+
+def _limpar_caches_streamlit():
+    try:
+        import streamlit as st
+        st.cache_data.clear()
+        st.cache_resource.clear()
+    except Exception:
+        pass
+
+def _rodar_pagina(caminho: str, timeout: float):
+    from streamlit.testing.v1 import AppTest
+    at = AppTest.from_file(os.path.join(RAIZ, caminho), default_timeout=timeout)
+    at.run()
+    if at.exception:
+        raise RuntimeError(str(at.exception[0].message)[:200])
+
+def _rodar_job(caminho: str):
+    with contextlib.redirect_stdout(io.StringIO()), contextlib.redirect_stderr(io.StringIO()):
+        try:
+            runpy.run_path(os.path.join(RAIZ, caminho), run_name="__main__")
+        except SystemExit as e:
+            if e.code not in (0, None):
+                raise RuntimeError(f"saiu com código {e.code}")
+
+# =========================
+# EXECUÇÃO
+# =========================
+def rodar(tamanhos, etapas, pasta_base, timeout, memoria=True) -> list:
+    os.environ["SHEETS_BACKEND"] = "fake"
+    os.environ["SHEET_ID"] = SHEET_ID
+    os.environ.setdefault("TELEGRAM_TOKEN", "bench")
+    os.environ.setdefault("TELEGRAM_CHAT_ID", "0")
+    med = Medidor(memoria=memoria)
+    if memoria:
+        tracemalloc.start()
+
+    try:
+        import streamlit  # noqa: F401
+        tem_streamlit = True
+    except ImportError:
+        tem_streamlit = False
+        print("⚠️ streamlit não instalado — etapas de página serão puladas.")
+
+    for rotulo in tamanhos:
+        n = _tamanho(rotulo)
+        pasta = os.path.join(pasta_base, rotulo)
+        print(f"\n=== {rotulo} ({n} linhas) ===")
+
+        with med.etapa(rotulo, "gerar"):
+            abas = gerar_planilha(n)
+            salvar_csv(abas, pasta)
+            del abas
+
+        os.environ["FAKE_SHEETS_DIR"] = pasta
+        fake_sheets.resetar_cliente_fake()
+        sheets_cache.invalidar()
+        _limpar_caches_streamlit()
+
+        with med.etapa(rotulo, "carregar_fake"):
+            sh = fake_sheets.abrir_planilha_fake(SHEET_ID)
+
+        if "ler_base" in etapas:
+            from gspread_dataframe import get_as_dataframe
+            with med.etapa(rotulo, "ler_base"):
+                get_as_dataframe(sh.worksheet("Base de Dados")).dropna(how="all")
+
+        with mock.patch.object(requests, "post", _resposta_ok), mock.patch.object(requests, "get", _resposta_ok):
+            for nome, caminho in PAGINAS.items():
+                if nome in etapas and tem_streamlit:
+                    _limpar_caches_streamlit()
+                    with med.etapa(rotulo, nome):
+                        _rodar_pagina(caminho, timeout)
+            for nome, caminho in JOBS.items():
+                if nome in etapas:
+                    with med.etapa(rotulo, nome):
+                        _rodar_job(caminho)
+
+    if memoria:
+        tracemalloc.stop()
+    return med.linhas
+
+def comparar(atual: list, anterior: list, tolerancia: float) -> list:
+    ant = {(r["tamanho"], r["etapa"]): r for r in anterior}
+    regressoes = []
+    for r in atual:
+        a = ant.get((r["tamanho"], r["etapa"]))
+        if not a or a["tempo_s"] <= 0.05:
+            continue
+        for campo in ("tempo_s", "pico_mb", "leituras", "escritas"):
+            va, vn = a.get(campo) or 0, r.get(campo) or 0
+            if va and vn > va * (1 + tolerancia):
+                regressoes.append(f"{r['tamanho']}/{r['etapa']}: {campo} {va} → {vn}")
+    return regressoes
+
+
+def main():
+    todas = ["ler_base", *PAGINAS, *JOBS]
+    ap = argparse.ArgumentParser(description="Benchmark das páginas/jobs sobre dados sintéticos.")
+    ap.add_argument("--tamanhos", default="10k,100k", help="ex.: 10k,100k,1m")
+    ap.add_argument("--etapas", default=",".join(todas), help=f"subconjunto de: {','.join(todas)}")
+    ap.add_argument("--pasta", default=os.path.join(tempfile.gettempdir(), "barbearia_bench"))
+    ap.add_argument("--timeout", type=float, default=900.0, help="timeout (s) por página no AppTest")
+    ap.add_argument("--sem-memoria", action="store_true", help="desliga tracemalloc (tempos mais fiéis)")
+    ap.add_argument("--json", help="salva o resultado neste arquivo")
+    ap.add_argument("--comparar", help="JSON de uma execução anterior")
+    ap.add_argument("--tolerancia", type=float, default=0.20)
+    a = ap.parse_args()
+
+    linhas = rodar([t for t in a.tamanhos.split(",") if t.strip()],
+                   {e.strip() for e in a.etapas.split(",")}, a.pasta, a.timeout,
+                   memoria=not a.sem_memoria)
+    if a.json:
+        with open(a.json, "w", encoding="utf-8") as fh:
+            json.dump(linhas, fh, ensure_ascii=False, indent=2)
+    if a.comparar:
+        with open(a.comparar, encoding="utf-8") as fh:
+            regressoes = comparar(linhas, json.load(fh), a.tolerancia)
+        if regressoes:
+            print("\n🔴 REGRESSÕES:")
+            for r in regressoes:
+                print("  •", r)
+            sys.exit(1)
+        print("\n✅ Sem regressões acima da tolerância.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,338 @@
+# -*- coding: utf-8 -*-
+# bench/gerar_base.py — gera uma planilha SINTÉTICA (um CSV por aba) no formato da planilha real
+# - Abas: "Base de Dados", "Despesas", "clientes_status", "Fiado_Lancamentos", "Fiado_Pagamentos"
+# - Cobre: combos (várias linhas por atendimento), fiado em aberto/pago, cartão (bruto/líquido/taxa),
+#   CaixinhaDia/CaixinhaFundo, linhas de URNA (caixinha de Natal), produtos, JPaulo + Vinicius,
+#   fases do salão, datas dd/mm/aaaa e valores em pt-BR ("25,00")
+# - Determinístico (seed) e vetorizado (1M linhas ≈ 15 s, a maior parte no to_csv)
+#
+# Uso:
+#   python -m bench.gerar_base --linhas 100000 --saida bench_data/100k
+#   SHEETS_BACKEND=fake FAKE_SHEETS_DIR=bench_data/100k streamlit run app.py
+
+import os
+import hashlib
+import argparse
+from datetime import date, timedelta
+
+import numpy as np
+import pandas as pd
+
+ABA_BASE = "Base de Dados"
+ABA_DESPESAS = "Despesas"
+ABA_STATUS = "clientes_status"
+ABA_LANC = "Fiado_Lancamentos"
+ABA_PAGT = "Fiado_Pagamentos"
+
+COLS_BASE = [
+    "Data", "Serviço", "Valor", "Conta", "Cliente", "Combo",
+    "Funcionário", "Fase", "Tipo", "Período",
+    "StatusFiado", "IDLancFiado", "VencimentoFiado", "DataPagamento",
+    "ValorBrutoRecebido", "ValorLiquidoRecebido",
+    "TaxaCartaoValor", "TaxaCartaoPct",
+    "FormaPagDetalhe", "PagamentoID",
+    "CaixinhaDia", "CaixinhaFundo",
+]
+COLS_DESPESAS = ["Data", "Prestador", "Descrição", "Valor", "Me Pag:", "RefID"]
+COLS_STATUS = ["Cliente", "Status", "Foto", "Família"]
+COLS_LANC = ["IDLanc", "Data", "Cliente", "Combo", "Servicos", "Total", "Venc", "Func", "Fase", "Tipo", "Periodo"]
+COLS_PAGT = ["IDPagamento", "IDLancs", "DataPagamento", "Cliente", "Forma", "TotalLiquido", "Obs", "TotalBruto", "TaxaValor", "TaxaPct"]
+
+VALOR_TABELA = {
+    "Corte": 25.00, "Barba": 15.00, "Sobrancelha": 7.00,
+    "Luzes": 45.00, "Tintura": 20.00, "Alisamento": 40.00,
+    "Gel": 10.00, "Pomada": 15.00,
+}
+# (serviços, peso) — combos viram várias linhas com o mesmo Combo "corte+barba"
+COMBOS = [
+    (("Corte",), 0.46), (("Barba",), 0.08), (("Sobrancelha",), 0.04),
+    (("Corte", "Barba"), 0.24), (("Corte", "Sobrancelha"), 0.09),
+    (("Corte", "Barba", "Sobrancelha"), 0.05),
+    (("Luzes", "Corte"), 0.02), (("Tintura", "Corte"), 0.01), (("Alisamento", "Corte"), 0.01),
+]
+CONTAS = [("Pix", 0.36), ("Dinheiro", 0.22), ("Nubank CNPJ", 0.12), ("Cartão", 0.23), ("Fiado", 0.07)]
+PERIODOS = [("Manhã", 0.30), ("Tarde", 0.50), ("Noite", 0.15), ("", 0.05)]
+PRODUTOS = [("Pomada", 15.00), ("Gel", 10.00)]
+
+NOMES = ["João", "Pedro", "Lucas", "Mateus", "Gabriel", "Rafael", "Gustavo", "Felipe", "Bruno", "Thiago",
+         "André", "Carlos", "Daniel", "Eduardo", "Fernando", "Henrique", "Igor", "José", "Léo", "Marcos",
+         "Nícolas", "Otávio", "Paulo", "Ricardo", "Samuel", "Túlio", "Vítor", "Wesley", "Yuri", "Davi"]
+SOBRENOMES = ["Silva", "Souza", "Oliveira", "Santos", "Pereira", "Lima", "Carvalho", "Gomes", "Ribeiro",
+              "Almeida", "Araújo", "Barbosa", "Rocha", "Dias", "Mendes", "Castro", "Moreira", "Cardoso"]
+
+FASE_AUTONOMO = "Autônomo (prestador)"
+FASE_DONO = "Dono (sozinho)"
+FASE_DONO_FUNC = "Dono + funcionário"
+
+
+def _brl(v: pd.Series) -> pd.Series:
+    """25.5 -> '25,50' (o Sheets em pt-BR converte para número). Formata só os valores únicos."""
+    codes, uniq = pd.factorize(v.round(2))
+    txt = np.array([f"{x:.2f}".replace(".", ",") for x in uniq], dtype=object)
+    return pd.Series(txt[codes], index=v.index)
+
+def _fmt_datas(d: pd.Series, fmt: str = "%d/%m/%Y") -> pd.Series:
+    codes, uniq = pd.factorize(d)
+    return pd.Series(np.asarray(uniq.strftime(fmt), dtype=object)[codes], index=d.index)
+
+def _escolher(rng, opcoes, n):
+    itens = [o for o, _ in opcoes]
+    pesos = np.array([p for _, p in opcoes], dtype=float)
+    return rng.choice(len(itens), size=n, p=pesos / pesos.sum()), itens
+
+def nomes_clientes(rng, n: int) -> list:
+    out, vistos = [], set()
+    while len(out) < n:
+        nome = f"{NOMES[rng.integers(len(NOMES))]} {SOBRENOMES[rng.integers(len(SOBRENOMES))]}"
+        if nome in vistos:
+            nome = f"{nome} {len(out)}"
+        vistos.add(nome)
+        out.append(nome)
+    return out
+
+# =========================
+# BASE DE DADOS
+# =========================
+def gerar_base(n_linhas: int, anos: int = 10, fim: date | None = None, seed: int = 42) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    fim = fim or date.today()
+    inicio = fim - timedelta(days=365 * anos)
+    n_dias = (fim - inicio).days + 1
+    # marcos das fases / entrada do Vinicius proporcionais ao período gerado
+    d_dono = pd.Timestamp(inicio + timedelta(days=int(n_dias * 0.30)))
+    d_vini = pd.Timestamp(inicio + timedelta(days=int(n_dias * 0.50)))
+
+    n_cli = max(40, n_linhas // 25)
+    clientes = np.array(nomes_clientes(rng, n_cli), dtype=object)
+    pesos_cli = 1.0 / np.arange(1, n_cli + 1) ** 0.8   # poucos clientes muito frequentes
+
+    n_vis = int(n_linhas / 1.45) + 1
+    dias = np.sort(rng.integers(0, n_dias, n_vis))
+    datas_vis = pd.to_datetime(inicio) + pd.to_timedelta(dias, unit="D")
+    cli_vis = clientes[rng.choice(n_cli, n_vis, p=pesos_cli / pesos_cli.sum())]
+
+    combo_idx, combos = _escolher(rng, COMBOS, n_vis)
+    conta_idx, contas = _escolher(rng, CONTAS, n_vis)
+    per_idx, periodos = _escolher(rng, PERIODOS, n_vis)
+    contas = np.array(contas, dtype=object)[conta_idx]
+    periodos = np.array(periodos, dtype=object)[per_idx]
+
+    func = np.where((datas_vis >= d_vini) & (rng.random(n_vis) < 0.42), "Vinicius", "JPaulo")
+    fase = np.where(datas_vis < d_dono, FASE_AUTONOMO, np.where(datas_vis < d_vini, FASE_DONO, FASE_DONO_FUNC))
+
+    # ---- explode atendimentos em linhas (uma por serviço) ----
+    tam = np.array([len(combos[i]) for i in combo_idx])
+    vis_de_linha = np.repeat(np.arange(n_vis), tam)
+    pos_no_combo = np.arange(len(vis_de_linha)) - np.repeat(np.cumsum(tam) - tam, tam)
+    servico = np.array([combos[combo_idx[v]][p] for v, p in zip(vis_de_linha, pos_no_combo)], dtype=object)
+    combo_txt = np.array(["+".join(s.lower() for s in c) if len(c) > 1 else "" for c, _ in COMBOS], dtype=object)
+
+    df = pd.DataFrame({
+        "_vis": vis_de_linha,
+        "_dt": datas_vis[vis_de_linha],
+        "Serviço": servico,
+        "Cliente": cli_vis[vis_de_linha],
+        "Combo": combo_txt[combo_idx[vis_de_linha]],
+        "Funcionário": func[vis_de_linha],
+        "Fase": fase[vis_de_linha],
+        "Tipo": "Serviço",
+        "Período": periodos[vis_de_linha],
+        "Conta": contas[vis_de_linha],
+    })
+    df["_valor"] = df["Serviço"].map(VALOR_TABELA).astype(float)
+    desconto = rng.random(len(df)) < 0.04
+    df.loc[desconto, "_valor"] = (df.loc[desconto, "_valor"] * 0.8).round(0)
+
+    # ---- produtos (linha extra no mesmo atendimento) ----
+    n_prod = int(n_vis * 0.03)
+    if n_prod:
+        v_prod = rng.choice(n_vis, n_prod, replace=False)
+        p_idx = rng.integers(len(PRODUTOS), size=n_prod)
+        prod = df.drop_duplicates("_vis").set_index("_vis").loc[v_prod].reset_index()
+        prod["Serviço"] = [PRODUTOS[i][0] for i in p_idx]
+        prod["_valor"] = [PRODUTOS[i][1] for i in p_idx]
+        prod["Tipo"] = "Produto"
+        prod["Combo"] = ""
+        df = pd.concat([df, prod[df.columns]], ignore_index=True)
+
+    # ---- URNA: caixinha de Natal (1 linha por ano, dividida 50/50 a partir de 2025) ----
+    urna = []
+    for ano in range(inicio.year, fim.year + 1):
+        dt = pd.Timestamp(date(ano, 12, 23))
+        if pd.Timestamp(inicio) <= dt <= pd.Timestamp(fim):
+            urna.append({"_vis": -1, "_dt": dt, "Serviço": "Caixinha Natal (urna)", "Cliente": "Urna",
+                         "Combo": "", "Funcionário": "JPaulo", "Fase": FASE_DONO_FUNC, "Tipo": "Caixinha",
+                         "Período": "", "Conta": "Dinheiro", "_valor": float(rng.integers(150, 600))})
+    if urna:
+        df = pd.concat([df, pd.DataFrame(urna)], ignore_index=True)
+
+    df = df.sort_values(["_dt", "_vis"], kind="stable").reset_index(drop=True)
+    n = len(df)
+    for c in COLS_BASE:
+        if c not in df.columns:
+            df[c] = ""
+
+    primeira = ~df["_vis"].duplicated() & (df["_vis"] >= 0)
+
+    # ---- cartão: Valor = LÍQUIDO, extras preenchidos ----
+    cartao = df["Conta"].eq("Cartão")
+    pct_vis = np.where(rng.random(n_vis) < 0.6, 0.0199, 0.0349)   # débito / crédito por atendimento
+    pct = pct_vis[df["_vis"].clip(lower=0).to_numpy()]
+    taxa = (df["_valor"] * pct).round(2)
+    df.loc[cartao, "ValorBrutoRecebido"] = _brl(df.loc[cartao, "_valor"])
+    df.loc[cartao, "TaxaCartaoValor"] = _brl(taxa[cartao])
+    df.loc[cartao, "TaxaCartaoPct"] = _brl(pd.Series(pct * 100, index=df.index)[cartao]) + "%"
+    df.loc[cartao, "ValorLiquidoRecebido"] = _brl(df.loc[cartao, "_valor"] - taxa[cartao])
+    df.loc[cartao, "FormaPagDetalhe"] = np.where(pct[cartao.to_numpy()] > 0.02, "Crédito", "Débito")
+    df.loc[cartao, "PagamentoID"] = "A-" + _fmt_datas(df.loc[cartao, "_dt"], "%Y%m%d") + df.loc[cartao, "_vis"].astype(str).str.zfill(9)
+    df.loc[cartao, "_valor"] = df.loc[cartao, "_valor"] - taxa[cartao]
+
+    # ---- fiado: em aberto (recentes) ou pago depois ----
+    fiado = df["Conta"].eq("Fiado")
+    idl = "L-" + _fmt_datas(df["_dt"], "%Y%m%d") + df["_vis"].astype(str).str.zfill(9)
+    df.loc[fiado, "IDLancFiado"] = idl[fiado]
+    df.loc[fiado, "VencimentoFiado"] = _fmt_datas(df.loc[fiado, "_dt"] + pd.Timedelta(days=7))
+    recente = df["_dt"] >= pd.Timestamp(fim) - pd.Timedelta(days=45)
+    aberto = fiado & recente & (rng.random(n) < 0.6)
+    pago = fiado & ~aberto
+    dias_pag = pd.to_timedelta(rng.integers(1, 30, n), unit="D")
+    dt_pag = (df["_dt"] + dias_pag).clip(upper=pd.Timestamp(fim))
+    df.loc[aberto, "StatusFiado"] = "Em aberto"
+    df.loc[pago, "StatusFiado"] = "Pago"
+    df.loc[pago, "DataPagamento"] = _fmt_datas(dt_pag[pago])
+
+    # ---- caixinha (só na 1ª linha do atendimento) ----
+    cx = primeira & (rng.random(n) < 0.08)
+    df.loc[cx, "CaixinhaDia"] = _brl(pd.Series(rng.choice([2.0, 5.0, 10.0, 20.0], n), index=df.index)[cx])
+    fundo = primeira & ~cx & (rng.random(n) < 0.01)
+    df.loc[fundo, "CaixinhaFundo"] = _brl(pd.Series(rng.choice([1.0, 2.0, 5.0], n), index=df.index)[fundo])
+
+    df["Data"] = _fmt_datas(df["_dt"])
+    df["Valor"] = _brl(df["_valor"])
+    return df
+
+# =========================
+# DEMAIS ABAS
+# =========================
+def _refid_despesa(data_br, prestador, descricao, valor_float, mepag) -> str:
+    base = f"{data_br.strip()}|{prestador.strip().lower()}|{descricao.strip().lower()}|{valor_float:.2f}|{str(mepag).strip().lower()}"
+    return hashlib.sha1(base.encode("utf-8")).hexdigest()
+
+def gerar_despesas(base: pd.DataFrame, seed: int = 42) -> pd.DataFrame:
+    rng = np.random.default_rng(seed + 1)
+    linhas = []
+    ini, fim = base["_dt"].min(), base["_dt"].max()
+
+    # comissão semanal do Vinicius (terça, janela terça→segunda anterior)
+    vini = base[base["Funcionário"].eq("Vinicius") & base["Tipo"].eq("Serviço")]
+    if not vini.empty:
+        sem = vini.groupby(vini["_dt"].dt.to_period("W-MON"))["_valor"].sum()
+        for per, total in sem.items():
+            terca = per.end_time.normalize() + pd.Timedelta(days=1)
+            d = terca.strftime("%d/%m/%Y")
+            desc = f"Comissão Vinicius — {per.start_time:%d/%m} a {per.end_time:%d/%m}"
+            linhas.append((d, "Vinicius", desc, round(total * 0.5, 2), "Pix"))
+
+    # fixas mensais
+    fixas = [("Aluguel", "Imobiliária", 900.0), ("Energia Equatorial", "Equatorial", 180.0),
+             ("Água Saneago", "Saneago", 70.0), ("Internet Claro", "Claro", 100.0),
+             ("Taxa maquininha", "Stone", 60.0)]
+    for m in pd.period_range(ini, fim, freq="M"):
+        for desc, prest, v in fixas:
+            d = (m.start_time + pd.Timedelta(days=4)).strftime("%d/%m/%Y")
+            linhas.append((d, prest, desc, round(v * rng.uniform(0.85, 1.15), 2), "Pix"))
+
+    # variáveis (produtos, limpeza, marketing...)
+    variaveis = [("Pomada e gel (estoque)", "Barber Shop"), ("Lâminas", "Barber Shop"),
+                 ("Produtos de limpeza", "Mercado"), ("Impulsionamento Instagram", "Meta"),
+                 ("Manutenção máquina", "Técnico"), ("Gasolina", "Posto")]
+    n_var = max(12, len(base) // 40)
+    dts = ini + pd.to_timedelta(rng.integers(0, (fim - ini).days + 1, n_var), unit="D")
+    for dt, i, v in zip(dts, rng.integers(len(variaveis), size=n_var), rng.uniform(10, 250, n_var)):
+        desc, prest = variaveis[i]
+        linhas.append((dt.strftime("%d/%m/%Y"), prest, desc, round(v, 2), rng.choice(["Pix", "Dinheiro", "Cartão"])))
+
+    out = pd.DataFrame(linhas, columns=["Data", "Prestador", "Descrição", "_v", "Me Pag:"])
+    out["RefID"] = [_refid_despesa(*t) for t in linhas]
+    out["Valor"] = _brl(out["_v"])
+    return out[COLS_DESPESAS]
+
+def gerar_status(base: pd.DataFrame, seed: int = 42) -> pd.DataFrame:
+    rng = np.random.default_rng(seed + 2)
+    cli = pd.Series(sorted(c for c in base["Cliente"].unique() if c != "Urna"))
+    n = len(cli)
+    status = np.where(rng.random(n) < 0.85, "Ativo", np.where(rng.random(n) < 0.7, "Inativo", "Ignorado"))
+    foto = np.where(rng.random(n) < 0.5,
+                    "https://res.cloudinary.com/demo/image/upload/" + cli.str.lower().str.replace(" ", "_") + ".jpg", "")
+    sobren = cli.str.split().str[-1]
+    familia = np.where(rng.random(n) < 0.2, "Família " + sobren, "")
+    return pd.DataFrame({"Cliente": cli, "Status": status, "Foto": foto, "Família": familia})[COLS_STATUS]
+
+def gerar_fiado(base: pd.DataFrame):
+    f = base[base["IDLancFiado"].astype(str).ne("")]
+    if f.empty:
+        return pd.DataFrame(columns=COLS_LANC), pd.DataFrame(columns=COLS_PAGT)
+    g = f.groupby("IDLancFiado", sort=False)
+    lanc = pd.DataFrame({
+        "IDLanc": g.size().index,
+        "Data": g["Data"].first().values,
+        "Cliente": g["Cliente"].first().values,
+        "Combo": g["Combo"].first().values,
+        "Servicos": g["Serviço"].agg("+".join).values,
+        "Total": _brl(g["_valor"].sum()).values,
+        "Venc": g["VencimentoFiado"].first().values,
+        "Func": g["Funcionário"].first().values,
+        "Fase": g["Fase"].first().values,
+        "Tipo": g["Tipo"].first().values,
+        "Periodo": g["Período"].first().values,
+    })
+    pagos = f[f["StatusFiado"].eq("Pago")]
+    gp = pagos.groupby("IDLancFiado", sort=False)
+    tot = gp["_valor"].sum()
+    pagt = pd.DataFrame({
+        "IDPagamento": "P-" + pd.Series(gp.size().index).str[2:],
+        "IDLancs": gp.size().index,
+        "DataPagamento": gp["DataPagamento"].first().values,
+        "Cliente": gp["Cliente"].first().values,
+        "Forma": "Pix",
+        "TotalLiquido": _brl(tot).values,
+        "Obs": "",
+        "TotalBruto": _brl(tot).values,
+        "TaxaValor": "0,00",
+        "TaxaPct": "",
+    })
+    return lanc[COLS_LANC], pagt[COLS_PAGT]
+
+def gerar_planilha(n_linhas: int, anos: int = 10, fim: date | None = None, seed: int = 42) -> dict:
+    """{titulo_da_aba: DataFrame} pronto para salvar em CSV / carregar no fake."""
+    base = gerar_base(n_linhas, anos=anos, fim=fim, seed=seed)
+    lanc, pagt = gerar_fiado(base)
+    return {
+        ABA_BASE: base[COLS_BASE],
+        ABA_DESPESAS: gerar_despesas(base, seed=seed),
+        ABA_STATUS: gerar_status(base, seed=seed),
+        ABA_LANC: lanc,
+        ABA_PAGT: pagt,
+    }
+
+def salvar_csv(abas: dict, pasta: str):
+    os.makedirs(pasta, exist_ok=True)
+    for titulo, df in abas.items():
+        df.to_csv(os.path.join(pasta, f"{titulo}.csv"), index=False)
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Gera a planilha sintética (um CSV por aba).")
+    ap.add_argument("--linhas", type=int, default=10_000, help="linhas aproximadas na Base de Dados")
+    ap.add_argument("--anos", type=int, default=10)
+    ap.add_argument("--seed", type=int, default=42)
+    ap.add_argument("--saida", default="bench_data")
+    a = ap.parse_args()
+    abas = gerar_planilha(a.linhas, anos=a.anos, seed=a.seed)
+    salvar_csv(abas, a.saida)
+    for t, df in abas.items():
+        print(f"{t:<20} {len(df):>9} linhas")
+
+
+if __name__ == "__main__":
+    main()
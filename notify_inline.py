@@ -11,6 +11,7 @@ import pandas as pd
 from datetime import datetime
 from google.oauth2.service_account import Credentials
 from gspread_dataframe import get_as_dataframe, set_with_dataframe
+from utils import sheets_cache, fake_sheets
 
 # =========================
 # PARÂMETROS
@@ -62,7 +63,9 @@ if missing:
 # =========================
 # Credenciais GCP
 # =========================
-if os.getenv("GOOGLE_APPLICATION_CREDENTIALS"):
+if fake_sheets.backend_fake_ativo():
+    creds = None
+elif os.getenv("GOOGLE_APPLICATION_CREDENTIALS"):
     try:
         creds = Credentials.from_service_account_file(
             os.getenv("GOOGLE_APPLICATION_CREDENTIALS"),
@@ -85,7 +88,7 @@ else:
     except Exception as e:
         fail(f"GCP service account JSON inválido: {e}")
 
-gc = gspread.authorize(creds)
+gc = fake_sheets.cliente_fake() if creds is None else gspread.authorize(creds)
 sh = gc.open_by_key(SHEET_ID)
 print(f"✅ Conectado no Sheets: {sh.title}")
 
@@ -168,7 +171,7 @@ def make_card_caption(nome, status_label, status_emoji, ultima_dt, media, dias_d
 # =========================
 # Ler abas
 # =========================
-abas = {w.title: w for w in sh.worksheets()}
+abas = sheets_cache.mapa_abas(sh)
 if ABA_BASE not in abas:
     fail(f"Aba '{ABA_BASE}' não encontrada.")
 ws_base = abas[ABA_BASE]
@@ -290,15 +293,15 @@ if ultimo.empty:
 # Cache
 # =========================
 def ensure_cache():
-    try:
-        return sh.worksheet(ABA_STATUS_CACHE)
-    except gspread.exceptions.WorksheetNotFound:
-        ws = sh.add_worksheet(ABA_STATUS_CACHE, rows=2, cols=7)
-        set_with_dataframe(ws, pd.DataFrame(columns=[
-            "Cliente","ultima_visita_cache","status_cache","last_notified_at",
-            "media_cache","visitas_total_cache","feedback_sent_for_date"
-        ]))
-        return ws
+    if ABA_STATUS_CACHE in abas:
+        return abas[ABA_STATUS_CACHE]
+    ws = sh.add_worksheet(ABA_STATUS_CACHE, rows=2, cols=7)
+    sheets_cache.registrar_aba(sh, ws)
+    set_with_dataframe(ws, pd.DataFrame(columns=[
+        "Cliente","ultima_visita_cache","status_cache","last_notified_at",
+        "media_cache","visitas_total_cache","feedback_sent_for_date"
+    ]))
+    return ws
 
 ws_cache = ensure_cache()
 df_cache = get_as_dataframe(ws_cache, evaluate_formulas=True, dtype=str).fillna("")
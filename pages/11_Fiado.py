@@ -25,6 +25,8 @@ from datetime import date, datetime, timedelta
 from io import BytesIO
 import pytz
 import unicodedata
+from streamlit_searchbox import st_searchbox
+from utils import sheets_cache, fake_sheets, livro_fiado, linha_id, metadados_form, busca_clientes
 
 # =============================
 # CONFIG BÁSICA
@@ -57,7 +59,7 @@ BASE_PAG_EXTRAS = [
 # Caixinha padrão único (igual 11_Adicionar_Atendimento)
 CAIXA_COLS = ["CaixinhaDia"]
 
-BASE_COLS_ALL = BASE_COLS_MIN + EXTRA_COLS + BASE_PAG_EXTRAS + CAIXA_COLS
+BASE_COLS_ALL = BASE_COLS_MIN + EXTRA_COLS + BASE_PAG_EXTRAS + CAIXA_COLS + [linha_id.COL_ROWID]
 
 VALORES_PADRAO = {
     "Corte": 25.0, "Pezinho": 7.0, "Barba": 15.0, "Sobrancelha": 7.0,
@@ -146,6 +148,8 @@ def _norm(s: str) -> str:
 
 @st.cache_resource
 def conectar_sheets():
+    if fake_sheets.backend_fake_ativo():
+        return fake_sheets.abrir_planilha_fake(SHEET_ID)
     info = st.secrets["GCP_SERVICE_ACCOUNT"]
     scopes = ["https://spreadsheets.google.com/feeds","https://www.googleapis.com/auth/drive"]
     creds = Credentials.from_service_account_info(info, scopes=scopes)
@@ -156,9 +160,9 @@ def conectar_sheets():
 def carregar_fotos_mapa():
     try:
         sh = conectar_sheets()
-        if STATUS_ABA not in [w.title for w in sh.worksheets()]:
+        if not sheets_cache.aba_existe(sh, STATUS_ABA):
             return {}
-        ws = sh.worksheet(STATUS_ABA)
+        ws = sheets_cache.get_ws(sh, STATUS_ABA)
         df = get_as_dataframe(ws).fillna("")
         df.columns = [str(c).strip() for c in df.columns]
         df = df.loc[:, ~pd.Index(df.columns).duplicated(keep="first")]
@@ -205,13 +209,7 @@ def _norm_key(s: str) -> str:
     return unicodedata.normalize("NFKC", str(s).strip()).casefold()
 
 def col_map(ws):
-    headers = ws.row_values(1)
-    cmap = {}
-    for i, h in enumerate(headers):
-        k = _norm_key(h)
-        if k and k not in cmap:
-            cmap[k] = i + 1
-    return cmap
+    return sheets_cache.col_map(ws)
 
 def ensure_headers(ws, desired_headers):
     """Garante headers sem duplicação, comparando por nome normalizado."""
@@ -220,9 +218,10 @@ def ensure_headers(ws, desired_headers):
         s = unicodedata.normalize("NFKC", str(s or "")).strip()
         return s.casefold()
 
-    headers = ws.row_values(1)
+    headers = sheets_cache.cabecalho(ws)
     if not headers:
         ws.append_row(desired_headers)
+        sheets_cache.definir_cabecalho(ws, desired_headers)
         return {h: i+1 for i, h in enumerate(desired_headers)}
 
     # normaliza existentes e remove duplicatas mantendo o 1º
@@ -238,21 +237,24 @@ def ensure_headers(ws, desired_headers):
     # se houve mudança (duplicatas removidas), reescreve a linha 1 “limpa”
     if fixed != headers:
         ws.update('A1', [fixed])
+        sheets_cache.definir_cabecalho(ws, fixed)
 
     # adiciona apenas os que realmente faltam (por normalização)
     existing_norm = {_norm(h) for h in fixed}
     missing = [h for h in desired_headers if _norm(h) not in existing_norm]
     if missing:
         ws.update('A1', [fixed + missing])
+        sheets_cache.definir_cabecalho(ws, fixed + missing)
 
-    headers_final = ws.row_values(1)
+    headers_final = sheets_cache.cabecalho(ws)
     return {h: i+1 for i, h in enumerate(headers_final)}
 
 def append_rows_generic(ws, dicts, default_headers=None):
-    headers = ws.row_values(1)
+    headers = sheets_cache.cabecalho(ws)
     if not headers:
         headers = default_headers or sorted({k for d in dicts for k in d.keys()})
         ws.append_row(headers)
+        sheets_cache.definir_cabecalho(ws, headers)
     hdr_norm = [_norm_key(h) for h in headers]
     rows = []
     for d in dicts:
@@ -368,30 +370,23 @@ def data_reg_do_id(idl: str):
         pass
     return None
 
-def periodo_do_id(df: pd.DataFrame, idl: str) -> str:
-    """Se todas as linhas do ID tiverem o mesmo Período, retorna ele; senão, ''. """
-    try:
-        vals = (df.loc[df["IDLancFiado"] == idl, "Período"]
-                  .dropna().astype(str).str.strip())
-        vals = [v for v in vals if v]
-        uniq = sorted(set(vals))
-        return uniq[0] if len(uniq) == 1 else ""
-    except Exception:
-        return ""
 
 # =============================
 # SHEETS OPS
 # =============================
 def garantir_aba(ss, nome, cols):
     try:
-        ws = ss.worksheet(nome)
+        ws = sheets_cache.get_ws(ss, nome)
     except gspread.WorksheetNotFound:
         ws = ss.add_worksheet(title=nome, rows=200, cols=max(10, len(cols)))
+        sheets_cache.registrar_aba(ss, ws)
         ws.append_row(cols)
+        sheets_cache.definir_cabecalho(ws, cols)
         return ws
-    existing = ws.row_values(1)
+    existing = sheets_cache.cabecalho(ws)
     if not existing:
         ws.append_row(cols)
+        sheets_cache.definir_cabecalho(ws, cols)
     return ws
 
 def read_base_raw(ss):
@@ -407,34 +402,57 @@ def read_base_raw(ss):
     return df.fillna(""), ws
 
 def append_rows_base(ws, novas_dicts):
-    headers = ws.row_values(1)
+    headers = sheets_cache.cabecalho(ws)
     if not headers:
         headers = BASE_COLS_ALL
         ws.append_row(headers)
+        sheets_cache.definir_cabecalho(ws, headers)
     hdr_norm = [_norm_key(h) for h in headers]
+    rowids = linha_id.carimbar(novas_dicts)  # RowID estável gravado junto com a linha
     rows = []
     for d in novas_dicts:
         d_norm = {_norm_key(k): v for k, v in d.items()}
         rows.append([d_norm.get(hn, "") for hn in hdr_norm])
     if rows:
-        ws.append_rows(rows, value_input_option="USER_ENTERED")
+        resp = ws.append_rows(rows, value_input_option="USER_ENTERED")
+        linha_id.registrar_append(ws, rowids, resp)
+
+@st.cache_resource(ttl=300, max_entries=1, show_spinner=False)
+def _livro(escritas: int):
+    """Livro dos fiados (1 leitura da Base por versão); as ações desta página atualizam ele no lugar."""
+    df, ws = read_base_raw(conectar_sheets())
+    linha_id.registrar_lidas(ws, df)  # só lê: linhas sem RowID são preenchidas em 33_Diagnostico_Base
+    return livro_fiado.LivroFiado(df)
+
+def livro():
+    """Remonta quando outra página regrava a Base (ex.: fiado lançado em 3_Adicionar_Atendimento)."""
+    return _livro(sheets_cache.versao_escrita(ABA_BASE))
+
+@st.cache_resource(ttl=300, max_entries=1, show_spinner=False)
+def _metadados(escritas: int):
+    return metadados_form.MetadadosForm(livro().base, data_fmt=DATA_FMT)
+
+def metadados():
+    """Listas e última forma de pagamento por cliente; lançar/quitar acrescentam no lugar."""
+    return _metadados(sheets_cache.versao_escrita(ABA_BASE))
+
+@st.cache_resource(ttl=300, max_entries=1, show_spinner=False)
+def _indice_clientes(escritas: int):
+    return busca_clientes.IndiceClientes.da_base(livro().base, data_fmt=DATA_FMT)
+
+def indice_clientes():
+    """Busca de clientes sem acento, por recência/frequência; lançamentos acrescentam no lugar."""
+    return _indice_clientes(sheets_cache.versao_escrita(ABA_BASE))
 
 @st.cache_data
 def carregar_listas():
-    ss = conectar_sheets()
-    ws_base = garantir_aba(ss, ABA_BASE, BASE_COLS_ALL)
-    ensure_headers(ws_base, BASE_COLS_ALL)
+    meta = metadados()
 
-    df_list = get_as_dataframe(ws_base, evaluate_formulas=True, header=0).fillna("")
-    df_list.columns = [str(c).strip() for c in df_list.columns]
-    df_list = df_list.loc[:, ~pd.Index(df_list.columns).duplicated(keep="first")]
+    clientes = list(meta.clientes)
+    combos  = list(meta.combos)
+    servs   = list(meta.servicos)
 
-    clientes = sorted([c for c in df_list.get("Cliente", "").astype(str).str.strip().unique() if c])
-    combos  = sorted([c for c in df_list.get("Combo", "").astype(str).str.strip().unique() if c])
-    servs   = sorted([s for s in df_list.get("Serviço", "").astype(str).str.strip().unique() if s])
-
-    contas_raw = [c for c in df_list.get("Conta", "").astype(str).str.strip().unique() if c]
-    base_contas = sorted([c for c in contas_raw if c.lower() != "fiado"])
+    base_contas = [c for c in meta.contas if c.lower() != "fiado"]
     if "Nubank CNPJ" not in base_contas:
         base_contas.append("Nubank CNPJ")
 
@@ -453,19 +471,6 @@ def parse_combo(combo_str):
         ajustadas.append(hit)
     return ajustadas
 
-def ultima_forma_pagto_cliente(df_base, cliente):
-    if df_base.empty or not cliente:
-        return None
-    df = df_base[(df_base["Cliente"] == cliente) & df_base["Conta"].str.lower() != "fiado"].copy()
-    if df.empty:
-        return None
-    try:
-        df["__d"] = pd.to_datetime(df["Data"], format=DATA_FMT, errors="coerce")
-        df = df.sort_values("__d", ascending=False)
-    except Exception:
-        pass
-    return str(df.iloc[0]["Conta"]) if not df.empty else None
-
 # ===== Caches
 clientes, combos_exist, servs_exist, base_contas = carregar_listas()
 FOTOS = carregar_fotos_mapa()
@@ -493,7 +498,8 @@ if acao == "➕ Lançar fiado":
     with tab_uni:
         c1, c2 = st.columns(2)
         with c1:
-            cliente = st.selectbox("Cliente", options=[""] + clientes, index=0, key="fiado_cli_uni")
+            cliente = st_searchbox(indice_clientes().buscar, label="Cliente", placeholder="Digite para buscar...",
+                                   key="fiado_cli_uni") or ""
             if not cliente:
                 cliente = st.text_input("Ou digite o nome do cliente", "", key="fiado_cli_txt_uni")
             if cliente:
@@ -545,6 +551,9 @@ if acao == "➕ Lançar fiado":
                 ws_base = garantir_aba(ss, ABA_BASE, BASE_COLS_ALL)
                 ensure_headers(ws_base, BASE_COLS_ALL)
                 append_rows_base(ws_base, novas)
+                livro().lancar(novas)
+                metadados().acrescentar(pd.DataFrame(novas))
+                indice_clientes().acrescentar((n["Cliente"], n["Data"]) for n in novas)
 
                 total = float(pd.to_numeric(pd.DataFrame(novas)["Valor"], errors="coerce").fillna(0).sum())
                 ws_l = garantir_aba(ss, ABA_LANC, ["IDLanc","Data","Cliente","Combo","Servicos","Total","Venc","Func","Fase","Tipo","Periodo"])
@@ -706,6 +715,9 @@ if acao == "➕ Lançar fiado":
                         })
 
                     append_rows_base(ws_base, novas)
+                    livro().lancar(novas)
+                    metadados().acrescentar(pd.DataFrame(novas))
+                    indice_clientes().acrescentar((n["Cliente"], n["Data"]) for n in novas)
                     total = float(pd.to_numeric(pd.DataFrame(novas)["Valor"], errors="coerce").fillna(0).sum())
                     append_rows_generic(ws_l, [{
                         "IDLanc": idl, "Data": data_str, "Cliente": cliente_i,
@@ -743,10 +755,8 @@ elif acao == "💰 Registrar pagamento":
     st.subheader("💰 Registrar pagamento — escolha o cliente e depois o(s) fiado(s) em aberto")
 
     ss = conectar_sheets()
-    df_base_full, ws_base = read_base_raw(ss)
-
-    df_abertos = df_base_full[df_base_full.get("StatusFiado", "") == "Em aberto"].copy()
-    clientes_abertos = sorted(df_abertos["Cliente"].dropna().astype(str).str.strip().unique().tolist())
+    lv = livro()
+    clientes_abertos = lv.clientes()
 
     colc1, colc2 = st.columns([1, 1])
     with colc1:
@@ -754,7 +764,7 @@ elif acao == "💰 Registrar pagamento":
         if cliente_sel:
             show_foto_cliente(cliente_sel)
 
-    ultima = ultima_forma_pagto_cliente(df_base_full, cliente_sel) if cliente_sel else None
+    ultima = metadados().ultima_conta_paga(cliente_sel) if cliente_sel else None
     lista_contas_default = ["Pix","Dinheiro","Cartão","Transferência","Pagseguro","Mercado Pago","Nubank CNPJ",
                             "SumUp","Cielo","Stone","Getnet","Outro","Nubank"]
     lista_contas = sorted(set(base_contas + lista_contas_default), key=lambda s: s.lower())
@@ -777,41 +787,23 @@ elif acao == "💰 Registrar pagamento":
     grupo_cli = pd.DataFrame()
 
     if cliente_sel:
-        grupo_cli = df_abertos[df_abertos["Cliente"].astype(str).str.strip() == str(cliente_sel).strip()].copy()
+        grupo_cli = lv.abertas_do_cliente(cliente_sel)
 
         if modo_sel.startswith("Por ID"):
-            grupo_cli["Data"]  = pd.to_datetime(grupo_cli["Data"], format=DATA_FMT, errors="coerce").dt.strftime(DATA_FMT)
-            grupo_cli["Valor"] = pd.to_numeric(grupo_cli["Valor"], errors="coerce").fillna(0)
-
-            def atraso_max(idval):
-                v = grupo_cli.loc[grupo_cli["IDLancFiado"] == idval, "VencimentoFiado"].dropna().astype(str)
-                try:
-                    vdt = pd.to_datetime(v.iloc[0], format=DATA_FMT, errors="coerce").date() if not v.empty else None
-                except Exception:
-                    vdt = None
-                if vdt:
-                    d = (today_local() - vdt).days
-                    return d if d > 0 else 0
-                return 0
-
-            resumo_ids = (
-                grupo_cli.groupby("IDLancFiado", as_index=False)
-                .agg(Data=("Data","min"), ValorTotal=("Valor","sum"), Qtde=("Serviço","count"), Combo=("Combo","first"))
+            resumo_ids = lv.ids_do_cliente(cliente_sel).assign(
+                Atraso=lambda d: livro_fiado.LivroFiado.dias_atraso(d["VencPrimeiro"], today_local())
             )
             for _, r in resumo_ids.iterrows():
-                atraso = atraso_max(r["IDLancFiado"])
-                badge = "Em dia" if atraso <= 0 else f"{int(atraso)}d atraso"
-
-                dt_reg = data_reg_do_id(r["IDLancFiado"])
-                periodo_id = periodo_do_id(grupo_cli, r["IDLancFiado"])
+                atraso = int(r["Atraso"])
+                badge = "Em dia" if atraso <= 0 else f"{atraso}d atraso"
 
                 partes = [r["IDLancFiado"]]
-                if dt_reg:
-                    partes.append(f"reg: {dt_reg.strftime(DATA_FMT)}")
-                if periodo_id:
-                    partes.append(periodo_id)
+                if pd.notna(r["RegistradoEm"]):
+                    partes.append(f"reg: {r['RegistradoEm'].strftime(DATA_FMT)}")
+                if r["Periodo"]:
+                    partes.append(r["Periodo"])
 
-                rotulo = " • ".join(partes) + f" • {int(r['Qtde'])} serv. • R$ {r['ValorTotal']:.2f} • {badge}"
+                rotulo = " • ".join(partes) + f" • {int(r['QtdeServicos'])} serv. • R$ {r['ValorTotal']:.2f} • {badge}"
                 if pd.notna(r["Combo"]) and str(r["Combo"]).strip():
                     rotulo += f" • {r['Combo']}"
                 ids_opcoes.append((r["IDLancFiado"], rotulo))
@@ -826,10 +818,7 @@ elif acao == "💰 Registrar pagamento":
                 format_func=lambda x: labels_id.get(x, x),
             )
         else:
-            linhas_cli = grupo_cli.copy()
-            linhas_cli["IdxBase"] = linhas_cli.index
-            linhas_cli["DataFmt"] = pd.to_datetime(linhas_cli["Data"], format=DATA_FMT, errors="coerce").dt.strftime(DATA_FMT)
-            linhas_cli["ValorNum"] = pd.to_numeric(linhas_cli["Valor"], errors="coerce").fillna(0.0)
+            linhas_cli = grupo_cli.assign(IdxBase=grupo_cli.index, DataFmt=grupo_cli["DataDt"].dt.strftime(DATA_FMT))
             for _, r in linhas_cli.iterrows():
                 lbl = f"{r['IDLancFiado']} • {r['DataFmt'] or '-'} • {r['Serviço']} • R$ {r['ValorNum']:.2f} • {r['Funcionário']}"
                 linhas_label_map[int(r["IdxBase"])] = lbl
@@ -881,12 +870,12 @@ elif acao == "💰 Registrar pagamento":
 
     if cliente_sel:
         if modo_sel.startswith("Por ID"):
-            subset_preview = df_abertos[df_abertos["IDLancFiado"].isin(id_selecionados)].copy()
+            subset_preview = lv.selecao(ids=id_selecionados)
         else:
-            subset_preview = df_abertos[df_abertos.index.isin(linhas_indices_sel)].copy()
+            subset_preview = lv.selecao(idxs=linhas_indices_sel)
 
     if not subset_preview.empty:
-        subset_preview["Valor"] = pd.to_numeric(subset_preview["Valor"], errors="coerce").fillna(0)
+        subset_preview = subset_preview.assign(Valor=subset_preview["ValorNum"])
         total_sel = float(subset_preview["Valor"].sum())
 
         st.info(
@@ -928,20 +917,30 @@ elif acao == "💰 Registrar pagamento":
     disabled_btn = not (cliente_sel and tem_selecao and forma_pag)
 
     if st.button("Registrar pagamento", use_container_width=True, disabled=disabled_btn):
-        dfb, ws_base2 = read_base_raw(ss)
+        ws_base2 = garantir_aba(ss, ABA_BASE, BASE_COLS_ALL)
         ensure_headers(ws_base2, BASE_COLS_ALL)
-        format_extras_numeric(ws_base2)
 
         if modo_sel.startswith("Por ID"):
-            mask = dfb.get("IDLancFiado", "").isin(id_selecionados)
+            subset_all = lv.selecao(ids=id_selecionados)
         else:
-            mask = dfb.index.isin(linhas_indices_sel)
+            subset_all = lv.selecao(idxs=linhas_indices_sel)
 
-        if not mask.any():
+        # RowID → linha atual na planilha (mapa em cache + conferência só das células alvo)
+        linha_de = linha_id.localizar(ws_base2, subset_all["RowID"]) if not subset_all.empty else {}
+
+        if subset_all.empty:
             st.error("Nenhuma linha encontrada para a seleção feita.")
+        elif (subset_all["RowID"].astype(str).str.strip() == "").any():
+            st.error("Há linhas sem RowID nesta seleção. Preencha em 🔧 Diagnóstico da Base e registre de novo.")
+        elif len(linha_de) < subset_all["RowID"].nunique():
+            # linha apagada/alterada na planilha desde a leitura
+            _livro.clear()
+            _metadados.clear()
+            _indice_clientes.clear()
+            st.error("A Base mudou desde a última leitura. Recarreguei os fiados — confira a seleção e registre de novo.")
         else:
-            subset_all = dfb[mask].copy()
-            subset_all["Valor"] = pd.to_numeric(subset_all["Valor"], errors="coerce").fillna(0)
+            format_extras_numeric(ws_base2)
+            subset_all = subset_all.assign(Valor=subset_all["ValorNum"])
             total_bruto = float(subset_all["Valor"].sum())
             data_pag_str = data_pag.strftime(DATA_FMT)
 
@@ -955,9 +954,10 @@ elif acao == "💰 Registrar pagamento":
 
             headers_map = col_map(ws_base2)
             updates, liq_acum = [], 0.0
+            gravados = {}  # idx → {coluna: valor} (p/ atualizar o livro depois)
             idxs = list(subset_all.index)
             for i, idx in enumerate(idxs):
-                row_no = int(idx) + 2
+                row_no = linha_de[str(subset_all.at[idx, "RowID"]).strip()]
                 bruto_i = float(subset_all.loc[idx, "Valor"])
                 if total_bruto > 0:
                     liq_i = round(total_liquido * (bruto_i / total_bruto), 2)
@@ -982,6 +982,7 @@ elif acao == "💰 Registrar pagamento":
                     "FormaPagDetalhe": (f"{(bandeira_cartao or '-')} | {tipo_cartao} | {int(parcelas_cartao)}x" if usar_cartao else ""),
                     "PagamentoID": id_pag
                 }
+                gravados[idx] = pairs
                 for col, val in pairs.items():
                     c = headers_map.get(_norm_key(col))
                     if c:
@@ -1003,14 +1004,16 @@ elif acao == "💰 Registrar pagamento":
                             linhas_id = subset_all[subset_all["IDLancFiado"].astype(str) == idl]
                             if not linhas_id.empty:
                                 idx_primeiro = int(linhas_id.index[0])
-                                row_no = idx_primeiro + 2
+                                row_no = linha_de[str(subset_all.at[idx_primeiro, "RowID"]).strip()]
+                                gravados[idx_primeiro]["CaixinhaDia"] = float(caixinha_dia_val)
                                 updates_cx.append({
                                     "range": rowcol_to_a1(row_no, col_cx),
                                     "values": [[float(caixinha_dia_val)]],
                                 })
                     else:
                         idx_primeiro = int(subset_all.index[0])
-                        row_no = idx_primeiro + 2
+                        row_no = linha_de[str(subset_all.at[idx_primeiro, "RowID"]).strip()]
+                        gravados[idx_primeiro]["CaixinhaDia"] = float(caixinha_dia_val)
                         updates_cx.append({
                             "range": rowcol_to_a1(row_no, col_cx),
                             "values": [[float(caixinha_dia_val)]],
@@ -1019,6 +1022,9 @@ elif acao == "💰 Registrar pagamento":
                 if updates_cx:
                     ws_base2.batch_update(updates_cx, value_input_option="USER_ENTERED")
 
+            lv.quitar(gravados)
+            metadados().acrescentar(lv.base.loc[list(gravados)])  # Conta da quitação vira a última forma
+
             # Registros auxiliares (taxas e pagamentos)
             if usar_cartao:
                 try:
@@ -1118,7 +1124,7 @@ elif acao == "💰 Registrar pagamento":
                 periodo_txt = (periodos[0] if len(set(periodos)) == 1 else "—")
                 atendido_por_txt = (funcs[0] if len(set(funcs)) == 1 else ", ".join(sorted(set(funcs))))
 
-                df_priv, _ = read_base_raw(conectar_sheets())
+                df_priv = lv.linhas_do_cliente(cliente_sel)  # já com o pagamento aplicado
 
                 def _resumo_visitas(df_base: pd.DataFrame, cliente: str):
                     if df_base is None or df_base.empty or not cliente: return None, None, 0, "-"
@@ -1246,13 +1252,11 @@ elif acao == "💰 Registrar pagamento":
 # ---------- 3) Em aberto & exportação ----------
 elif acao == "📋 Em aberto & exportação":
     st.subheader("📋 Fiados em aberto (agrupados por ID)")
-    ss = conectar_sheets()
-    df_base_full, _ = read_base_raw(ss)
+    base_lv, em_aberto, ids_lv = livro().retrato()
 
-    if df_base_full.empty:
+    if base_lv.empty:
         st.info("Sem dados.")
     else:
-        em_aberto = df_base_full[df_base_full.get("StatusFiado","") == "Em aberto"].copy()
         if em_aberto.empty:
             st.success("Nenhum fiado em aberto 🎉")
         else:
@@ -1272,29 +1276,16 @@ elif acao == "📋 Em aberto & exportação":
                     em_aberto = em_aberto[em_aberto["Funcionário"] == filtro_func]
 
             hoje = today_local()
-            def parse_dt(x):
-                try:
-                    return datetime.strptime(str(x), DATA_FMT).date()
-                except Exception:
-                    return None
-            em_aberto["__venc"] = em_aberto["VencimentoFiado"].apply(parse_dt)
-            em_aberto["DiasAtraso"] = em_aberto["__venc"].apply(
-                lambda d: (hoje - d).days if (d is not None and hoje > d) else 0
-            )
+            em_aberto = em_aberto.assign(DiasAtraso=livro_fiado.LivroFiado.dias_atraso(em_aberto["Venc"], hoje))
             em_aberto["Situação"] = em_aberto["DiasAtraso"].apply(lambda n: "Em dia" if n<=0 else f"{int(n)}d atraso")
+            em_aberto["Valor"] = em_aberto["ValorNum"]
 
-            em_aberto["Valor"] = pd.to_numeric(em_aberto["Valor"], errors="coerce").fillna(0)
-            resumo = (
-                em_aberto.groupby(["IDLancFiado","Cliente"], as_index=False)
-                .agg(ValorTotal=("Valor","sum"), QtdeServicos=("Serviço","count"),
-                     Combo=("Combo","first"), MaxAtraso=("DiasAtraso","max"))
-            )
+            # resumo por ID já vem do livro; com filtro de funcionário o ID pode vir parcial → resume o recorte
+            resumo = ids_lv if not filtro_func else livro_fiado.LivroFiado.resumir(em_aberto)
+            resumo = resumo[resumo["IDLancFiado"].isin(em_aberto["IDLancFiado"])].copy()
+            resumo["MaxAtraso"] = livro_fiado.LivroFiado.dias_atraso(resumo["VencMin"], hoje)
             resumo["Situação"] = resumo["MaxAtraso"].apply(lambda n: "Em dia" if n<=0 else f"{int(n)}d atraso")
-
-            resumo["RegistradoEm"] = resumo["IDLancFiado"].apply(
-                lambda x: (data_reg_do_id(x).strftime(DATA_FMT) if data_reg_do_id(x) else "-")
-            )
-            resumo["Periodo"] = resumo["IDLancFiado"].apply(lambda x: periodo_do_id(em_aberto, x))
+            resumo["RegistradoEm"] = resumo["RegistradoEm"].dt.strftime(DATA_FMT).fillna("-")
 
             st.dataframe(
                 resumo.sort_values(["MaxAtraso","ValorTotal"], ascending=[False, False])[[
@@ -1306,6 +1297,7 @@ elif acao == "📋 Em aberto & exportação":
             total = float(resumo["ValorTotal"].sum())
             st.metric("Total em aberto", _fmt_brl(total))
 
+            em_aberto = em_aberto.drop(columns=["_cli", "ValorNum", "DataDt", "Venc"])
             try:
                 from openpyxl import Workbook  # noqa
                 buf = BytesIO()
@@ -1326,7 +1318,7 @@ else:  # acao == "📗 Pagos (histórico)"
 
     ss = conectar_sheets()
 
-    df_base, _ = read_base_raw(ss)
+    df_base = livro().base
     df_pagos_base = df_base[df_base.get("StatusFiado", "") == "Pago"].copy()
 
     ws_p = garantir_aba(ss, ABA_PAGT, PAGT_COLS)
@@ -3,6 +3,7 @@ import pandas as pd
 import gspread
 from gspread_dataframe import get_as_dataframe
 from google.oauth2.service_account import Credentials
+from utils import base_dados, cubo
 import plotly.express as px
 import io
 
@@ -22,20 +23,20 @@ def conectar_sheets():
 @st.cache_data
 def carregar_bases():
     planilha = conectar_sheets()
-    df_base = get_as_dataframe(planilha.worksheet("Base de Dados")).dropna(how="all")
+    df_base = base_dados.carregar_base(planilha)
     df_desp = get_as_dataframe(planilha.worksheet("Despesas")).dropna(how="all")
 
-    df_base.columns = df_base.columns.str.strip()
-    df_base["Data"] = pd.to_datetime(df_base["Data"], errors="coerce")
-    df_base = df_base.dropna(subset=["Data"])
-    df_base["Ano"] = df_base["Data"].dt.year
-    df_base["Mês"] = df_base["Data"].dt.month
+    # receita por (Ano, Mês, Fase) sai do cubo diário — a base crua não fica em memória
+    df_base = df_base.assign(ValorNum=df_base["Valor"].fillna(0.0)) if "Valor" in df_base.columns else df_base
+    receita = cubo.rolar(cubo.montar_cubo(df_base), por=["Ano", "Mês", "Fase"], medidas=["ValorNum"])
+    receita = receita.rename(columns={"ValorNum": "Valor"}).dropna(subset=["Fase"])
 
     # Padronizar nomes antigos de fases
-    df_base["Fase"] = df_base["Fase"].replace({
+    receita["Fase"] = receita["Fase"].astype(str).replace({
         "Funcionário": "Dono + funcionário",
         "Dono Salão": "Dono (sozinho)"
     })
+    receita = receita.groupby(["Ano", "Mês", "Fase"], as_index=False)["Valor"].sum()
 
     df_desp.columns = df_desp.columns.str.strip()
     df_desp["Data"] = pd.to_datetime(df_desp["Data"], errors="coerce")
@@ -43,7 +44,7 @@ def carregar_bases():
     df_desp["Ano"] = df_desp["Data"].dt.year
     df_desp["Mês"] = df_desp["Data"].dt.month
 
-    return df_base, df_desp
+    return receita, df_desp
 
 df, df_despesas = carregar_bases()
 
@@ -1,7 +1,10 @@
 import streamlit as st
 import pandas as pd
 import plotly.express as px
+import gspread
+from google.oauth2.service_account import Credentials
 from datetime import datetime
+from utils import busca_clientes, fake_sheets, base_dados, visitas
 
 st.set_page_config(page_title="Atendimentos por Período", page_icon="⏱️", layout="wide")
 st.title("⏱️ Atendimentos por Período (sem horários)")
@@ -9,24 +12,41 @@ st.title("⏱️ Atendimentos por Período (sem horários)")
 # ============================
 # 1) CARREGAR DADOS
 # ============================
-@st.cache_data
+SHEET_ID = "1qtOF1I7Ap4By2388ySThoVlZHbI3rAJv_haEcil0IUE"
+
+@st.cache_resource
+def conectar_sheets():
+    if fake_sheets.backend_fake_ativo():
+        return fake_sheets.cliente_fake().open_by_key(SHEET_ID)
+    info = st.secrets["GCP_SERVICE_ACCOUNT"]
+    escopo = ["https://spreadsheets.google.com/feeds", "https://www.googleapis.com/auth/drive"]
+    credenciais = Credentials.from_service_account_info(info, scopes=escopo)
+    return gspread.authorize(credenciais).open_by_key(SHEET_ID)
+
+@st.cache_data(ttl=300)
 def carregar_dados_google_sheets():
-    url = "https://docs.google.com/spreadsheets/d/1qtOF1I7Ap4By2388ySThoVlZHbI3rAJv_haEcil0IUE/gviz/tq?tqx=out:csv&sheet=Base%20de%20Dados"
-    df = pd.read_csv(url)
-    # Normalizações básicas
-    if "Data" in df.columns:
-        df["Data"] = pd.to_datetime(df["Data"], errors='coerce').dt.date
-    # Garante coluna Período
-    if "Período" not in df.columns:
-        df["Período"] = pd.NA
-    # Normaliza valores de Período
-    norm = {"manha":"Manhã","Manha":"Manhã","manha ":"Manhã",
-            "tarde":"Tarde","noite":"Noite"}
-    df["Período"] = df["Período"].astype(str).str.strip().replace(norm)
-    df.loc[~df["Período"].isin(["Manhã","Tarde","Noite"]), "Período"] = pd.NA
+    df = base_dados.carregar_base(conectar_sheets())
+    # Garante colunas usadas
+    for c in ["Cliente", "Funcionário", "Tipo", "Combo", "Período"]:
+        if c not in df.columns:
+            df[c] = pd.NA
+    # Normaliza valores de Período (Manhã/Tarde/Noite; resto → vazio)
+    df["Período"] = visitas.normalizar_periodo(df["Período"])
+    df.attrs["__versao__"] = base_dados.versao(df)
     return df
 
+@st.cache_data(max_entries=1)
+def carregar_visitas(versao: int):
+    """1 atendimento por Cliente+Data — montado 1x por versão da base."""
+    return visitas.montar(carregar_dados_google_sheets())
+
+@st.cache_resource(max_entries=1)
+def indice_clientes(versao: int):
+    """Busca de clientes sem acento (1x por versão da base: relida a base, o índice é refeito)."""
+    return busca_clientes.IndiceClientes.da_base(carregar_dados_google_sheets())
+
 df = carregar_dados_google_sheets()
+versao = df.attrs["__versao__"]
 
 # Checagem mínima de colunas
 colunas_necessarias = ["Cliente", "Funcionário", "Tipo", "Combo", "Data", "Período"]
@@ -43,7 +63,7 @@ st.markdown(f"<small><i>Registros carregados: {len(df)}</i></small>", unsafe_all
 st.markdown("### 🎛️ Filtros")
 col_f1, col_f2, col_f3, col_f4 = st.columns(4)
 
-funcionarios = sorted(df["Funcionário"].dropna().unique().tolist())
+funcionarios = sorted(df["Funcionário"].dropna().astype(str).unique().tolist())
 periodos_opts = ["Manhã", "Tarde", "Noite"]
 
 with col_f1:
@@ -55,30 +75,23 @@ with col_f3:
 with col_f4:
     periodos_sel = st.multiselect("Período (turno)", periodos_opts, default=periodos_opts)
 
-# aplica filtros
-df = df[df["Funcionário"].isin(funcionario_selecionado)]
-if cliente_busca:
-    df = df[df["Cliente"].astype(str).str.contains(cliente_busca, case=False, na=False)]
-if isinstance(periodo_data, list) and len(periodo_data) == 2:
-    df = df[(df["Data"] >= periodo_data[0]) & (df["Data"] <= periodo_data[1])]
-df = df[df["Período"].isin(periodos_sel)]
-
 # ============================
 # 3) ATENDIMENTO ÚNICO POR DIA (Cliente+Data)
 # ============================
-# Junta combos do dia e considera 1 atendimento por Cliente+Data
-base_group = df.groupby(["Cliente","Data"]).agg({
-    "Funcionário":"first",
-    "Tipo": lambda x: ', '.join(sorted(set([str(v) for v in x if pd.notnull(v)]))),
-    "Combo": lambda x: ', '.join(sorted(set([str(v) for v in x if pd.notnull(v)]))),
-    "Período": lambda x: pd.Series([v for v in x if pd.notna(v)]).mode().iloc[0] if any(pd.notna(x)) else pd.NA
-}).reset_index()
-
-# Categoria simples/combos (só por informação)
-base_group["Categoria"] = base_group["Combo"].apply(lambda x: "Combo" if "+" in str(x) or "," in str(x) else "Simples")
+# Tabela de visitas pronta (combos do dia juntos; Período = moda do dia); filtros valem por visita
+base_group = carregar_visitas(versao)
+base_group = base_group[base_group["Funcionário"].isin(funcionario_selecionado)]
+if cliente_busca:
+    base_group = base_group[base_group["Cliente"].astype(str).str.strip().isin(indice_clientes(versao).filtrar(cliente_busca))]
+if isinstance(periodo_data, list) and len(periodo_data) == 2:
+    ini_d, fim_d = pd.Timestamp(periodo_data[0]), pd.Timestamp(periodo_data[1])
+    base_group = base_group[(base_group["Data"] >= ini_d) & (base_group["Data"] <= fim_d)]
+base_group = base_group[base_group["Período"].isin(periodos_sel)].copy()
+base_group["Cliente"] = base_group["Cliente"].astype(str)
+base_group["Período"] = base_group["Período"].astype(str)
 
 # Cópia com Data em datetime pra gráficos por dia
-base_group["Data_dt"] = pd.to_datetime(base_group["Data"], errors="coerce")
+base_group["Data_dt"] = base_group["Data"]
 
 # ============================
 # 4) INSIGHTS SIMPLES (ÚLTIMOS 7 DIAS)
@@ -7,6 +7,8 @@ import gspread
 from io import BytesIO
 from PIL import Image
 from google.oauth2.service_account import Credentials
+from streamlit_searchbox import st_searchbox
+from utils import busca_clientes
 
 st.set_page_config(page_title="Upload Imagem Cliente")
 st.markdown("""
@@ -43,7 +45,13 @@ if 'Cliente' not in df_status.columns:
 nomes_clientes = sorted([nome for nome in df_status['Cliente'].dropna() if nome.strip() != ""])
 
 # =============== SELEÇÃO DO CLIENTE ===============
-nome_cliente = st.selectbox("Selecione o cliente", nomes_clientes, placeholder="Digite para buscar...")
+@st.cache_resource
+def indice_clientes(nomes: tuple):
+    return busca_clientes.IndiceClientes(nomes)
+
+nome_cliente = st_searchbox(indice_clientes(tuple(nomes_clientes)).buscar, label="Selecione o cliente",
+                            placeholder="Digite para buscar...", key="busca_cliente_upload",
+                            default=(nomes_clientes[0] if nomes_clientes else ""))
 nome_arquivo = nome_cliente.lower().replace(" ", "_") + ".jpg"
 pasta = "Fotos clientes"
 
@@ -1,8 +1,10 @@
+import threading
+
 import streamlit as st
 import pandas as pd
 import gspread
-from gspread_dataframe import get_as_dataframe, set_with_dataframe
 from google.oauth2.service_account import Credentials
+from utils import sheets_cache, fake_sheets, escrita
 
 st.set_page_config(page_title="🔄 Sincronizar Clientes", layout="wide")
 st.title("🔄 Sincronizar Clientes")
@@ -11,30 +13,60 @@ st.title("🔄 Sincronizar Clientes")
 SHEET_ID = "1qtOF1I7Ap4By2388ySThoVlZHbI3rAJv_haEcil0IUE"
 BASE_ABA = "Base de Dados"
 STATUS_ABA = "clientes_status"
+COLS_STATUS = ["Cliente", "Status", "Foto", "Família"]
 
 @st.cache_resource
 def conectar_sheets():
+    if fake_sheets.backend_fake_ativo():
+        return fake_sheets.cliente_fake().open_by_key(SHEET_ID)
     info = st.secrets["GCP_SERVICE_ACCOUNT"]
     escopo = ["https://spreadsheets.google.com/feeds", "https://www.googleapis.com/auth/drive"]
     credenciais = Credentials.from_service_account_info(info, scopes=escopo)
     cliente = gspread.authorize(credenciais)
     return cliente.open_by_key(SHEET_ID)
 
-# === Carregar dados ===
-def carregar_bases():
-    planilha = conectar_sheets()
-    base = get_as_dataframe(planilha.worksheet(BASE_ABA)).dropna(how="all")
-    status = get_as_dataframe(planilha.worksheet(STATUS_ABA)).dropna(how="all")
-    base.columns = [c.strip() for c in base.columns]
-    status.columns = [c.strip() for c in status.columns]
-    return base, status, planilha
+# === Chave de comparação: caixa / espaços extras não criam cliente novo ===
+def chave(nome) -> str:
+    return " ".join(sheets_cache._norm_key(nome).split())
+
+def ler_coluna(ws, coluna: str) -> list:
+    """Só a coluna pedida (1 col_values), sem o cabeçalho."""
+    pos = sheets_cache.col_map(ws).get(sheets_cache._norm_key(coluna))
+    if not pos:
+        return []
+    return [str(v).strip() for v in ws.col_values(pos)[1:] if str(v).strip()]
+
+class IndiceStatus:
+    """Chaves dos clientes já presentes no clientes_status (lido 1x; append atualiza no lugar)."""
+    def __init__(self, nomes):
+        self._lock = threading.Lock()
+        self._chaves = {chave(n) for n in nomes}
 
-base_df, status_df, planilha = carregar_bases()
+    def faltando(self, nomes) -> list:
+        """Anti-join por chave: nomes da base sem linha no status (1 por chave, ordem alfabética)."""
+        novos = {}
+        with self._lock:
+            for n in nomes:
+                k = chave(n)
+                if k and k not in self._chaves and k not in novos:
+                    novos[k] = n
+        return sorted(novos.values())
+
+    def acrescentar(self, nomes):
+        with self._lock:
+            self._chaves.update(chave(n) for n in nomes)
+
+@st.cache_resource(ttl=300, show_spinner=False)
+def indice_status():
+    ws = sheets_cache.get_ws(conectar_sheets(), STATUS_ABA)
+    return IndiceStatus(ler_coluna(ws, "Cliente"))
+
+# === Carregar dados ===
+planilha = conectar_sheets()
+clientes_base = ler_coluna(sheets_cache.get_ws(planilha, BASE_ABA), "Cliente")
 
 # === Normalizar e comparar ===
-clientes_base = set(base_df["Cliente"].dropna().unique())
-clientes_status = set(status_df["Cliente"].dropna().unique())
-novos_clientes = sorted(list(clientes_base - clientes_status))
+novos_clientes = indice_status().faltando(clientes_base)
 
 st.markdown(f"### 👥 Clientes novos detectados: `{len(novos_clientes)}`")
 
@@ -49,9 +81,10 @@ if novos_clientes:
     st.dataframe(novos_df, use_container_width=True)
 
     if st.button("✅ Adicionar ao clientes_status"):
-        aba_status = planilha.worksheet(STATUS_ABA)
-        status_atualizado = pd.concat([status_df, novos_df], ignore_index=True)
-        set_with_dataframe(aba_status, status_atualizado)
-        st.success(f"{len(novos_clientes)} novos clientes adicionados com sucesso!")
+        aba_status = sheets_cache.get_ws(planilha, STATUS_ABA)
+        # só as linhas novas vão para o fim da aba (fotos/famílias/status existentes não são reescritos)
+        n = escrita.acrescentar(aba_status, novos_df.to_dict("records"), cabecalho_padrao=COLS_STATUS)
+        indice_status().acrescentar(novos_clientes)
+        st.success(f"{n} novos clientes adicionados com sucesso!")
 else:
     st.success("Nenhum cliente novo para adicionar. Tudo sincronizado! ✅")
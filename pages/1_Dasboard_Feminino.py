@@ -3,6 +3,7 @@ import pandas as pd
 import plotly.express as px
 import gspread
 from google.oauth2.service_account import Credentials
+from utils import base_dados
 
 st.set_page_config(layout="wide", page_title="💅 Dashboard Feminino", page_icon="💅")
 st.title("💅 Dashboard Feminino")
@@ -114,20 +115,17 @@ def carregar_base_feminina() -> pd.DataFrame:
     else:
         df["Cliente"] = ""
 
+    # feminino: regra única Cliente+Dia em todo o período (sem data de corte)
+    df["Visita"] = base_dados.chave_visita(df, corte=None, ignorar_vazios=True) if "Data" in df.columns else pd.NA
+
     return df
 
 # === Contagem de atendimentos por Cliente+Data (regra única no feminino) ===
 def total_atendimentos_unicos(df: pd.DataFrame) -> int:
-    pares = (df.loc[df["Cliente"].ne(""), ["Cliente", "Dia"]]
-               .dropna()
-               .drop_duplicates())
-    return int(len(pares))
+    return int(df["Visita"].nunique())
 
 def atendimentos_por_cliente(df: pd.DataFrame) -> pd.Series:
-    pares = (df.loc[df["Cliente"].ne(""), ["Cliente", "Dia"]]
-               .dropna()
-               .drop_duplicates())
-    return pares.groupby("Cliente").size().astype(int)
+    return df.dropna(subset=["Visita"]).groupby("Cliente")["Visita"].nunique().astype(int)
 
 # =========================
 # CARREGA BASE
@@ -4,6 +4,7 @@ import pandas as pd
 import gspread
 from gspread_dataframe import get_as_dataframe
 from google.oauth2.service_account import Credentials
+from utils import ranking
 import requests
 from PIL import Image
 from io import BytesIO
@@ -43,16 +44,20 @@ def carregar_fotos_clientes():
     except:
         return {}
 
-def gerar_ranking(df):
-    df = df.groupby(["Cliente", "Data"]).agg({"Valor": "sum"}).reset_index()
-    soma_valores = df.groupby("Cliente")["Valor"].sum().reset_index(name="Total_Gasto")
-    atendimentos_por_dia = df.groupby("Cliente")["Data"].nunique().reset_index(name="Qtd_Atendimentos")
-    ranking = pd.merge(soma_valores, atendimentos_por_dia, on="Cliente")
-    nomes_invalidos = ["boliviano", "brasileiro", "menino", "cliente", "moicano", "morador", "menina"]
-    ranking = ranking[~ranking["Cliente"].str.lower().isin(nomes_invalidos)]
-    ranking = ranking[~ranking["Cliente"].str.lower().str.contains("sem nome|desconhecido|teste")]
-    ranking = ranking.sort_values("Total_Gasto", ascending=False).reset_index(drop=True)
-    return ranking.head(10)
+NOMES_INVALIDOS = ["boliviano", "brasileiro", "menino", "cliente", "moicano", "morador", "menina"]
+
+def nome_invalido(nome: str) -> bool:
+    n = nome.lower()
+    return n in NOMES_INVALIDOS or any(p in n for p in ("sem nome", "desconhecido", "teste"))
+
+@st.cache_resource
+def motor_ranking():
+    """Totais por cliente (geral e por funcionário); base nova → só as linhas do fim entram."""
+    return ranking.Ranking()
+
+def gerar_ranking(funcionario=None):
+    top = rk.top(10, por="Valor", funcionario=funcionario, excluir=nome_invalido)
+    return top.rename(columns={"Valor": "Total_Gasto", "Dias": "Qtd_Atendimentos"})
 
 def exibir_ranking(nome_lista, ranking, fotos_clientes):
     st.markdown(f"### 👑 {nome_lista}")
@@ -78,10 +83,13 @@ def exibir_ranking(nome_lista, ranking, fotos_clientes):
 df = carregar_dados()
 fotos_clientes = carregar_fotos_clientes()
 
+rk = motor_ranking()
+rk.sincronizar(df)
+
 # Rankings
-ranking_geral = gerar_ranking(df)
-ranking_jpaulo = gerar_ranking(df[df["Funcionário"] == "JPaulo"])
-ranking_vinicius = gerar_ranking(df[df["Funcionário"] == "Vinicius"])
+ranking_geral = gerar_ranking()
+ranking_jpaulo = gerar_ranking("JPaulo")
+ranking_vinicius = gerar_ranking("Vinicius")
 
 # Três colunas lado a lado
 col1, col2, col3 = st.columns(3)
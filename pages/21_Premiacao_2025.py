@@ -4,6 +4,7 @@ import plotly.express as px
 import gspread
 from gspread_dataframe import get_as_dataframe
 from google.oauth2.service_account import Credentials
+from utils import ranking
 import requests
 from PIL import Image
 from io import BytesIO
@@ -44,12 +45,19 @@ def carregar_fotos():
     df_status.columns = [c.strip() for c in df_status.columns]
     return df_status[["Cliente", "Foto", "Família"]].dropna(subset=["Cliente"])
 
+@st.cache_resource
+def motor_ranking():
+    """Totais por cliente (geral e por funcionário); base nova → só as linhas do fim entram."""
+    return ranking.Ranking()
+
 df = carregar_dados()
 df_fotos = carregar_fotos()
+rk = motor_ranking()
+rk.sincronizar(df)
 
 clientes_premiados = set()
 
-def gerar_top3(df_base, titulo, excluir_clientes=None):
+def gerar_top3(funcionario, titulo, excluir_clientes=None):
     if excluir_clientes is None:
         excluir_clientes = set()
 
@@ -57,18 +65,11 @@ def gerar_top3(df_base, titulo, excluir_clientes=None):
     col1.markdown("### ")
     col2.markdown(f"#### {titulo}")
 
-    df_base = df_base.copy()
-    df_base["Valor"] = pd.to_numeric(df_base["Valor"], errors="coerce").fillna(0)
-    valor_por_atendimento = df_base.groupby(["Cliente", "Data"], as_index=False)["Valor"].sum()
-    total_gasto_por_cliente = valor_por_atendimento.groupby("Cliente")["Valor"].sum()
-    ranking = total_gasto_por_cliente.sort_values(ascending=False)
-    ranking = ranking[~ranking.index.isin(excluir_clientes)]
-    top3 = ranking.head(3).index.tolist()
+    top3 = rk.top(3, por="Valor", funcionario=funcionario, excluir=excluir_clientes)
     medalhas = ["🥇", "🥈", "🥉"]
 
-    for i, cliente in enumerate(top3):
+    for i, (cliente, atendimentos_unicos) in enumerate(zip(top3["Cliente"], top3["Dias"])):
         clientes_premiados.add(cliente)
-        atendimentos_unicos = valor_por_atendimento[valor_por_atendimento["Cliente"] == cliente]["Data"].nunique()
 
         linha = st.columns([0.05, 0.12, 0.83])
         linha[0].markdown(f"### {medalhas[i]}")
@@ -87,13 +88,13 @@ def gerar_top3(df_base, titulo, excluir_clientes=None):
         linha[2].markdown(f"**{cliente.lower()}** — {atendimentos_unicos} atendimentos")
 
 st.subheader("Top 3 Geral")
-gerar_top3(df, "")
+gerar_top3(None, "")
 
 st.subheader("Top 3 JPaulo")
-gerar_top3(df[df["Funcionário"] == "JPaulo"], "", excluir_clientes=clientes_premiados)
+gerar_top3("JPaulo", "", excluir_clientes=clientes_premiados)
 
 st.subheader("Top 3 Vinicius")
-gerar_top3(df[df["Funcionário"] == "Vinicius"], "", excluir_clientes=clientes_premiados)
+gerar_top3("Vinicius", "", excluir_clientes=clientes_premiados)
 
 st.subheader("👨‍👩‍👧 Cliente Família — Top 3 Grupos")
 
@@ -3,6 +3,7 @@ import pandas as pd
 import gspread
 from gspread_dataframe import get_as_dataframe
 from google.oauth2.service_account import Credentials
+from utils import base_dados, ranking
 import requests
 from PIL import Image
 from io import BytesIO
@@ -60,10 +61,17 @@ def mostrar_cliente(nome, legenda):
         st.markdown(f"### 🏅 {nome.title()}")
         st.markdown(legenda)
 
+@st.cache_resource
+def motor_ranking():
+    """Totais por cliente/ano; base nova → só as linhas do fim entram."""
+    return ranking.Ranking()
+
 df = carregar_dados()
 df_status = carregar_status()
 df = df[df["Cliente"].notna() & df["Cliente"].apply(limpar_nomes)]
 df = df[df["Valor"] > 0]
+rk = motor_ranking()
+rk.sincronizar(df)
 
 # 🎯 Cliente Mais Fiel
 st.subheader("🎯 Cliente Mais Fiel")
@@ -116,12 +124,7 @@ if not df_familia.empty:
 
     # Corrigir a contagem de atendimentos com a lógica oficial
     df_top["Data"] = pd.to_datetime(df_top["Data"])
-    df_top["Data_Agrupamento"] = df_top["Data"]
-    corte = pd.to_datetime("2025-05-11")
-    df_top["Data_Agrupamento"] = df_top.apply(
-        lambda row: f"{row['Cliente']}_{row['Data'].date()}" if row["Data"] >= corte else row.name,
-        axis=1
-    )
+    df_top["Data_Agrupamento"] = base_dados.chave_visita(df_top)
     total_atendimentos = df_top["Data_Agrupamento"].nunique()
     total_dias = df_top["Data"].dt.date.nunique()
     membros_df = df_status[df_status["Família"] == familia_top]
@@ -166,8 +169,8 @@ else:
 
 # ✨ Cliente Revelação
 st.subheader("✨ Cliente Revelação")
-data_corte = pd.to_datetime("2025-01-01")
-recentes = df[df["Data"] >= data_corte]
-novatos = recentes.groupby("Cliente")["Data"].nunique().sort_values(ascending=False).head(1)
-for cliente, dias in novatos.items():
+ANO_CORTE = 2025  # visitas desde 01/01/2025 = anos inteiros a partir de 2025
+anos_recentes = list(range(ANO_CORTE, int(df["Data"].dt.year.max()) + 1)) if not df.empty else []
+novatos = rk.top(1, por="Dias", ano=anos_recentes) if anos_recentes else pd.DataFrame(columns=["Cliente", "Dias"])
+for cliente, dias in zip(novatos["Cliente"], novatos["Dias"]):
     mostrar_cliente(cliente, f"Novo cliente com **{dias} visitas recentes** desde 2025.")
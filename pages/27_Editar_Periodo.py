@@ -12,10 +12,12 @@
 
 import streamlit as st
 import pandas as pd
+import numpy as np
 import gspread
 from gspread_dataframe import get_as_dataframe
 from google.oauth2.service_account import Credentials
 from datetime import date
+from utils import sheets_cache, fake_sheets, busca_clientes
 
 st.set_page_config(page_title="Editar Período (Lote)", page_icon="🕒", layout="wide")
 st.title("🕒 Editar Período por Data — Seleção por Cliente")
@@ -38,6 +40,8 @@ PERIODO_COL = "Período"  # troque para "Periodo" se na planilha não houver ace
 # =========================
 @st.cache_resource
 def conectar_sheets():
+    if fake_sheets.backend_fake_ativo():
+        return fake_sheets.cliente_fake()
     info = st.secrets.get("gcp_service_account") or st.secrets.get("GCP_SERVICE_ACCOUNT")
     if not info:
         st.error("❌ Secrets ausentes. Adicione 'gcp_service_account' nos Secrets do Streamlit.")
@@ -48,15 +52,32 @@ def conectar_sheets():
 
 def abrir_aba_base(gc):
     sh = gc.open_by_key(SHEET_ID)
+    abas = sheets_cache.mapa_abas(sh)
     for nome in BASE_ALVOS:
-        try:
-            return sh.worksheet(nome)
-        except Exception:
-            pass
-    nomes = [w.title for w in sh.worksheets()]
+        if nome in abas:
+            return abas[nome]
+    nomes = list(abas)
     st.error(f"❌ Aba da Base não encontrada. Ajuste BASE_ALVOS. Abas disponíveis: {nomes}")
     st.stop()
 
+# Parser de data robusto (vetorizado): cada formato de uma vez na coluna inteira;
+# só o que sobrar passa pelo parser livre, valor a valor
+FORMATOS_DATA = ("%d/%m/%Y", "%Y-%m-%d", "%d-%m-%Y")
+
+def para_data(col: pd.Series) -> pd.Series:
+    txt = col.where(col.notna(), "").astype(str)
+    out = pd.Series(pd.NaT, index=col.index, dtype="datetime64[ns]")
+    pendente = txt.str.strip() != ""
+    for fmt in FORMATOS_DATA:
+        if not pendente.any():
+            break
+        dt = pd.to_datetime(txt[pendente], format=fmt, errors="coerce")
+        out.loc[dt.index] = dt
+        pendente &= out.isna()
+    if pendente.any():
+        out.loc[pendente] = txt[pendente].map(lambda x: pd.to_datetime(x, dayfirst=True, errors="coerce"))
+    return out
+
 @st.cache_data(ttl=120)
 def carregar_base():
     gc = conectar_sheets()
@@ -74,18 +95,8 @@ def carregar_base():
     if PERIODO_COL not in df.columns:
         df[PERIODO_COL] = ""
 
-    # Parser de data robusto
-    def to_date(x):
-        if pd.isna(x) or str(x).strip() == "":
-            return pd.NaT
-        for fmt in ("%d/%m/%Y", "%Y-%m-%d", "%d-%m-%Y"):
-            try:
-                return pd.to_datetime(x, format=fmt, dayfirst=True)
-            except Exception:
-                pass
-        return pd.to_datetime(x, dayfirst=True, errors="coerce")
-
-    df["_DataDT"] = df[DATA_COL].apply(to_date)
+    df["_DataDT"] = para_data(df[DATA_COL])
+    df["_Dia"] = df["_DataDT"].dt.normalize()
     df["_row_number"] = df.index + 2  # 1 cabeçalho + 1 offset de índice
     return df
 
@@ -98,7 +109,7 @@ def get_ws():
 # =========================
 df = carregar_base()
 dia = st.date_input("📅 Selecione o DIA", value=date.today(), format="DD/MM/YYYY")
-df_dia = df[df["_DataDT"].dt.date == pd.to_datetime(dia).date()].copy()
+df_dia = df[df["_Dia"] == pd.Timestamp(dia)].copy()
 
 if df_dia.empty:
     st.info("Nenhum registro para este dia.")
@@ -107,30 +118,27 @@ if df_dia.empty:
 # =========================
 # Resumo por Cliente no dia
 # =========================
-# agregamos período por cliente para exibir status atual
-def resumo_cliente(grp: pd.DataFrame) -> pd.Series:
-    # valores distintos de período (limpos)
-    ps = grp[PERIODO_COL].fillna("").astype(str).str.strip()
-    distintos = sorted(set(ps))
-    # remove vazio apenas para testar "definido"
-    definidos = [p for p in distintos if p != ""]
-    if len(definidos) == 0:
-        status = "Sem período"
-        periodo_view = "—"
-    elif len(definidos) == 1 and (("" not in distintos) or (len(distintos) == 1)):
-        status = "Definido"
-        periodo_view = definidos[0]
-    else:
-        status = "Misto"
-        # mostra todos para transparência
-        periodo_view = ", ".join([p if p != "" else "—" for p in distintos])
-    return pd.Series({
-        "Linhas": len(grp),
-        "PeriodoAtual": periodo_view,
-        "Status": status
-    })
-
-sum_por_cliente = df_dia.groupby(CLIENTE_COL, dropna=True).apply(resumo_cliente).reset_index(names=[CLIENTE_COL])
+# agregamos período por cliente para exibir status atual (groupby vetorizado, sem função por cliente)
+def resumo_por_cliente(d: pd.DataFrame) -> pd.DataFrame:
+    """Cliente, Linhas, PeriodoAtual, Status (Sem período / Definido / Misto)."""
+    d = d[d[CLIENTE_COL].notna()]
+    ps = d[PERIODO_COL].fillna("").astype(str).str.strip()
+    v = pd.DataFrame({CLIENTE_COL: d[CLIENTE_COL].to_numpy(), "p": ps.to_numpy(), "def": (ps != "").to_numpy()})
+    v["pd"] = v["p"].where(v["def"])
+    g = v.groupby(CLIENTE_COL, sort=True)
+    res = pd.DataFrame({"Linhas": g.size(), "n_def": g["pd"].nunique(), "vazio": ~g["def"].all(), "um": g["pd"].first()})
+
+    definido = (res["n_def"] == 1) & ~res["vazio"]
+    res["Status"] = np.select([res["n_def"] == 0, definido], ["Sem período", "Definido"], "Misto")
+    res["PeriodoAtual"] = np.where(res["n_def"] == 0, "—", res["um"].fillna("—"))
+    misto = res.index[res["Status"] == "Misto"]
+    if len(misto):
+        # mostra todos para transparência (distintos em ordem; vazio → "—")
+        dist = v[v[CLIENTE_COL].isin(misto)].drop_duplicates([CLIENTE_COL, "p"]).sort_values([CLIENTE_COL, "p"])
+        res.loc[misto, "PeriodoAtual"] = (dist["p"].replace("", "—").groupby(dist[CLIENTE_COL]).agg(", ".join))
+    return res[["Linhas", "PeriodoAtual", "Status"]].reset_index()
+
+sum_por_cliente = resumo_por_cliente(df_dia)
 sum_por_cliente.insert(0, "Selecionar", False)  # checkbox padrão
 sum_por_cliente = sum_por_cliente.sort_values([ "Status", CLIENTE_COL ]).reset_index(drop=True)
 
@@ -142,8 +150,8 @@ st.markdown("### ✅ Selecione os clientes que deseja atualizar")
 busca = st.text_input("🔎 Buscar cliente (contém):", value="", placeholder="digite parte do nome...")
 view = sum_por_cliente.copy()
 if busca.strip():
-    s = busca.strip().lower()
-    view = view[view[CLIENTE_COL].str.lower().str.contains(s)].reset_index(drop=True)
+    achados = busca_clientes.IndiceClientes(view[CLIENTE_COL]).filtrar(busca)  # ignora acento/caixa
+    view = view[view[CLIENTE_COL].astype(str).str.strip().isin(achados)].reset_index(drop=True)
 
 col_bts = st.columns(4)
 with col_bts[0]:
@@ -208,11 +216,12 @@ def aplicar_periodo_em_lote(clientes_sel, novo_periodo):
     ws = get_ws()
 
     # pega índice da coluna PERÍODO (ou cria)
-    header = ws.row_values(1)
+    header = sheets_cache.cabecalho(ws)
     try:
         col_idx = header.index(PERIODO_COL) + 1
     except ValueError:
         ws.update_cell(1, len(header) + 1, PERIODO_COL)
+        sheets_cache.definir_cabecalho(ws, header + [PERIODO_COL])
         col_idx = len(header) + 1
 
     # linhas alvo (todas as linhas dos clientes selecionados neste dia)
@@ -230,6 +239,7 @@ def aplicar_periodo_em_lote(clientes_sel, novo_periodo):
     for i in range(0, len(data), 500):
         ws.batch_update(data[i:i+500], value_input_option="USER_ENTERED")
         total += len(data[i:i+500])
+    sheets_cache.marcar_escrita(ws.title)
     return total
 
 col_apply1, col_apply2 = st.columns([1, 3])
@@ -6,15 +6,15 @@ import re
 import sys
 import pytz
 import json
-import hashlib
 import importlib
 import requests
 import pandas as pd
 import streamlit as st
 from datetime import datetime, timedelta
 import gspread
-from gspread_dataframe import get_as_dataframe, set_with_dataframe
+from gspread_dataframe import get_as_dataframe
 from google.oauth2.service_account import Credentials
+from utils import sheets_cache, fake_sheets, base_dados, comissao, refid, escrita
 
 # =============================
 # CONFIG
@@ -68,6 +68,8 @@ def _dev_clear_everything(mod_prefixes=("utils","commons","shared")):
 # =============================
 @st.cache_resource
 def _conn():
+    if fake_sheets.backend_fake_ativo():
+        return fake_sheets.abrir_planilha_fake(SHEET_ID)
     info = st.secrets["GCP_SERVICE_ACCOUNT"]
     escopo = ["https://spreadsheets.google.com/feeds","https://www.googleapis.com/auth/drive"]
     cred = Credentials.from_service_account_info(info, scopes=escopo)
@@ -77,9 +79,11 @@ def _conn():
 def _ws(title:str):
     sh = _conn()
     try:
-        return sh.worksheet(title)
+        return sheets_cache.get_ws(sh, title)
     except gspread.exceptions.WorksheetNotFound:
-        return sh.add_worksheet(title=title, rows=2000, cols=50)
+        ws = sh.add_worksheet(title=title, rows=2000, cols=50)
+        sheets_cache.registrar_aba(sh, ws)
+        return ws
 
 def _read_df(title:str)->pd.DataFrame:
     ws = _ws(title)
@@ -89,33 +93,24 @@ def _read_df(title:str)->pd.DataFrame:
     if title == ABA_DADOS:
         for c in COLS_OFICIAIS:
             if c not in df.columns: df[c] = ""
+        # só texto → category; Valor/Data seguem str (RefID = sha1 do texto original)
+        df = base_dados.compactar(df, numeros=False, datas=False)
     return df
 
-def _write_df(title:str, df:pd.DataFrame):
-    ws = _ws(title)
-    ws.clear()
-    set_with_dataframe(ws, df, include_index=False, include_column_header=True)
+@st.cache_data(ttl=300, max_entries=1, show_spinner=False)
+def base_vinicius(escritas: int) -> pd.DataFrame:
+    """Base lida + preparar_base 1x por versão (escritas da Base neste processo; TTL p/ edição à mão)."""
+    return comissao.preparar_base(_read_df(ABA_DADOS), "vinicius")
 
 # =============================
 # HELPERS
 # =============================
 def br_now(): return datetime.now(pytz.timezone(TZ))
 
-def parse_br_date(s:str):
-    s = (s or "").strip()
-    for fmt in ("%d/%m/%Y","%d-%m-%Y","%Y-%m-%d"):
-        try: return datetime.strptime(s, fmt)
-        except: pass
-    return None
-
 def to_br_date(dt):
     if dt is None or (hasattr(dt,"tz_localize") and pd.isna(dt)): return ""
     return pd.to_datetime(dt).strftime("%d/%m/%Y")
 
-def competencia_from_data_str(s:str)->str:
-    dt = parse_br_date(s)
-    return dt.strftime("%m/%Y") if dt else ""
-
 def janela_terca_a_segunda(terca_pagto:datetime):
     inicio = terca_pagto - timedelta(days=7)
     fim = inicio + timedelta(days=6)
@@ -126,7 +121,10 @@ def garantir_colunas(df:pd.DataFrame, cols:list[str])->pd.DataFrame:
         if c not in df.columns: df[c] = ""
     return df
 
-def s_lower(s:pd.Series): return s.astype(str).str.strip().str.lower()
+def s_lower(s:pd.Series):
+    if isinstance(s.dtype, pd.CategoricalDtype):  # 1x por categoria, não por linha
+        return pd.Series(base_dados.mapear_categorias(s, lambda v: v.strip().lower(), padrao="nan"), index=s.index)
+    return s.astype(str).str.strip().str.lower()
 
 def _to_float_brl(v)->float:
     s = str(v).strip()
@@ -137,26 +135,11 @@ def _to_float_brl(v)->float:
     try: return float(s)
     except: return 0.0
 
-def snap_para_preco_cheio(servico:str, valor:float, tol:float, habilitado:bool)->float:
-    if not habilitado: return valor
-    cheio = VALOR_TABELA.get((servico or "").strip())
-    if isinstance(cheio,(int,float)) and abs(valor - float(cheio)) <= tol:
-        return float(cheio)
-    return valor
-
 def format_brl(v:float)->str:
     try: v = float(v)
     except: v = 0.0
     return f"R$ {v:,.2f}".replace(",", "X").replace(".", ",").replace("X",".")
 
-def _refid_despesa(data_br:str, prestador:str, descricao:str, valor_float:float, mepag:str)->str:
-    base = f"{data_br.strip()}|{prestador.strip().lower()}|{descricao.strip().lower()}|{valor_float:.2f}|{str(mepag).strip().lower()}"
-    return hashlib.sha1(base.encode("utf-8")).hexdigest()
-
-def make_refid_atendimento(row:pd.Series)->str:
-    key = "|".join([str(row.get(k,"")).strip() for k in ["Cliente","Data","Serviço","Valor","Funcionário","Combo"]])
-    return hashlib.sha1(key.encode("utf-8")).hexdigest()[:16]
-
 # --- Normalização de nomes de serviço para evitar duplicidades ---
 def normalizar_servico(s: str) -> str:
     s0 = (s or "").strip().lower()
@@ -266,9 +249,6 @@ def build_text_resumo(period_ini, period_fim,
 st.set_page_config(layout="wide")
 st.title("💈 Pagamento de Comissão — Vinicius (1 linha por competência)")
 
-# Carrega base
-base = _read_df(ABA_DADOS).copy()
-
 # Inputs
 colA, colB, colC = st.columns([1,1,1])
 with colA:
@@ -310,49 +290,21 @@ dest_jp = st.checkbox("Enviar cópia para JPaulo (privado)", value=True)
 # ✅ Reprocessar cache (não interfere na trava de Despesas)
 reprocessar_terca = st.checkbox("Reprocessar esta terça (regravar cache de comissão)", value=False)
 
-# ============ Pré-filtros da comissão ============
-dfv = base[s_lower(base["Funcionário"]) == "vinicius"].copy()
-if not incluir_produtos:
-    dfv = dfv[s_lower(dfv["Tipo"]) == "serviço"]
-
-# Remover 'caixinha' da comissão
-mask_caixinha_lanc = (
-    (s_lower(dfv["Conta"]) == "caixinha") |
-    (s_lower(dfv["Tipo"]) == "caixinha") |
-    (s_lower(dfv["Serviço"]) == "caixinha")
-)
-dfv = dfv[~mask_caixinha_lanc].copy()
-
-# Datas auxiliares
-dfv["_dt_serv"] = dfv["Data"].apply(parse_br_date)
-dfv["_dt_pagto"] = dfv["DataPagamento"].apply(parse_br_date)
+# ============ Motor da comissão (colunar, 1 passada) ============
+# dfv_all = TODAS as linhas do Vinicius com datas/valores/RefID já convertidos;
+# cada recorte abaixo é só uma máscara booleana sobre ele
+dfv_all = base_vinicius(sheets_cache.versao_escrita(ABA_DADOS))
 
 # Janela terça→segunda anterior
 ini, fim = janela_terca_a_segunda(terca_pagto)
 st.info(f"Janela desta folha: **{to_br_date(ini)} a {to_br_date(fim)}** (terça→segunda)")
+m = comissao.separar_semana(dfv_all, ini, fim, terca_pagto, incluir_produtos)
 
 # -------- Caixinha (somatório por janela, apenas para mostrar) --------
-base["_dt_serv"] = base["Data"].apply(parse_br_date)
-mask_vini = s_lower(base["Funcionário"]) == "vinicius"
-mask_janela = base["_dt_serv"].notna() & (base["_dt_serv"] >= ini) & (base["_dt_serv"] <= fim)
-base_jan_vini = base[mask_vini & mask_janela].copy()
-
-def _num(v): return _to_float_brl(v)
-
-base_jan_vini["CaixinhaDia_num"] = base_jan_vini["CaixinhaDia"].apply(_num)
-base_jan_vini["CaixinhaFundo_num"] = base_jan_vini["CaixinhaFundo"].apply(_num)
-mask_caixinha_rows_all = (
-    (s_lower(base_jan_vini["Conta"]) == "caixinha") |
-    (s_lower(base_jan_vini["Tipo"]) == "caixinha") |
-    (s_lower(base_jan_vini["Serviço"]) == "caixinha")
-)
-base_jan_vini["CaixinhaRow_num"] = 0.0
-if mask_caixinha_rows_all.any():
-    base_jan_vini.loc[mask_caixinha_rows_all, "CaixinhaRow_num"] = base_jan_vini.loc[mask_caixinha_rows_all, "Valor"].apply(_num)
-
+base_jan_vini = dfv_all[m["janela"]]
 total_cx_dia_cols = float(base_jan_vini["CaixinhaDia_num"].sum())
 total_cx_fundo_cols = float(base_jan_vini["CaixinhaFundo_num"].sum())
-total_cx_rows = float(base_jan_vini["CaixinhaRow_num"].sum())
+total_cx_rows = float(base_jan_vini.loc[base_jan_vini["_eh_caixinha"], "Valor_num"].sum())
 total_caixinha = total_cx_dia_cols + total_cx_fundo_cols + total_cx_rows
 
 cxa, cxb, cxc = st.columns(3)
@@ -360,61 +312,27 @@ cxa.metric("🎁 Caixinha do Dia (janela)", format_brl(total_cx_dia_cols))
 cxb.metric("🎁 Caixinha do Fundo (janela)", format_brl(total_cx_fundo_cols))
 cxc.metric("🎁 Caixinha total (janela)", format_brl(total_caixinha))
 
-# -------- Contadores/debug --------
-total_linhas_vini = len(dfv)
-na_janela = dfv[(dfv["_dt_serv"].notna()) & (dfv["_dt_serv"] >= ini) & (dfv["_dt_serv"] <= fim)]
-nao_fiado = na_janela[(s_lower(na_janela["StatusFiado"]) == "") | (s_lower(na_janela["StatusFiado"]) == "nao")]
-fiado_all = dfv[(s_lower(dfv["StatusFiado"]) != "") | (s_lower(dfv["IDLancFiado"]) != "")]
-fiados_ok = fiado_all[(fiado_all["_dt_pagto"].notna()) & (fiado_all["_dt_pagto"] <= terca_pagto)]
-fiados_pend_all = fiado_all[(fiado_all["_dt_pagto"].isna()) | (fiado_all["_dt_pagto"] > terca_pagto)]
+# -------- Recortes --------
+# 1) Semana não fiado  2) Fiados liberados (pago até a terça)  3) Fiados pendentes
+semana_df = dfv_all[m["semana"]]
+fiados_liberados = dfv_all[m["fiado_liberado"]]
+fiados_pendentes = dfv_all[m["fiado_pendente"]]
 
 st.caption(
-    f"Linhas do Vinicius (sem 'caixinha' p/ comissão): {total_linhas_vini} | "
-    f"Na janela (não fiado): {len(nao_fiado)} | "
-    f"Fiados liberados: {len(fiados_ok)} | "
-    f"Fiados pendentes: {len(fiados_pend_all)}"
-)
-
-# 1) Semana não fiado
-mask_semana = (
-    (dfv["_dt_serv"].notna()) &
-    (dfv["_dt_serv"] >= ini) &
-    (dfv["_dt_serv"] <= fim) &
-    ((s_lower(dfv["StatusFiado"]) == "") | (s_lower(dfv["StatusFiado"]) == "nao"))
+    f"Linhas do Vinicius (sem 'caixinha' p/ comissão): {int(m['comissionavel'].sum())} | "
+    f"Na janela (não fiado): {len(semana_df)} | "
+    f"Fiados liberados: {len(fiados_liberados)} | "
+    f"Fiados pendentes: {len(fiados_pendentes)}"
 )
-semana_df = dfv[mask_semana].copy()
-
-# 2) Fiados liberados (pago até a terça)
-fiados_liberados = fiado_all[(fiado_all["_dt_pagto"].notna()) & (fiado_all["_dt_pagto"] <= terca_pagto)].copy()
-
-# 3) Fiados pendentes (ainda não pagos)
-fiados_pendentes = fiado_all[(fiado_all["_dt_pagto"].isna()) | (fiado_all["_dt_pagto"] > terca_pagto)].copy()
-if fiados_pendentes.empty:
-    fiados_pendentes = pd.DataFrame(columns=["Data","Cliente","Serviço","_dt_serv"])
-else:
-    if "_dt_serv" not in fiados_pendentes.columns:
-        fiados_pendentes["_dt_serv"] = fiados_pendentes["Data"].apply(parse_br_date)
 
 # ---- valor base p/ comissão (apenas arredondamento por tolerância)
 def montar_valor_base(df:pd.DataFrame)->pd.DataFrame:
-    if df.empty:
-        return df.assign(Valor_num=[], Competência=[], Valor_base_comissao=[])
-    df = df.copy()
-    df["Valor_num"] = pd.to_numeric(df["Valor"].apply(_to_float_brl), errors="coerce").fillna(0.0)
-    df["Competência"] = df["Data"].apply(competencia_from_data_str)
-    def _base_valor(row):
-        serv = str(row.get("Serviço","")).strip()
-        bruto = float(row.get("Valor_num",0.0))
-        return snap_para_preco_cheio(serv, bruto, tol_reais, arred_cheio)
-    df["Valor_base_comissao"] = df.apply(_base_valor, axis=1)
-    return df
+    return df.assign(Valor_base_comissao=comissao.valor_base(df, VALOR_TABELA, tol_reais, arred_cheio))
 
 # Totais de fiados pendentes (preview)
-_futuros_mb = montar_valor_base(fiados_pendentes).copy()
+_futuros_mb = montar_valor_base(fiados_pendentes)
 _futuros_mb["% Comissão"] = float(perc_padrao)
-_futuros_mb["Comissão (R$)"] = (
-    pd.to_numeric(_futuros_mb["Valor_base_comissao"], errors="coerce").fillna(0.0) * float(perc_padrao) / 100.0
-).round(2)
+_futuros_mb["Comissão (R$)"] = comissao.comissao(_futuros_mb["Valor_base_comissao"], float(perc_padrao))
 total_fiados_pend = float(_futuros_mb["Comissão (R$)"].sum())
 qtd_fiados_pend = int(len(fiados_pendentes))
 clientes_fiados_pend = (
@@ -427,20 +345,20 @@ min_str = to_br_date(_dt_min_pend) if pd.notna(_dt_min_pend) else "—"
 max_str = to_br_date(_dt_max_pend) if pd.notna(_dt_max_pend) else "—"
 
 # ------- Cache histórico -------
-cache = _read_df(ABA_COMISSOES_CACHE)
 cache_cols = ["RefID","PagoEm","TerçaPagamento","ValorComissao","Competencia","Observacao"]
-cache = garantir_colunas(cache, cache_cols)
 terca_str = to_br_date(terca_pagto)
-ja_pagos = set(cache["RefID"].astype(str).tolist()) if not reprocessar_terca else set(cache[cache["TerçaPagamento"] != terca_str]["RefID"].astype(str).tolist())
+if not reprocessar_terca:
+    ja_pagos = refid.indice(_ws(ABA_COMISSOES_CACHE))  # só a coluna RefID, com TTL
+else:
+    cache = garantir_colunas(_read_df(ABA_COMISSOES_CACHE), cache_cols)
+    ja_pagos = pd.Index(cache.loc[cache["TerçaPagamento"] != terca_str, "RefID"].astype(str))
 
 # ------- GRADES EDITÁVEIS -------
 def preparar_grid(df:pd.DataFrame, titulo:str, key_prefix:str):
     if df.empty:
         st.warning(f"Sem itens em **{titulo}**.")
         return pd.DataFrame(), 0.0
-    df = df.copy()
-    df["RefID"] = df.apply(make_refid_atendimento, axis=1)
-    df = df[~df["RefID"].isin(ja_pagos)]
+    df = refid.so_novos(df, ja_pagos)
     if df.empty:
         st.info(f"Todos os itens de **{titulo}** já foram pagos.")
         return pd.DataFrame(), 0.0
@@ -453,10 +371,7 @@ def preparar_grid(df:pd.DataFrame, titulo:str, key_prefix:str):
     ed_cols = ["Data","Cliente","Serviço","Valor_base_comissao","Competência","RefID"]
     ed = df[ed_cols].rename(columns={"Valor_base_comissao":"Valor (para comissão)"})
     ed["% Comissão"] = float(perc_padrao)
-    ed["Comissão (R$)"] = (
-        pd.to_numeric(ed["Valor (para comissão)"], errors="coerce").fillna(0.0) *
-        pd.to_numeric(ed["% Comissão"], errors="coerce").fillna(0.0) / 100.0
-    ).round(2)
+    ed["Comissão (R$)"] = comissao.comissao(ed["Valor (para comissão)"], ed["% Comissão"])
     ed = ed.reset_index(drop=True)
 
     edited = st.data_editor(
@@ -551,10 +466,9 @@ def _linhas_comissao_agrupadas(semana_grid, fiados_liberados_grid, meio_pag, des
                 data_br = to_br_date(dt_reg)
                 valor_txt = f'R$ {valf:.2f}'.replace(".", ",")
                 desc_txt  = f"{descricao_padrao} — Comp {comp} — Pago em {to_br_date(terca_pagto)}"
-                refid     = _refid_despesa(data_br, "Vinicius", desc_txt, valf, meio_pag)
                 linhas.append({
                     "Data": data_br, "Prestador":"Vinicius", "Descrição":desc_txt,
-                    "Valor": valor_txt, "Me Pag:": meio_pag, "RefID": refid
+                    "Valor": valor_txt, "Me Pag:": meio_pag, "ValorFloat": valf
                 })
                 export_rows.append({
                     "Data": data_br, "Descrição": desc_txt, "Valor": -round(valf,2),
@@ -568,16 +482,22 @@ def _linhas_comissao_agrupadas(semana_grid, fiados_liberados_grid, meio_pag, des
             data_br = to_br_date(terca_pagto)
             valor_txt = f'R$ {total_atuais:.2f}'.replace(".", ",")
             desc_txt  = f"{descricao_padrao} — Comp {comp_terca} — Pago em {to_br_date(terca_pagto)}"
-            refid     = _refid_despesa(data_br, "Vinicius", desc_txt, total_atuais, meio_pag)
             linhas.append({
                 "Data": data_br, "Prestador":"Vinicius", "Descrição":desc_txt,
-                "Valor": valor_txt, "Me Pag:": meio_pag, "RefID": refid
+                "Valor": valor_txt, "Me Pag:": meio_pag, "ValorFloat": total_atuais
             })
             export_rows.append({
                 "Data": data_br, "Descrição": desc_txt, "Valor": -round(total_atuais,2),
                 "Categoria":"Comissão", "Conta": meio_pag, "Observação": desc_txt
             })
 
+    # RefID de todas as linhas de uma vez
+    if linhas:
+        refs = refid.refid_despesa(pd.DataFrame(linhas))
+        for ln, r in zip(linhas, refs):
+            ln["RefID"] = r
+            del ln["ValorFloat"]
+
     export_df = pd.DataFrame(export_rows, columns=["Data","Descrição","Valor","Categoria","Conta","Observação"])
     return linhas, export_df
 
@@ -627,38 +547,33 @@ if st.button("✅ Registrar comissão (1 linha por competência) e marcar itens
                     "Observacao": f'{r.get("Cliente","")} | {r.get("Serviço","")} | {r.get("Data","")}',
                 })
 
-        cache_df = _read_df(ABA_COMISSOES_CACHE)
-        cache_cols = ["RefID","PagoEm","TerçaPagamento","ValorComissao","Competencia","Observacao"]
-        cache_df = garantir_colunas(cache_df, cache_cols)
+        ws_cache = _ws(ABA_COMISSOES_CACHE)
         if reprocessar_terca:
-            cache_df = cache_df[cache_df["TerçaPagamento"] != to_br_date(terca_pagto)].copy()
-        cache_upd = pd.concat([cache_df[cache_cols], pd.DataFrame(novos_cache)], ignore_index=True)
-        _write_df(ABA_COMISSOES_CACHE, cache_upd)
-
-        # 2) Lê Despesas e garante RefID
-        despesas_df = _read_df(ABA_DESPESAS)
-        despesas_df = garantir_colunas(despesas_df, COLS_DESPESAS_FIX)
+            # apaga SÓ as linhas desta terça (achadas pela coluna TerçaPagamento)
+            escrita.apagar_linhas(ws_cache, escrita.linhas_onde(ws_cache, "TerçaPagamento", to_br_date(terca_pagto)))
+            refid.invalidar_indice(ws_cache)
+        escrita.acrescentar(ws_cache, novos_cache, cabecalho_padrao=cache_cols)
+        refid.acrescentar_indice(ws_cache, [r["RefID"] for r in novos_cache])
 
-        # 3) Linhas agrupadas por competência
+        # 2) Linhas agrupadas por competência
         linhas, export_df_preview = _linhas_comissao_agrupadas(
             semana_grid, fiados_liberados_grid, meio_pag, descricao_padrao, terca_pagto
         )
 
-        # 4) (Caixinha não grava em Despesas)
+        # 3) (Caixinha não grava em Despesas)
 
-        # 5) Dedup por RefID e grava em Despesas
+        # 4) Dedup por RefID (índice da aba) e acrescenta em Despesas
         if linhas:
-            novos = pd.DataFrame(linhas, columns=COLS_DESPESAS_FIX)
-            ref_exist = set(despesas_df["RefID"].astype(str).tolist())
-            novos = novos[~novos["RefID"].isin(ref_exist)].copy()
+            ws_desp = _ws(ABA_DESPESAS)
+            novos = refid.so_novos(pd.DataFrame(linhas, columns=COLS_DESPESAS_FIX), refid.indice(ws_desp, refresh=True))
             if not novos.empty:
-                despesas_upd = pd.concat([despesas_df[COLS_DESPESAS_FIX], novos], ignore_index=True)
-                _write_df(ABA_DESPESAS, despesas_upd)
+                escrita.acrescentar(ws_desp, novos.to_dict("records"), cabecalho_padrao=COLS_DESPESAS_FIX)
+                refid.acrescentar_indice(ws_desp, novos["RefID"])
             st.success(f"Gravado em Despesas: {len(novos)} novas linha(s).")
         else:
             st.info("Nada novo para gravar em Despesas (tudo já lançado).")
 
-        # 6) Telegram
+        # 5) Telegram
         if enviar_tg:
             texto = build_text_resumo(
                 period_ini=ini, period_fim=fim,
@@ -673,6 +588,7 @@ if st.button("✅ Registrar comissão (1 linha por competência) e marcar itens
             )
             if dest_vini: tg_send_html(texto, _get_chat_vini())
             if dest_jp:   tg_send_html(texto, _get_chat_jp())
+        base_vinicius.clear()  # depois de gravar, a próxima execução relê a Base
         st.success("Processo concluído ✅")
 
 # ============================================
@@ -685,7 +601,7 @@ def _df_pagaveis(sem_grid, fiad_grid):
     partes = []
     for d in [sem_grid, fiad_grid]:
         if d is not None and not d.empty:
-            partes.append(d.copy())
+            partes.append(d)
     if not partes:
         return pd.DataFrame(columns=["Data","Cliente","Serviço","Valor_base_comissao","Competência","RefID"])
     df = pd.concat(partes, ignore_index=True)
@@ -732,7 +648,7 @@ if agg_sis.empty:
     st.info("Nenhum item pagável hoje.")
 else:
     # Garante coluna de comissão por linha (__comissao)
-    tmp_full = _ensure_comissao(df_pagaveis).copy()
+    tmp_full = _ensure_comissao(df_pagaveis)
 
     # total BRUTO (antes do %)
     base_col = "Valor (para comissão)" if "Valor (para comissão)" in tmp_full.columns else "Valor_base_comissao"
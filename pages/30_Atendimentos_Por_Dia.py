@@ -15,6 +15,7 @@ from datetime import datetime, date, timedelta
 import pytz
 import numpy as np
 from calendar import monthrange
+from utils import sheets_cache, fake_sheets, base_dados, linha_id
 
 # =========================
 # CONFIG
@@ -51,6 +52,8 @@ def _to_bool(x):
 
 @st.cache_resource(show_spinner=False)
 def _conectar_sheets():
+    if fake_sheets.backend_fake_ativo():
+        return fake_sheets.cliente_fake()
     info = st.secrets["GCP_SERVICE_ACCOUNT"]
     creds = Credentials.from_service_account_info(
         info,
@@ -63,7 +66,7 @@ def _conectar_sheets():
 
 # ---------- helpers Sheets ----------
 def _headers_and_indices(ws):
-    headers = ws.row_values(1)
+    headers = sheets_cache.cabecalho(ws)
     norms = [_norm_col(h) for h in headers]
     idxs = [i for i, n in enumerate(norms) if n == "conferido"]  # 0-based
     chosen = idxs[-1] if idxs else None  # SEMPRE a última
@@ -75,6 +78,7 @@ def _ensure_conferido_column(ws):
         return chosen + 1  # 1-based
     col = len(headers) + 1
     ws.update_cell(1, col, "Conferido")
+    sheets_cache.definir_cabecalho(ws, headers + ["Conferido"])
     return col
 
 def _update_conferido(ws, updates):
@@ -84,13 +88,30 @@ def _update_conferido(ws, updates):
         row = int(u["row"])
         val = "TRUE" if u["value"] else "FALSE"
         ws.update_cell(row, col_conf, val)
+    sheets_cache.marcar_escrita(ws.title)
 
 def _delete_rows(ws, rows):
+    apagadas = []
     for r in sorted(set(rows), reverse=True):
         try:
             ws.delete_rows(int(r))
+            apagadas.append(int(r))
         except Exception as e:
             st.warning(f"Falha ao excluir linha {r}: {e}")
+    linha_id.registrar_delete(ws, apagadas)  # linhas abaixo sobem no mapa RowID → linha
+    if apagadas:
+        sheets_cache.marcar_escrita(ws.title)
+
+def _linhas_por_rowid(ws, rowids):
+    """RowID → nº ATUAL da linha (o SheetRow lido pode ter mudado desde o cache)."""
+    linha_de = linha_id.localizar(ws, rowids)
+    rowids = {str(r).strip() for r in rowids}
+    if "" in rowids:
+        st.warning("Há registros sem RowID; eles foram ignorados. Preencha em 🔧 Diagnóstico da Base.")
+    faltam = rowids - set(linha_de) - {""}
+    if faltam:
+        st.warning(f"{len(faltam)} registro(s) não existem mais na planilha e foram ignorados.")
+    return linha_de
 
 def _fetch_conferido_map(ws):
     col_conf = _ensure_conferido_column(ws)
@@ -118,14 +139,15 @@ def _fetch_conferido_map(ws):
 def carregar_base():
     gc = _conectar_sheets()
     sh = gc.open_by_key(SHEET_ID)
-    ws = sh.worksheet(ABA_DADOS)
+    ws = sheets_cache.get_ws(sh, ABA_DADOS)
 
     df = get_as_dataframe(ws, evaluate_formulas=True, header=0)
     df = df.dropna(how="all")
     if df is None or df.empty:
         return pd.DataFrame()
 
-    df["SheetRow"] = df.index + 2
+    linha_id.registrar_lidas(ws, df)  # só lê: linhas sem RowID são preenchidas em 33_Diagnostico_Base
+    df["SheetRow"] = df.index + 2  # só p/ exibir; gravação localiza pelo RowID
     df.columns = [str(c).strip() for c in df.columns]
 
     base_cols = ["Data", "Serviço", "Valor", "Conta", "Cliente", "Combo",
@@ -152,6 +174,8 @@ def carregar_base():
                 pass
         return None
     df["Data_norm"] = df["Data"].apply(parse_data)
+    # chave do atendimento: linha antes de DATA_CORRETA, (Cliente, dia) depois
+    df["Visita"] = base_dados.chave_visita(df, col_data="Data_norm", corte=DATA_CORRETA)
 
     # valores
     def parse_valor(v):
@@ -172,7 +196,7 @@ def carregar_base():
     df["Conferido"] = df["SheetRow"].map(lambda r: bool(conferido_map.get(int(r), False))).astype(bool)
 
     # debug na sidebar
-    headers = ws.row_values(1)
+    headers = sheets_cache.cabecalho(ws)
     conf_sources = [h for h in headers if _norm_col(h) == "conferido"]
     df.attrs["__conferido_sources__"] = conf_sources or []
 
@@ -186,21 +210,13 @@ def filtrar_por_dias(df, dias_set):
 
 def contar_clientes_periodo(df_periodo):
     """
-    Soma clientes por dia aplicando a regra:
-    - dia < DATA_CORRETA: conta linhas
-    - dia >= DATA_CORRETA: conta grupos únicos (Cliente, Data_norm)
+    Atendimentos do período pela chave "Visita" (montada no carregar_base):
+    - dia < DATA_CORRETA: cada linha
+    - dia >= DATA_CORRETA: grupos únicos (Cliente, Data_norm)
     """
     if df_periodo.empty: 
         return 0
-    total = 0
-    for dia, ddf in df_periodo.groupby("Data_norm"):
-        if pd.isna(dia): 
-            continue
-        if dia < DATA_CORRETA:
-            total += len(ddf)
-        else:
-            total += ddf.groupby(["Cliente", "Data_norm"]).ngroups
-    return total
+    return int(df_periodo["Visita"].nunique())
 
 def kpis(df_periodo):
     if df_periodo.empty: return 0, 0, 0.0, 0.0
@@ -465,21 +481,26 @@ if st.button("✅ Aplicar mudanças (gravar no Sheets)", type="primary"):
     try:
         gc = _conectar_sheets()
         sh = gc.open_by_key(SHEET_ID)
-        ws = sh.worksheet(ABA_DADOS)
+        ws = sheets_cache.get_ws(sh, ABA_DADOS)
 
-        # Atualiza 'Conferido'
         orig_by_row = df_conf.set_index("SheetRow")["Conferido"].apply(_to_bool).to_dict()
+        rowid_by_row = df_conf.set_index("SheetRow")["RowID"].astype(str).str.strip().to_dict()
+        linha_de = _linhas_por_rowid(ws, list(rowid_by_row.values()))
+
+        # Atualiza 'Conferido'
         updates = []
         for _, r in edited.iterrows():
             rownum = int(r["SheetRow"])
             new_val = bool(_to_bool(r["Conferido"]))
             old_val = bool(_to_bool(orig_by_row.get(rownum, False)))
-            if new_val != old_val:
-                updates.append({"row": rownum, "value": new_val})
+            atual = linha_de.get(rowid_by_row.get(rownum))
+            if new_val != old_val and atual:
+                updates.append({"row": atual, "value": new_val})
         _update_conferido(ws, updates)
 
         # Exclui marcados
-        rows_to_delete = [int(r["SheetRow"]) for _, r in edited.iterrows() if bool(_to_bool(r["Excluir"]))]
+        rows_to_delete = [linha_de[rowid_by_row[int(r["SheetRow"])]] for _, r in edited.iterrows()
+                          if bool(_to_bool(r["Excluir"])) and rowid_by_row.get(int(r["SheetRow"])) in linha_de]
         _delete_rows(ws, rows_to_delete)
 
         st.success("Alterações aplicadas com sucesso!")
@@ -611,8 +632,9 @@ else:
         try:
             gc = _conectar_sheets()
             sh = gc.open_by_key(SHEET_ID)
-            ws = sh.worksheet(ABA_DADOS)
-            updates = [{"row": int(r), "value": True} for r in df_export_base["SheetRow"].tolist()]
+            ws = sheets_cache.get_ws(sh, ABA_DADOS)
+            linha_de = _linhas_por_rowid(ws, df_export_base["RowID"].tolist())
+            updates = [{"row": r, "value": True} for r in linha_de.values()]
             _update_conferido(ws, updates)
             st.success(f"Marcados {len(updates)} registros como Conferidos.")
             st.cache_data.clear()
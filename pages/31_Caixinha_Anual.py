@@ -5,6 +5,7 @@ import gspread
 from google.oauth2.service_account import Credentials
 from gspread_dataframe import get_as_dataframe, set_with_dataframe
 from datetime import date
+from utils import sheets_cache, fake_sheets
 
 # =========================
 # CONFIG
@@ -14,6 +15,8 @@ ABA_FUNDO = "FundoCaixinhaAnual"
 
 @st.cache_resource
 def conectar_sheets():
+    if fake_sheets.backend_fake_ativo():
+        return fake_sheets.abrir_planilha_fake(SHEET_ID)
     info = st.secrets["GCP_SERVICE_ACCOUNT"]
     escopo = ["https://spreadsheets.google.com/feeds", "https://www.googleapis.com/auth/drive"]
     credenciais = Credentials.from_service_account_info(info, scopes=escopo)
@@ -22,10 +25,12 @@ def conectar_sheets():
 
 def garantir_fundo_sheet():
     sh = conectar_sheets()
-    if ABA_FUNDO not in [w.title for w in sh.worksheets()]:
+    if not sheets_cache.aba_existe(sh, ABA_FUNDO):
         ws = sh.add_worksheet(title=ABA_FUNDO, rows=100, cols=10)
+        sheets_cache.registrar_aba(sh, ws)
         ws.append_row(["Ano","DataContagem","ValorTotalContado","RegraDivisao","Parcela_JPaulo","Parcela_Vinicius","Distribuido"])
-    return sh.worksheet(ABA_FUNDO)
+        return ws
+    return sheets_cache.get_ws(sh, ABA_FUNDO)
 
 # =========================
 # UI
@@ -0,0 +1,113 @@
+# 32_Clientes_Duplicados.py — possíveis CLIENTES DUPLICADOS na Base de Dados
+# - Mesmo nome com acento/caixa/espaço diferente ("João Silva" / "joao silva ")
+# - Grafias parecidas (até 2 letras de diferença: "Joao Silva" / "Joao Silv")
+# - Sugestão de nome final = grafia mais usada do grupo
+# - SÓ LEITURA: nada é alterado na planilha; baixe o CSV e revise antes de juntar
+# --------------------------------------------------------------
+
+import streamlit as st
+import pandas as pd
+import gspread
+from gspread_dataframe import get_as_dataframe
+from google.oauth2.service_account import Credentials
+from utils import sheets_cache, fake_sheets, duplicados
+
+st.set_page_config(page_title="Clientes Duplicados", page_icon="🧬", layout="wide")
+st.title("🧬 Clientes Duplicados — nomes parecidos na Base")
+
+# =========================
+# CONFIG
+# =========================
+SHEET_ID = "1qtOF1I7Ap4By2388ySThoVlZHbI3rAJv_haEcil0IUE"
+BASE_ABA = "Base de Dados"
+DATA_FMT = "%d/%m/%Y"
+
+# =========================
+# CONEXÃO GOOGLE SHEETS
+# =========================
+@st.cache_resource
+def conectar_sheets():
+    if fake_sheets.backend_fake_ativo():
+        return fake_sheets.cliente_fake()
+    info = st.secrets.get("gcp_service_account") or st.secrets.get("GCP_SERVICE_ACCOUNT")
+    if not info:
+        st.error("❌ Secrets ausentes. Adicione 'gcp_service_account' nos Secrets do Streamlit.")
+        st.stop()
+    scopes = ["https://www.googleapis.com/auth/spreadsheets", "https://www.googleapis.com/auth/drive"]
+    creds = Credentials.from_service_account_info(info, scopes=scopes)
+    return gspread.authorize(creds)
+
+@st.cache_data(ttl=300)
+def carregar_estatisticas() -> pd.DataFrame:
+    """Cliente → Linhas, Dias, Ultima (a base inteira não fica no cache, só o resumo)."""
+    sh = conectar_sheets().open_by_key(SHEET_ID)
+    ws = sheets_cache.get_ws(sh, BASE_ABA)
+    df = get_as_dataframe(ws, evaluate_formulas=True, dtype=str).dropna(how="all")
+    df.columns = [str(c).strip() for c in df.columns]
+    if "Cliente" not in df.columns:
+        st.error("❌ Coluna 'Cliente' não encontrada na Base de Dados.")
+        st.stop()
+    return duplicados.estatisticas(df, "Cliente", "Data", data_fmt=DATA_FMT)
+
+@st.cache_data(ttl=300, show_spinner=False)
+def calcular_candidatos(stats: pd.DataFrame, limiar: float) -> pd.DataFrame:
+    return duplicados.candidatos(stats, limiar)
+
+# =========================
+# TELA
+# =========================
+stats = carregar_estatisticas()
+
+c1, c2 = st.columns([2, 1])
+limiar = c1.slider("Similaridade mínima", 0.70, 1.00, duplicados.LIMIAR_PADRAO, 0.01,
+                   help="1,00 = só diferenças de acento/caixa/espaço. Abaixo disso entram grafias parecidas "
+                        f"(no máximo {duplicados.EDICOES_MAX} letras de diferença).")
+so_grafia = c2.checkbox("Só grafias parecidas", value=False,
+                        help="Esconde os grupos que diferem apenas por acento/caixa/espaço.")
+
+with st.spinner("Procurando nomes parecidos..."):
+    cand = calcular_candidatos(stats, float(limiar))
+
+if so_grafia and not cand.empty:
+    grupos_grafia = cand.loc[cand["Motivo"] == "grafia parecida", "Grupo"].unique()
+    cand = cand[cand["Grupo"].isin(grupos_grafia)]
+
+m1, m2, m3 = st.columns(3)
+m1.metric("Clientes na base", f"{len(stats):,}".replace(",", "."))
+m2.metric("Grupos suspeitos", int(cand["Grupo"].nunique()) if not cand.empty else 0)
+m3.metric("Nomes envolvidos", len(cand))
+
+if cand.empty:
+    st.success("✅ Nenhum nome parecido encontrado com esse limiar.")
+    st.stop()
+
+busca = st.text_input("Filtrar por nome", "")
+if busca.strip():
+    alvo = duplicados.compacto(busca)
+    grupos = cand.loc[cand["Cliente"].map(duplicados.compacto).str.contains(alvo, regex=False), "Grupo"].unique()
+    cand = cand[cand["Grupo"].isin(grupos)]
+
+vis = cand.copy()
+vis["Ultima"] = pd.to_datetime(vis["Ultima"]).dt.strftime("%d/%m/%Y").fillna("—")
+vis["Trocar?"] = vis["Cliente"] != vis["Sugestao"]
+st.dataframe(
+    vis.rename(columns={"Sugestao": "Sugestão", "Ultima": "Última visita"}),
+    use_container_width=True, hide_index=True,
+    column_config={"Similaridade": st.column_config.ProgressColumn("Similaridade", min_value=0.0, max_value=1.0,
+                                                                   format="%.3f")},
+)
+
+# =========================
+# EXPORTAR SUGESTÕES
+# =========================
+st.markdown("### 📥 Sugestões de junção")
+st.caption("Nada é alterado na planilha. Revise cada linha antes de renomear na Base de Dados.")
+sug = cand[cand["Cliente"] != cand["Sugestao"]][["Grupo", "Cliente", "Sugestao", "Linhas", "Similaridade", "Motivo"]]
+sug = sug.rename(columns={"Cliente": "De", "Sugestao": "Para"})
+st.download_button(
+    "Baixar CSV de sugestões",
+    sug.to_csv(index=False, sep=";").encode("utf-8-sig"),
+    file_name="clientes_duplicados_sugestoes.csv",
+    mime="text/csv",
+    disabled=sug.empty,
+)
@@ -0,0 +1,71 @@
+# 33_Diagnostico_Base.py — DIAGNÓSTICO da Base de Dados: linhas sem RowID
+# - Conta as linhas com dados que ainda não têm RowID (linhas antigas, digitadas à mão)
+# - "Preencher RowIDs" grava SÓ as células vazias, e só se o cabeçalho e o nº de linhas
+#   continuam iguais aos da contagem; se a aba mudou, nada é gravado — conte de novo
+# - As páginas só LEEM o RowID; a única escrita em massa da coluna é esta ação
+# --------------------------------------------------------------
+
+import streamlit as st
+import gspread
+from google.oauth2.service_account import Credentials
+from utils import sheets_cache, fake_sheets, linha_id
+
+st.set_page_config(page_title="Diagnóstico da Base", page_icon="🔧", layout="wide")
+st.title("🔧 Diagnóstico da Base — RowID das linhas")
+
+# =========================
+# CONFIG
+# =========================
+SHEET_ID = "1qtOF1I7Ap4By2388ySThoVlZHbI3rAJv_haEcil0IUE"
+BASE_ABA = "Base de Dados"
+
+# =========================
+# CONEXÃO GOOGLE SHEETS
+# =========================
+@st.cache_resource
+def conectar_sheets():
+    if fake_sheets.backend_fake_ativo():
+        return fake_sheets.cliente_fake()
+    info = st.secrets.get("gcp_service_account") or st.secrets.get("GCP_SERVICE_ACCOUNT")
+    if not info:
+        st.error("❌ Secrets ausentes. Adicione 'gcp_service_account' nos Secrets do Streamlit.")
+        st.stop()
+    scopes = ["https://www.googleapis.com/auth/spreadsheets", "https://www.googleapis.com/auth/drive"]
+    creds = Credentials.from_service_account_info(info, scopes=scopes)
+    return gspread.authorize(creds)
+
+ws = sheets_cache.get_ws(conectar_sheets().open_by_key(SHEET_ID), BASE_ABA)
+
+# =========================
+# CONTAGEM
+# =========================
+if "retrato_rowid" not in st.session_state or st.button("🔄 Contar de novo"):
+    st.session_state["retrato_rowid"] = linha_id.faltantes(ws)
+retrato = st.session_state["retrato_rowid"]
+
+m1, m2 = st.columns(2)
+m1.metric("Linhas na aba", max(retrato["n_linhas"] - 1, 0))
+m2.metric("Linhas sem RowID", len(retrato["linhas"]))
+
+if not retrato["linhas"]:
+    st.success("✅ Todas as linhas com dados têm RowID.")
+    st.stop()
+
+st.caption("Linhas sem RowID não podem ser quitadas (11_Fiado) nem conferidas/excluídas (30_Atendimentos_Por_Dia).")
+with st.expander("Ver linhas"):
+    st.write(", ".join(str(ln) for ln in retrato["linhas"][:500]) + (" …" if len(retrato["linhas"]) > 500 else ""))
+
+# =========================
+# PREENCHER
+# =========================
+if st.button("✍️ Preencher RowIDs", type="primary"):
+    try:
+        n = linha_id.preencher_faltantes(ws, retrato)
+    except ValueError as e:
+        st.session_state.pop("retrato_rowid", None)
+        st.error(f"Nada foi gravado: {e}")
+    else:
+        sheets_cache.marcar_escrita(BASE_ABA)
+        st.session_state.pop("retrato_rowid", None)
+        st.cache_data.clear()
+        st.success(f"{n} RowID(s) gravados.")
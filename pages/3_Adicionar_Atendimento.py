@@ -9,7 +9,10 @@ from gspread.utils import rowcol_to_a1
 from datetime import datetime, date
 import pytz
 import unicodedata
+import threading
 import requests
+from streamlit_searchbox import st_searchbox
+from utils import sheets_cache, fake_sheets, linha_id, metadados_form, busca_clientes
 
 # =========================
 # CONFIG
@@ -101,6 +104,8 @@ def _fmt_brl(v: float) -> str:
 # =========================
 @st.cache_resource
 def conectar_sheets():
+    if fake_sheets.backend_fake_ativo():
+        return fake_sheets.abrir_planilha_fake(SHEET_ID)
     info = st.secrets["GCP_SERVICE_ACCOUNT"]
     escopo = ["https://spreadsheets.google.com/feeds", "https://www.googleapis.com/auth/drive"]
     credenciais = Credentials.from_service_account_info(info, scopes=escopo)
@@ -109,7 +114,7 @@ def conectar_sheets():
 
 def ler_cabecalho(aba):
     try:
-        headers = aba.row_values(1)
+        headers = sheets_cache.cabecalho(aba)
         return [h.strip() for h in headers] if headers else []
     except Exception:
         return []
@@ -140,7 +145,7 @@ def format_extras_numeric(ws):
     fmt("TaxaCartaoPct", "PERCENT", "0.00%")
 
 def carregar_base():
-    aba = conectar_sheets().worksheet(ABA_DADOS)
+    aba = sheets_cache.get_ws(conectar_sheets(), ABA_DADOS)
     df = get_as_dataframe(aba).dropna(how="all")
     df.columns = [str(c).strip() for c in df.columns]
     df = df.loc[:, ~pd.Index(df.columns).duplicated(keep="first")]
@@ -153,16 +158,25 @@ def carregar_base():
     df["Combo"] = df["Combo"].fillna("")
     return df, aba
 
+@st.cache_resource(ttl=300, show_spinner=False)
+def base_lida() -> pd.DataFrame:
+    """1 leitura da base por TTL para as estruturas derivadas (histórico, listas, busca)."""
+    return carregar_base()[0]
+
 def salvar_base(df_final: pd.DataFrame):
-    aba = conectar_sheets().worksheet(ABA_DADOS)
+    aba = sheets_cache.get_ws(conectar_sheets(), ABA_DADOS)
     headers_existentes = ler_cabecalho(aba) or [*COLS_OFICIAIS, *COLS_FIADO, *COLS_PAG_EXTRAS, *COLS_CAIXINHAS]
-    colunas_alvo = list(dict.fromkeys([*headers_existentes, *COLS_OFICIAIS, *COLS_FIADO, *COLS_PAG_EXTRAS, *COLS_CAIXINHAS]))
+    colunas_alvo = list(dict.fromkeys([*headers_existentes, *COLS_OFICIAIS, *COLS_FIADO, *COLS_PAG_EXTRAS,
+                                       *COLS_CAIXINHAS, linha_id.COL_ROWID]))
     for c in colunas_alvo:
         if c not in df_final.columns:
             df_final[c] = ""
-    df_final = df_final[colunas_alvo]
+    df_final = linha_id.carimbar_df(df_final[colunas_alvo].copy())  # linhas novas saem com RowID
     aba.clear()
     set_with_dataframe(aba, df_final, include_index=False, include_column_header=True)
+    sheets_cache.definir_cabecalho(aba, colunas_alvo)
+    sheets_cache.marcar_escrita(ABA_DADOS)  # 11_Fiado remonta o livro com os fiados novos
+    linha_id.definir(aba, df_final[linha_id.COL_ROWID], range(2, len(df_final) + 2))
     try:
         format_extras_numeric(aba)
     except Exception:
@@ -175,9 +189,9 @@ def salvar_base(df_final: pd.DataFrame):
 def carregar_fotos_mapa():
     try:
         sh = conectar_sheets()
-        if STATUS_ABA not in [w.title for w in sh.worksheets()]:
+        if not sheets_cache.aba_existe(sh, STATUS_ABA):
             return {}
-        ws = sh.worksheet(STATUS_ABA)
+        ws = sheets_cache.get_ws(sh, STATUS_ABA)
         df = get_as_dataframe(ws).fillna("")
         df.columns = [str(c).strip() for c in df.columns]
         df = df.loc[:, ~pd.Index(df.columns).duplicated(keep="first")]
@@ -278,32 +292,59 @@ def _parse_pct_vini() -> float:
     except Exception:
         return PCT_COMISSAO_VINI_DEFAULT
 
-def _valor_bruto_row(row) -> float:
-    try:
-        vb = float(row.get("ValorBrutoRecebido", 0) or 0)
-        if vb and vb > 0:
-            return vb
-    except Exception:
-        pass
-    try:
-        return float(row.get("Valor", 0) or 0)
-    except Exception:
-        return 0.0
+def _num_col(df: pd.DataFrame, col: str) -> pd.Series:
+    if col not in df.columns:
+        return pd.Series(0.0, index=df.index)
+    return pd.to_numeric(df[col], errors="coerce").fillna(0.0)
+
+def _valor_bruto(df: pd.DataFrame) -> pd.Series:
+    """ValorBrutoRecebido quando > 0; senão Valor (linha a linha, vetorizado)."""
+    vb = _num_col(df, "ValorBrutoRecebido")
+    return vb.where(vb > 0, _num_col(df, "Valor"))
 
-def _is_servico(s):
-    t = _norm_key(s)
-    return t in {"servico", "serviço", ""}  # mantém vazios como serviço registrado
+TIPOS_SERVICO = {"servico", "serviço", ""}  # Tipo normalizado; vazio conta como serviço registrado
 
 def _servicos_1x_por_atendimento(d_srv: pd.DataFrame) -> pd.DataFrame:
     """Usa chave Cliente+Data para contar cada serviço apenas 1x por atendimento."""
     base = d_srv.copy()
-    base["_dia"] = pd.to_datetime(base["Data"], format=DATA_FMT, errors="coerce").dt.date
+    base["_dia"] = base["_dt"].dt.date
     base["_chave_att"] = base["Cliente"].astype(str).str.strip() + " | " + base["_dia"].astype(str)
     base["_serv_norm"] = base["Serviço"].astype(str).str.strip()
     base = base.drop_duplicates(subset=["_chave_att", "_serv_norm"])
     return base
 
-def _make_daily_summary_caption(df_all: pd.DataFrame, data_str: str, funcionario: str) -> str:
+class VisaoDias:
+    """Base particionada por dia, montada 1x por gravação: Data parseada, bruto vetorizado,
+    Tipo/Funcionário normalizados. Resumos e cards só fatiam o dia/cliente pedido."""
+    def __init__(self, df_all: pd.DataFrame):
+        d = df_all.copy()
+        d["_data_str"] = d["Data"].astype(str).str.strip()
+        d["_dt"] = pd.to_datetime(d["_data_str"], format=DATA_FMT, errors="coerce")
+        d["_cli"] = d["Cliente"].astype(str).str.strip()
+        d["__func_norm"] = d["Funcionário"].astype(str).map(_norm_key)
+        d["__tipo_norm"] = d["Tipo"].astype(str).map(_norm_key)
+        d["__bruto_i"] = _valor_bruto(d)
+        self.df = d
+        self._dias = d.groupby(d["_dt"].dt.normalize(), sort=False).indices      # dia → posições
+        self._clientes = d.groupby("_cli", sort=False).indices                     # cliente → posições
+
+    def _take(self, pos) -> pd.DataFrame:
+        return self.df.take(pos) if pos is not None else self.df.iloc[0:0].copy()
+
+    def dia(self, dia) -> pd.DataFrame:
+        return self._take(self._dias.get(pd.Timestamp(dia)))
+
+    def do_cliente(self, cliente: str, data_str: str | None = None) -> pd.DataFrame:
+        """Histórico do cliente; com data_str, só as linhas daquela Data."""
+        d = self._take(self._clientes.get(str(cliente).strip()))
+        if data_str is not None:
+            d = d[d["_data_str"] == str(data_str).strip()].copy()
+        return d
+
+def _visao(df_all) -> VisaoDias:
+    return df_all if isinstance(df_all, VisaoDias) else VisaoDias(df_all)
+
+def _make_daily_summary_caption(visao: "VisaoDias", data_str: str, funcionario: str) -> str:
     # Resumo por funcionário — sempre retorna texto.
     def _fmt_names(ns, maxn=8):
         ns = [n for n in ns if str(n).strip()]
@@ -318,13 +359,8 @@ def _make_daily_summary_caption(df_all: pd.DataFrame, data_str: str, funcionario
         return f"📊 <b>Resumo do Dia — {funcionario}</b>\n🗓️ {data_str}\n—\n⚠️ Data inválida."
     dia_ref = dia_ref.date()
 
-    d = df_all.copy()
-    d["_dt"] = pd.to_datetime(d["Data"], format=DATA_FMT, errors="coerce")
-    d = d[~d["_dt"].isna() & (d["_dt"].dt.date == dia_ref)].copy()
-
-    func_norm = _norm_key(funcionario)
-    d["__func_norm"] = d["Funcionário"].astype(str).map(_norm_key)
-    d = d[d["__func_norm"] == func_norm].copy()
+    d = visao.dia(dia_ref)
+    d = d[d["__func_norm"] == _norm_key(funcionario)]
 
     cab = [f"📊 <b>Resumo do Dia — {funcionario}</b>", f"🗓️ {data_str}", "—"]
 
@@ -340,8 +376,7 @@ def _make_daily_summary_caption(df_all: pd.DataFrame, data_str: str, funcionario
         ]
         return "\n".join(cab)
 
-    d["__tipo_norm"] = d["Tipo"].astype(str).map(_norm_key)
-    d_srv = d[d["__tipo_norm"].apply(_is_servico)].copy()
+    d_srv = d[d["__tipo_norm"].isin(TIPOS_SERVICO)]
 
     # Serviços contados 1x por atendimento
     base_srv = _servicos_1x_por_atendimento(d_srv)
@@ -361,7 +396,7 @@ def _make_daily_summary_caption(df_all: pd.DataFrame, data_str: str, funcionario
     qtd_fiado = len(clientes_fiado)
     qtd_pago = len(clientes_pago)
 
-    bruto_total = float(d_srv.apply(_valor_bruto_row, axis=1).sum())
+    bruto_total = float(d_srv["__bruto_i"].sum())
     liquido_total = float(pd.to_numeric(d_srv.get("Valor", 0), errors="coerce").fillna(0).sum())
     taxa_cartao_total = float(pd.to_numeric(d_srv.get("TaxaCartaoValor", 0), errors="coerce").fillna(0).sum())
 
@@ -401,8 +436,6 @@ def _make_daily_summary_caption(df_all: pd.DataFrame, data_str: str, funcionario
     por_func = base_fun.groupby("_func")["_cliente"].count().to_dict()
     funcs_str = " • ".join(f"{f}: {q}x" for f, q in por_func.items()) or "—"
 
-
-    d_srv["__bruto_i"] = d_srv.apply(_valor_bruto_row, axis=1)
     top3 = d_srv.groupby("Cliente")["__bruto_i"].sum().sort_values(ascending=False).head(3)
     top3_str = ", ".join(f"{cli}: {_fmt_brl(v)}" for cli, v in top3.items()) or "—"
 
@@ -413,8 +446,7 @@ def _make_daily_summary_caption(df_all: pd.DataFrame, data_str: str, funcionario
     ]
 
     # Fiados do dia
-    fiados_df = d_srv[d_srv["Conta"].astype(str).str.strip().str.lower() == "fiado"].copy()
-    fiados_df["__bruto_i"] = fiados_df.apply(_valor_bruto_row, axis=1)
+    fiados_df = d_srv[d_srv["Conta"].astype(str).str.strip().str.lower() == "fiado"]
     fiados_group = fiados_df.groupby("Cliente")["__bruto_i"].sum().sort_values(ascending=False)
     if not fiados_group.empty:
         linhas.append("")
@@ -436,7 +468,7 @@ def _make_daily_summary_caption(df_all: pd.DataFrame, data_str: str, funcionario
         linhas.append(f"🤝 Comissão: {pct*100:.0f}% • 💰 {_fmt_brl(bruto_total*pct)}")
     return "\n".join(linhas)
 
-def _make_daily_summary_caption_geral(df_all: pd.DataFrame, data_str: str) -> str:
+def _make_daily_summary_caption_geral(visao: "VisaoDias", data_str: str) -> str:
     # Resumo GERAL — sempre retorna texto.
     def _fmt_names(ns, maxn=12):
         ns = [n for n in ns if str(n).strip()]
@@ -451,9 +483,7 @@ def _make_daily_summary_caption_geral(df_all: pd.DataFrame, data_str: str) -> st
         return f"📊 <b>Resumo GERAL</b>\n🗓️ {data_str}\n—\n⚠️ Data inválida."
     dia_ref = dia_ref.date()
 
-    d = df_all.copy()
-    d["_dt"] = pd.to_datetime(d["Data"], format=DATA_FMT, errors="coerce")
-    d = d[~d["_dt"].isna() & (d["_dt"].dt.date == dia_ref)].copy()
+    d = visao.dia(dia_ref)
 
     linhas = ["📊 <b>Resumo GERAL</b>", f"🗓️ {data_str}", "—"]
 
@@ -468,8 +498,7 @@ def _make_daily_summary_caption_geral(df_all: pd.DataFrame, data_str: str) -> st
         ]
         return "\n".join(linhas)
 
-    d["__tipo_norm"] = d["Tipo"].astype(str).map(_norm_key)
-    d_srv = d[d["__tipo_norm"].apply(_is_servico)].copy()
+    d_srv = d[d["__tipo_norm"].isin(TIPOS_SERVICO)]
 
     # Serviços contados 1x por atendimento
     base_srv = _servicos_1x_por_atendimento(d_srv)
@@ -491,7 +520,7 @@ def _make_daily_summary_caption_geral(df_all: pd.DataFrame, data_str: str) -> st
     clientes_unicos = d_srv["Cliente"].astype(str).str.strip().replace("", pd.NA).dropna().unique().tolist()
     qtd_clientes = len(clientes_unicos)
 
-    bruto_total = float(d_srv.apply(_valor_bruto_row, axis=1).sum())
+    bruto_total = float(d_srv["__bruto_i"].sum())
     liquido_total = float(pd.to_numeric(d_srv.get("Valor", 0), errors="coerce").fillna(0).sum())
     taxa_cartao_total = float(pd.to_numeric(d_srv.get("TaxaCartaoValor", 0), errors="coerce").fillna(0).sum())
 
@@ -534,8 +563,7 @@ def _make_daily_summary_caption_geral(df_all: pd.DataFrame, data_str: str) -> st
         f"💸 Pagos: <b>{qtd_pago}</b> • 🧾 Fiado: <b>{qtd_fiado}</b>",
     ]
 
-    fiados_df = d_srv[d_srv["Conta"].astype(str).str.strip().str.lower() == "fiado"].copy()
-    fiados_df["__bruto_i"] = fiados_df.apply(_valor_bruto_row, axis=1)
+    fiados_df = d_srv[d_srv["Conta"].astype(str).str.strip().str.lower() == "fiado"]
     fiados_group = fiados_df.groupby("Cliente")["__bruto_i"].sum().sort_values(ascending=False)
     if not fiados_group.empty:
         linhas.append("")
@@ -553,9 +581,9 @@ def _make_daily_summary_caption_geral(df_all: pd.DataFrame, data_str: str) -> st
     ]
     return "\n".join(linhas)
 
-def enviar_resumo_diario(df_all: pd.DataFrame, data_str: str, funcionario: str) -> bool:
+def enviar_resumo_diario(df_all, data_str: str, funcionario: str) -> bool:
     try:
-        caption = _make_daily_summary_caption(df_all, data_str, funcionario)
+        caption = _make_daily_summary_caption(_visao(df_all), data_str, funcionario)
         if not caption:
             return False
         if funcionario == "Vinicius":
@@ -566,9 +594,9 @@ def enviar_resumo_diario(df_all: pd.DataFrame, data_str: str, funcionario: str)
     except Exception:
         return False
 
-def enviar_resumo_geral(df_all: pd.DataFrame, data_str: str) -> bool:
+def enviar_resumo_geral(df_all, data_str: str) -> bool:
     try:
-        caption = _make_daily_summary_caption_geral(df_all, data_str)
+        caption = _make_daily_summary_caption_geral(_visao(df_all), data_str)
         if not caption:
             return False
         return tg_send(caption, chat_id=_get_chat_id_jp())
@@ -578,12 +606,8 @@ def enviar_resumo_geral(df_all: pd.DataFrame, data_str: str) -> bool:
 # =========================
 # CARD – bloco principal + seções extras (cartão, caixinha, fiado)
 # =========================
-def _resumo_do_dia(df_all: pd.DataFrame, cliente: str, data_str: str):
-    d = df_all[
-        (df_all["Cliente"].astype(str).str.strip() == cliente) &
-        (df_all["Data"].astype(str).str.strip() == data_str)
-    ].copy()
-
+def _resumo_do_dia(visao: "VisaoDias", cliente: str, data_str: str):
+    d = visao.do_cliente(cliente, data_str)
     d["Valor"] = pd.to_numeric(d["Valor"], errors="coerce").fillna(0.0)
     servicos = [str(s).strip() for s in d["Serviço"].fillna("").tolist() if str(s).strip()]
     valor_total = float(d["Valor"].sum()) if not d.empty else 0.0
@@ -603,25 +627,83 @@ def _ano_from_date_str(data_str: str) -> int | None:
     dt = pd.to_datetime(data_str, format=DATA_FMT, errors="coerce")
     return None if pd.isna(dt) else int(dt.year)
 
-def _year_sections_for_jpaulo(df_all: pd.DataFrame, cliente: str, ano: int) -> tuple[str, str]:
-    d = df_all.copy()
-    d = d[d["Cliente"].astype(str).str.strip() == cliente].copy()
-    d["_dt"] = pd.to_datetime(d["Data"], format=DATA_FMT, errors="coerce")
-    d = d.dropna(subset=["_dt"])
-    d["ano"] = d["_dt"].dt.year
-    d = d[d["ano"] == ano].copy()
-
-    if d.empty:
+class HistoricoAnual:
+    """Resumo por (Cliente, Ano) para as seções do card do JPaulo: totais, caixinha,
+    serviços (qtd/total) e funcionário dominante de cada dia. Montado vetorizado para
+    todos os clientes de uma vez; após gravar, só os clientes salvos são refeitos."""
+    def __init__(self, visao: VisaoDias):
+        self._lock = threading.RLock()
+        self._res = {}      # (cliente, ano) → dict do resumo
+        self._anos = {}     # cliente → anos com resumo
+        self._guardar(self._montar(visao.df))
+
+    @staticmethod
+    def _montar(df: pd.DataFrame) -> dict:
+        d = df[df["_dt"].notna()]
+        d = pd.DataFrame({
+            "cli": d["_cli"], "ano": d["_dt"].dt.year.astype(int), "dia": d["_dt"].dt.normalize(),
+            "func": d["Funcionário"].astype(str).str.strip(),
+            "serv": d["Serviço"].where(d["Serviço"].isna(), d["Serviço"].astype(str).str.strip()),
+            "valor": _num_col(d, "Valor"), "cx": _num_col(d, "CaixinhaDia"),
+        })
+        res = {}
+        tot = d.groupby(["cli", "ano"], sort=False)[["valor", "cx"]].sum()
+        for (cli, ano), (v, cx) in zip(tot.index, tot.to_numpy().tolist()):
+            res[(cli, ano)] = {"servicos": v, "caixinha": cx, "por_servico": [], "total_grp": 0.0, "visitas": {}}
+
+        grp = (d.dropna(subset=["serv"])
+                .groupby(["cli", "ano", "serv"], as_index=False)
+                .agg(qtd=("serv", "size"), total=("valor", "sum"))
+                .sort_values(["cli", "ano", "total", "qtd"], ascending=[True, True, False, False]))
+        for cli, ano, serv, qtd, total in grp.itertuples(index=False):
+            r = res[(cli, ano)]
+            r["por_servico"].append((serv, int(qtd), float(total)))
+            r["total_grp"] += float(total)
+
+        # funcionário que mais aparece nas linhas do dia (empate → o que aparece primeiro)
+        vis = (d.assign(_pos=range(len(d)))
+                .groupby(["cli", "ano", "dia", "func"], sort=False)
+                .agg(n=("_pos", "size"), primeiro=("_pos", "min"))
+                .reset_index()
+                .sort_values(["n", "primeiro"], ascending=[False, True])
+                .drop_duplicates(subset=["cli", "ano", "dia"]))
+        for (cli, ano, func), n in vis.groupby(["cli", "ano", "func"], sort=False).size().items():
+            res[(cli, ano)]["visitas"][func] = int(n)
+        return res
+
+    def _guardar(self, res: dict):
+        with self._lock:
+            self._res.update(res)
+            for cli, ano in res:
+                self._anos.setdefault(cli, set()).add(ano)
+
+    def atualizar(self, visao: VisaoDias, clientes):
+        """Refaz só os clientes informados a partir da base recém-gravada."""
+        clientes = {str(c).strip() for c in clientes}
+        partes = [visao.do_cliente(c) for c in clientes]
+        novo = self._montar(pd.concat(partes)) if partes else {}
+        with self._lock:
+            for cli in clientes:
+                for ano in self._anos.pop(cli, ()):
+                    self._res.pop((cli, ano), None)
+        self._guardar(novo)
+
+    def get(self, cliente: str, ano: int) -> dict | None:
+        return self._res.get((str(cliente).strip(), int(ano)))
+
+@st.cache_resource(ttl=300, show_spinner=False)
+def historico_anual() -> HistoricoAnual:
+    """Resumo por (Cliente, Ano) de uma leitura da base; as gravações da página atualizam no lugar."""
+    return HistoricoAnual(VisaoDias(base_lida()))
+
+def _year_sections_for_jpaulo(hist: HistoricoAnual, cliente: str, ano: int) -> tuple[str, str]:
+    r = hist.get(cliente, ano)
+    if r is None:
         return (f"📚 <b>Histórico por ano</b>\n{ano}: R$ 0,00",
                 f"🧾 <b>{ano}: por serviço</b>\n—")
 
-    d["Valor"] = pd.to_numeric(d.get("Valor", 0), errors="coerce").fillna(0.0)
-    if "CaixinhaDia" not in d.columns:
-        d["CaixinhaDia"] = 0.0
-    d["CaixinhaDia"] = pd.to_numeric(d["CaixinhaDia"], errors="coerce").fillna(0.0)
-
-    total_servicos = float(d["Valor"].sum())
-    total_caixinha = float(d["CaixinhaDia"].sum())
+    total_servicos = r["servicos"]
+    total_caixinha = r["caixinha"]
     total_com_caixinha = total_servicos + total_caixinha
 
     sec_hist = (
@@ -631,21 +713,9 @@ def _year_sections_for_jpaulo(df_all: pd.DataFrame, cliente: str, ano: int) -> t
         f"• Caixinha: {_fmt_brl(total_caixinha)}"
     )
 
-    grp = (
-        d.dropna(subset=["Serviço"])
-         .assign(Serviço=lambda x: x["Serviço"].astype(str).str.strip())
-         .groupby("Serviço", as_index=False)
-         .agg(qtd=("Serviço", "count"), total=("Valor", "sum"))
-         .sort_values(["total", "qtd"], ascending=[False, False])
-    )
+    linhas_serv = [f"• <b>{serv}</b>: {qtd}× • <b>{_fmt_brl(total)}</b>" for serv, qtd, total in r["por_servico"]]
 
-    linhas_serv = []
-    for _, r in grp.iterrows():
-        linhas_serv.append(
-            f"• <b>{r['Serviço']}</b>: {int(r['qtd'])}× • <b>{_fmt_brl(float(r['total']))}</b>"
-        )
-
-    total_geral = float(grp["total"].sum() if not grp.empty else 0.0) + total_caixinha
+    total_geral = r["total_grp"] + total_caixinha
     bloco_servicos = "\n".join(linhas_serv) if linhas_serv else "—"
     sec_serv = (
         f"🧾 <b>{ano}: por serviço</b>\n"
@@ -655,24 +725,15 @@ def _year_sections_for_jpaulo(df_all: pd.DataFrame, cliente: str, ano: int) -> t
     )
 
     # Frequência por funcionário
-    visitas_por_dia = (
-        d.assign(dia=d["_dt"].dt.date, func=d["Funcionário"].astype(str).str.strip())
-         .groupby("dia")["func"]
-         .agg(lambda s: s.value_counts(dropna=False).idxmax())
-    )
-    if not visitas_por_dia.empty:
-        contagem = visitas_por_dia.value_counts()
+    if r["visitas"]:
         ordem = ["JPaulo", "Vinicius"]
-        linhas_func = [f"{f}: <b>{int(contagem.get(f, 0))}</b> visita(s)" for f in ordem]
+        linhas_func = [f"{f}: <b>{int(r['visitas'].get(f, 0))}</b> visita(s)" for f in ordem]
         sec_serv += "\n\n👥 <b>Frequência por funcionário</b>\n" + "\n".join(linhas_func)
 
     return sec_hist, sec_serv
 
-def _secao_pag_cartao(df_all: pd.DataFrame, cliente: str, data_str: str) -> str:
-    df = df_all[
-        (df_all["Cliente"].astype(str).str.strip() == cliente) &
-        (df_all["Data"].astype(str).str.strip() == data_str)
-    ].copy()
+def _secao_pag_cartao(visao: "VisaoDias", cliente: str, data_str: str) -> str:
+    df = visao.do_cliente(cliente, data_str)
     if df.empty:
         return ""
 
@@ -714,11 +775,8 @@ def _secao_pag_cartao(df_all: pd.DataFrame, cliente: str, data_str: str) -> str:
     ]
     return "\n".join(linhas)
 
-def _secao_caixinha(df_all: pd.DataFrame, cliente: str, data_str: str) -> str:
-    d = df_all[
-        (df_all["Cliente"].astype(str).str.strip() == cliente) &
-        (df_all["Data"].astype(str).str.strip() == data_str)
-    ].copy()
+def _secao_caixinha(visao: "VisaoDias", cliente: str, data_str: str) -> str:
+    d = visao.do_cliente(cliente, data_str)
     if d.empty or "CaixinhaDia" not in d.columns:
         return ""
 
@@ -733,12 +791,9 @@ def _secao_caixinha(df_all: pd.DataFrame, cliente: str, data_str: str) -> str:
     ]
     return "\n".join(linhas)
 
-def _secao_fiado(df_all: pd.DataFrame, cliente: str, data_str: str) -> str:
-    d = df_all[
-        (df_all["Cliente"].astype(str).str.strip() == cliente) &
-        (df_all["Data"].astype(str).str.strip() == data_str) &
-        (df_all["Conta"].astype(str).str.strip().str.lower() == "fiado")
-    ].copy()
+def _secao_fiado(visao: "VisaoDias", cliente: str, data_str: str) -> str:
+    d = visao.do_cliente(cliente, data_str)
+    d = d[d["Conta"].astype(str).str.strip().str.lower() == "fiado"].copy()
     if d.empty:
         return ""
     d["_idx"] = d.index
@@ -755,11 +810,10 @@ def _secao_fiado(df_all: pd.DataFrame, cliente: str, data_str: str) -> str:
     return "\n".join(linhas)
 
 def make_card_caption_classico(
-    df_all, cliente, data_str, funcionario, servico_label, valor_total, periodo_label,
+    visao, cliente, data_str, funcionario, servico_label, valor_total, periodo_label,
     append_sections: list[str] | None = None
 ):
-    d_hist = df_all[df_all["Cliente"].astype(str).str.strip() == cliente].copy()
-    d_hist["_dt"] = pd.to_datetime(d_hist["Data"], format=DATA_FMT, errors="coerce")
+    d_hist = visao.do_cliente(cliente)
     d_hist = d_hist.dropna(subset=["_dt"]).sort_values("_dt")
 
     unique_days = sorted(set(d_hist["_dt"].dt.date.tolist()))
@@ -829,18 +883,19 @@ def make_card_caption_classico(
     return "\n".join(linhas)
 
 def enviar_card(df_all, cliente, funcionario, data_str, servico=None, valor=None, combo=None) -> bool:
+    visao = _visao(df_all)
     if servico is None or valor is None:
-        servico_label, valor_total, _, _, periodo_label = _resumo_do_dia(df_all, cliente, data_str)
+        servico_label, valor_total, _, _, periodo_label = _resumo_do_dia(visao, cliente, data_str)
     else:
         is_combo = bool(combo and str(combo).strip())
         eh_combo = is_combo or ("+" in str(servico))
         servico_label = f"{servico} (Combo)" if eh_combo else f"{servico} (Simples)"
         valor_total = float(valor)
-        _, _, _, _, periodo_label = _resumo_do_dia(df_all, cliente, data_str)
+        _, _, _, _, periodo_label = _resumo_do_dia(visao, cliente, data_str)
 
-    sec_cartao = _secao_pag_cartao(df_all, cliente, data_str)
-    sec_caixa  = _secao_caixinha(df_all, cliente, data_str)
-    sec_fiado  = _secao_fiado(df_all, cliente, data_str)
+    sec_cartao = _secao_pag_cartao(visao, cliente, data_str)
+    sec_caixa  = _secao_caixinha(visao, cliente, data_str)
+    sec_fiado  = _secao_fiado(visao, cliente, data_str)
 
     extras_base = []
     if sec_cartao: extras_base.append(sec_cartao)
@@ -850,17 +905,17 @@ def enviar_card(df_all, cliente, funcionario, data_str, servico=None, valor=None
     ano = _ano_from_date_str(data_str)
     extras_jp = extras_base.copy()
     if ano is not None:
-        sec_hist, sec_serv = _year_sections_for_jpaulo(df_all, cliente, ano)
+        sec_hist, sec_serv = _year_sections_for_jpaulo(historico_anual(), cliente, ano)
         extras_jp.extend([sec_hist, sec_serv])
 
     foto = FOTOS.get(_norm(cliente))
 
     caption_base = make_card_caption_classico(
-        df_all, cliente, data_str, funcionario, servico_label, valor_total, periodo_label,
+        visao, cliente, data_str, funcionario, servico_label, valor_total, periodo_label,
         append_sections=extras_base
     )
     caption_jp = make_card_caption_classico(
-        df_all, cliente, data_str, funcionario, servico_label, valor_total, periodo_label,
+        visao, cliente, data_str, funcionario, servico_label, valor_total, periodo_label,
         append_sections=extras_jp
     )
 
@@ -909,16 +964,22 @@ def ja_existe_atendimento(cliente, data, servico, combo=""):
     )
     return not df[f].empty
 
-def sugestoes_do_cliente(df_all, cli, conta_default, periodo_default, funcionario_default):
-    d = df_all[df_all["Cliente"].astype(str).str.strip() == cli].copy()
-    if d.empty: return conta_default, periodo_default, funcionario_default
-    d["_dt"] = pd.to_datetime(d["Data"], format=DATA_FMT, errors="coerce")
-    d = d.dropna(subset=["_dt"]).sort_values("_dt")
-    if d.empty: return conta_default, periodo_default, funcionario_default
-    ultima = d.iloc[-1]
-    conta = (ultima.get("Conta") or "").strip() or conta_default
-    periodo = (ultima.get("Período") or "").strip() or periodo_default
-    func = (ultima.get("Funcionário") or "").strip() or funcionario_default
+@st.cache_resource(ttl=300, show_spinner=False)
+def metadados() -> metadados_form.MetadadosForm:
+    """Listas (2025) e últimas escolhas por cliente; as gravações da página acrescentam no lugar."""
+    return metadados_form.MetadadosForm(base_lida(), ano=2025, data_fmt=DATA_FMT)
+
+@st.cache_resource(ttl=300, show_spinner=False)
+def indice_clientes() -> busca_clientes.IndiceClientes:
+    """Busca dos clientes da lista (sem acento), por recência/frequência no histórico todo."""
+    return busca_clientes.IndiceClientes.da_base(base_lida(), data_fmt=DATA_FMT, nomes=metadados().clientes)
+
+def sugestoes_do_cliente(meta, cli, conta_default, periodo_default, funcionario_default):
+    ultima = meta.ultimo(cli)
+    if ultima is None: return conta_default, periodo_default, funcionario_default
+    conta = ultima["Conta"] or conta_default
+    periodo = ultima["Período"] or periodo_default
+    func = ultima["Funcionário"] or funcionario_default
     if periodo not in ["Manhã", "Tarde", "Noite"]: periodo = periodo_default
     if func not in ["JPaulo", "Vinicius"]: func = funcionario_default
     return conta, periodo, func
@@ -932,18 +993,14 @@ st.title("📅 Adicionar Atendimento")
 # =========================
 # DADOS BASE PARA SUGESTÕES
 # =========================
-df_existente, _ = carregar_base()
-df_existente["_dt"] = pd.to_datetime(df_existente["Data"], format=DATA_FMT, errors="coerce")
-df_2025 = df_existente[df_existente["_dt"].dt.year == 2025]
-
-clientes_existentes = sorted(df_2025["Cliente"].dropna().unique())
-df_2025 = df_2025[df_2025["Serviço"].notna()].copy()
+meta = metadados()
 
-servicos_existentes = sorted(df_2025["Serviço"].str.strip().unique())
+clientes_existentes = meta.clientes
+servicos_existentes = meta.servicos
 servicos_ui = list(dict.fromkeys(["Corte", *servicos_existentes]))
 
-contas_existentes = sorted([c for c in df_2025["Conta"].dropna().astype(str).str.strip().unique() if c])
-combos_existentes = sorted([c for c in df_2025["Combo"].dropna().astype(str).str.strip().unique() if c])
+contas_existentes = meta.contas
+combos_existentes = meta.combos
 
 # =========================
 # REENVIAR RESUMOS (Data dentro da seção, layout antigo)
@@ -991,7 +1048,8 @@ modo_lote = st.toggle("📦 Cadastro em Lote (vários clientes de uma vez)", val
 if not modo_lote:
     cA, cB = st.columns([2, 1])
     with cA:
-        cliente = st.selectbox("Nome do Cliente", clientes_existentes)
+        cliente = st_searchbox(indice_clientes().buscar, label="Nome do Cliente", placeholder="Digite para buscar...",
+                               key="busca_cliente_um", default=(clientes_existentes[0] if clientes_existentes else None))
         novo_nome = st.text_input("Ou digite um novo nome de cliente")
         cliente = novo_nome if novo_nome else cliente
     with cB:
@@ -1004,7 +1062,7 @@ if not modo_lote:
     func_fallback = "JPaulo"
 
     sug_conta, sug_periodo, sug_func = sugestoes_do_cliente(
-        df_existente, cliente, conta_fallback, periodo_fallback, func_fallback
+        meta, cliente, conta_fallback, periodo_fallback, func_fallback
     )
 
     conta = st.selectbox(
@@ -1041,11 +1099,10 @@ if not modo_lote:
     periodo_opcao = st.selectbox("Período do Atendimento", ["Manhã", "Tarde", "Noite"],
                                  index=["Manhã", "Tarde", "Noite"].index(sug_periodo))
 
-    ultimo = df_existente[df_existente["Cliente"] == cliente]
-    ultimo = ultimo.sort_values("Data", ascending=False).iloc[0] if not ultimo.empty else None
+    ultimo = meta.ultimo(cliente)
     combo = ""
     if ultimo is not None:
-        ult_combo = ultimo.get("Combo", "")
+        ult_combo = ultimo["Combo"]
         combo = st.selectbox("Combo (último primeiro)", [""] + list(dict.fromkeys([ult_combo] + combos_existentes)))
 
     # ---- reseta travas de estado quando muda o "contexto"
@@ -1199,9 +1256,13 @@ if not modo_lote:
 
                     df_final = pd.concat([df_all, pd.DataFrame(novas)], ignore_index=True)
                     salvar_base(df_final)
+                    visao = VisaoDias(df_final)  # 1 montagem para card + resumos
+                    historico_anual().atualizar(visao, [cliente])  # só os clientes gravados
+                    metadados().acrescentar(pd.DataFrame(novas))
+                    indice_clientes().acrescentar([(cliente, data)])
                     st.session_state.combo_salvo = True
                     ok_tg = enviar_card(
-                        df_final, cliente, funcionario, data,
+                        visao, cliente, funcionario, data,
                         servico=combo.replace("+", " + "),
                         valor=sum(float(n["Valor"]) for n in novas),
                         combo=combo
@@ -1213,8 +1274,8 @@ if not modo_lote:
                     # dispara resumos recalculados
                     try:
                         for _f in ["JPaulo", "Vinicius"]:
-                            enviar_resumo_diario(df_final, data, _f)
-                        enviar_resumo_geral(df_final, data)
+                            enviar_resumo_diario(visao, data, _f)
+                        enviar_resumo_geral(visao, data)
                     except Exception:
                         pass
             except Exception as e:
@@ -1303,9 +1364,13 @@ if not modo_lote:
 
                     df_final = pd.concat([df_all, pd.DataFrame([nova])], ignore_index=True)
                     salvar_base(df_final)
+                    visao = VisaoDias(df_final)  # 1 montagem para card + resumos
+                    historico_anual().atualizar(visao, [cliente])  # só os clientes gravados
+                    metadados().acrescentar(pd.DataFrame([nova]))
+                    indice_clientes().acrescentar([(cliente, data)])
 
                     ok_tg = enviar_card(
-                        df_final, cliente, funcionario, data,
+                        visao, cliente, funcionario, data,
                         servico=servico_norm, valor=float(nova.get("Valor", 0.0)), combo=""
                     )
 
@@ -1317,8 +1382,8 @@ if not modo_lote:
                     # dispara resumos recalculados
                     try:
                         for _f in ["JPaulo", "Vinicius"]:
-                            enviar_resumo_diario(df_final, data, _f)
-                        enviar_resumo_geral(df_final, data)
+                            enviar_resumo_diario(visao, data, _f)
+                        enviar_resumo_geral(visao, data)
                     except Exception:
                         pass
 
@@ -1347,7 +1412,7 @@ else:
 
             st.subheader(f"⚙️ Atendimento para {cli}")
             sug_conta, sug_periodo, sug_func = sugestoes_do_cliente(
-                df_existente, cli, (contas_existentes[0] if contas_existentes else "Carteira"), "Manhã", "JPaulo"
+                meta, cli, (contas_existentes[0] if contas_existentes else "Carteira"), "Manhã", "JPaulo"
             )
 
             tipo_at = st.radio(f"Tipo de atendimento para {cli}", ["Simples", "Combo"], horizontal=True, key=f"tipo_{cli}")
@@ -1629,17 +1694,21 @@ else:
                 df_final = pd.concat([df_all, pd.DataFrame(novas)], ignore_index=True)
                 try:
                     salvar_base(df_final)
+                    visao = VisaoDias(df_final)  # 1 montagem para card + resumos
+                    historico_anual().atualizar(visao, clientes_salvos)  # só os clientes gravados
+                    metadados().acrescentar(pd.DataFrame(novas))
+                    indice_clientes().acrescentar((c, data) for c in clientes_salvos)
                     st.success(f"✅ {len(novas)} linhas inseridas para {len(clientes_salvos)} cliente(s).")
                     if enviar_cards:
                         for cli in sorted(clientes_salvos):
-                            enviar_card(df_final, cli, funcionario_por_cliente.get(cli, "JPaulo"), data)
+                            enviar_card(visao, cli, funcionario_por_cliente.get(cli, "JPaulo"), data)
 
                     # resumos recalculados (apenas funcionários envolvidos + geral)
                     try:
                         funcs_env = sorted(set(funcionario_por_cliente.values()))
                         for func in funcs_env:
-                            enviar_resumo_diario(df_final, data, func)
-                        enviar_resumo_geral(df_final, data)
+                            enviar_resumo_diario(visao, data, func)
+                        enviar_resumo_geral(visao, data)
                     except Exception:
                         pass
 
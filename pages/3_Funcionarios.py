@@ -2,8 +2,8 @@ import streamlit as st
 import pandas as pd
 import plotly.express as px
 import gspread
-from gspread_dataframe import get_as_dataframe
 from google.oauth2.service_account import Credentials
+from utils import base_dados, cubo, resumo_funcionario
 
 st.set_page_config(layout="wide")
 st.title("🧑‍🤝‍🧑 Comparativo entre Funcionários")
@@ -22,15 +22,12 @@ def conectar_sheets():
 
 @st.cache_data
 def carregar_dados():
-    planilha = conectar_sheets()
-    aba = planilha.worksheet(BASE_ABA)
-    df = get_as_dataframe(aba).dropna(how="all")
-
-    # padroniza colunas
-    df.columns = [str(col).strip() for col in df.columns]
+    # schema compacto (category / float64 / datetime64) — utils/base_dados.py
+    df = base_dados.carregar_base(conectar_sheets(), BASE_ABA)
 
     # datas
-    df["Data"] = pd.to_datetime(df.get("Data"), errors="coerce")
+    if "Data" not in df.columns:
+        df["Data"] = pd.NaT
     df = df.dropna(subset=["Data"])
     df["Ano"] = df["Data"].dt.year.astype(int)
     df["Mês"] = df["Data"].dt.month
@@ -41,7 +38,7 @@ def carregar_dados():
 
     # valor numérico
     if "Valor" in df.columns:
-        df["Valor"] = pd.to_numeric(df["Valor"], errors="coerce").fillna(0.0)
+        df["Valor"] = df["Valor"].fillna(0.0)
     else:
         df["Valor"] = 0.0
 
@@ -49,12 +46,8 @@ def carregar_dados():
     # tenta "Conta" primeiro; se não houver, tenta "Forma de Pagamento"
     conta_col = "Conta" if "Conta" in df.columns else ("Forma de Pagamento" if "Forma de Pagamento" in df.columns else None)
     if conta_col:
-        df["Conta_norm"] = (
-            df[conta_col]
-            .astype(str)
-            .str.strip()
-            .str.lower()
-            .replace({"nan": ""})
+        df["Conta_norm"] = pd.Categorical(
+            base_dados.mapear_categorias(df[conta_col], lambda s: s.strip().lower(), padrao="")
         )
     else:
         df["Conta_norm"] = ""
@@ -66,7 +59,22 @@ def carregar_dados():
 
     return df
 
+@st.cache_data
+def carregar_cubo():
+    """Cubo diário: receitas e atendimentos por funcionário saem dele, sem varrer a base."""
+    d = carregar_dados()
+    conta_col = "Conta" if "Conta" in d.columns else ("Forma de Pagamento" if "Forma de Pagamento" in d.columns else None)
+    return cubo.montar_cubo(d.assign(ValorNum=d["Valor"]), col_conta=conta_col)
+
+@st.cache_data
+def carregar_resumo():
+    """Resumo por funcionário (top clientes etc.), 1x por versão dos dados."""
+    return resumo_funcionario.montar(carregar_dados())
+
 df = carregar_dados()
+cubo_df = carregar_cubo()
+resumo = carregar_resumo()
+MESES_ABREV = ["Jan", "Fev", "Mar", "Abr", "Mai", "Jun", "Jul", "Ago", "Set", "Out", "Nov", "Dez"]
 
 # =============================
 # 🔎 Filtro por ano e FIADO
@@ -82,25 +90,22 @@ modo_pag = col_f1.radio(
     help="Aplica o filtro a todos os gráficos e tabelas desta página."
 )
 
-df_filtrado = df[df["Ano"] == ano].copy()
-
-# aplica FIADO
-# considera fiado quando Conta_norm == 'fiado'
-if modo_pag == "Apenas pagos":
-    df_filtrado = df_filtrado[df_filtrado["Conta_norm"] != "fiado"]
-elif modo_pag == "Apenas fiado":
-    df_filtrado = df_filtrado[df_filtrado["Conta_norm"] == "fiado"]
-# "Incluir tudo" não filtra
+# considera fiado quando Conta_norm == 'fiado' ("Incluir tudo" não filtra)
+fiado_filtro = {"Apenas pagos": False, "Apenas fiado": True}.get(modo_pag)
+tem_dados = not resumo_funcionario.filtrar(resumo["mensal"], ano=ano, fiado=fiado_filtro).empty
 
 # =============================
 # 📈 Receita Mensal por Funcionário
 # =============================
 st.subheader("📈 Receita Mensal por Funcionário")
-if not df_filtrado.empty:
+if tem_dados:
     receita_mensal = (
-        df_filtrado.groupby(["Funcionário", "Mês", "Mês_Nome"], as_index=False)["Valor"].sum()
+        cubo.rolar(cubo_df, por=["Funcionário", "Mês"], ano=ano, Fiado=fiado_filtro, medidas=["ValorNum"])
+        .rename(columns={"ValorNum": "Valor"})
+        .dropna(subset=["Funcionário"])
         .sort_values("Mês")
     )
+    receita_mensal["Mês_Nome"] = receita_mensal["Mês"].map(lambda m: MESES_ABREV[int(m) - 1])
     fig = px.bar(
         receita_mensal,
         x="Mês_Nome",
@@ -108,7 +113,7 @@ if not df_filtrado.empty:
         color="Funcionário",
         barmode="group",
         text_auto=True,
-        category_orders={"Mês_Nome": ["Jan", "Fev", "Mar", "Abr", "Mai", "Jun", "Jul", "Ago", "Set", "Out", "Nov", "Dez"]}
+        category_orders={"Mês_Nome": MESES_ABREV}
     )
     st.plotly_chart(fig, use_container_width=True)
 else:
@@ -119,25 +124,14 @@ else:
 # =============================
 st.subheader("📋 Total de Atendimentos por Funcionário")
 
-df_pre = df_filtrado[df_filtrado["Data"] < pd.Timestamp("2025-05-11")].copy()
-df_pre["Qtd_Serviços"] = 1
-
-df_pos = df_filtrado[df_filtrado["Data"] >= pd.Timestamp("2025-05-11")].copy()
-df_pos = df_pos.groupby(["Cliente", "Data", "Funcionário"]).agg(Qtd_Serviços=("Serviço", "count")).reset_index()
-
-df_atendimentos = pd.concat([
-    df_pre[["Cliente", "Data", "Funcionário", "Qtd_Serviços"]],
-    df_pos[["Cliente", "Data", "Funcionário", "Qtd_Serviços"]]
-], ignore_index=True)
-
-df_atendimentos["Combo"] = (df_atendimentos["Qtd_Serviços"] > 1).astype(int)
-df_atendimentos["Simples"] = (df_atendimentos["Qtd_Serviços"] == 1).astype(int)
-
-combo_simples = df_atendimentos.groupby("Funcionário", as_index=False).agg(
-    Total_Atendimentos=("Data", "count"),
-    Qtd_Combo=("Combo", "sum"),
-    Qtd_Simples=("Simples", "sum")
+# cubo: Visitas = linhas até 10/05/2025 e (Cliente, Data, Funcionário) únicos depois
+combo_simples = (
+    cubo.rolar(cubo_df, por=["Funcionário"], ano=ano, Fiado=fiado_filtro, medidas=["Visitas", "VisitasCombo"])
+    .rename(columns={"Visitas": "Total_Atendimentos", "VisitasCombo": "Qtd_Combo"})
 )
+combo_simples = (combo_simples[combo_simples["Total_Atendimentos"] > 0]
+                 .dropna(subset=["Funcionário"]).astype({"Funcionário": str}))
+combo_simples["Qtd_Simples"] = combo_simples["Total_Atendimentos"] - combo_simples["Qtd_Combo"]
 
 col1, col2 = st.columns(2)
 for _, row in combo_simples.iterrows():
@@ -156,7 +150,11 @@ st.dataframe(combo_simples, use_container_width=True)
 # 💰 Receita Total no Ano
 # =============================
 st.subheader("💰 Receita Total no Ano por Funcionário")
-receita_total = df_filtrado.groupby("Funcionário", as_index=False)["Valor"].sum()
+receita_total = (
+    cubo.rolar(cubo_df, por=["Funcionário"], ano=ano, Fiado=fiado_filtro, medidas=["ValorNum"])
+    .rename(columns={"ValorNum": "Valor"})
+    .dropna(subset=["Funcionário"]).astype({"Funcionário": str})
+)
 receita_total["Valor Formatado"] = receita_total["Valor"].apply(
     lambda x: f"R$ {x:,.2f}".replace(",", "v").replace(".", ",").replace("v", ".")
 )
@@ -177,12 +175,7 @@ if "JPaulo" in valores and "Vinicius" in valores:
 # =============================
 st.subheader("🏅 Top 10 Clientes por Receita (por Funcionário)")
 nomes_ignorar = ["boliviano", "brasileiro", "menino", "menino boliviano"]
-df_rank = df_filtrado[~df_filtrado["Cliente"].astype(str).str.lower().str.strip().isin(nomes_ignorar)]
-
-clientes_por_func = (
-    df_rank.groupby(["Funcionário", "Cliente"], as_index=False)["Valor"].sum()
-    .sort_values(["Funcionário", "Valor"], ascending=[True, False])
-)
+clientes_por_func = resumo_funcionario.top_clientes(resumo, ano, fiado=fiado_filtro, n=10, ignorar=nomes_ignorar)
 
 col1, col2 = st.columns(2)
 for func, col in zip(["JPaulo", "Vinicius"], [col1, col2]):
@@ -198,10 +191,9 @@ for func, col in zip(["JPaulo", "Vinicius"], [col1, col2]):
 # =============================
 st.subheader("📆 Receita Total por Funcionário em Cada Ano")
 receita_ano_func = (
-    df.groupby(["Ano", "Funcionário"])["Valor"]
-    .sum()
-    .reset_index()
-    .pivot(index="Ano", columns="Funcionário", values="Valor")
+    cubo.rolar(cubo_df, por=["Ano", "Funcionário"], medidas=["ValorNum"])
+    .dropna(subset=["Funcionário"]).astype({"Funcionário": str})
+    .pivot(index="Ano", columns="Funcionário", values="ValorNum")
     .fillna(0)
     .sort_index(ascending=False)
 )
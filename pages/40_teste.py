@@ -1,13 +1,16 @@
 # pages/01_estoque_gel_pomada.py
 # -*- coding: utf-8 -*-
 import unicodedata as _ud
+import threading
 from datetime import datetime, date
 
 import streamlit as st
+import numpy as np
 import pandas as pd
 import gspread
 from google.oauth2.service_account import Credentials
 from gspread_dataframe import get_as_dataframe, set_with_dataframe
+from utils import escrita
 
 st.set_page_config(page_title="Estoque — Gel, Pomada & Pó", page_icon="🧴", layout="wide")
 st.title("🧴 Estoque — Gel, Pomada & Pomada em pó")
@@ -101,30 +104,73 @@ def carregar_df_estoque() -> pd.DataFrame:
     return df[COLS_ESTOQUE].copy()
 
 def salvar_mov_estoque(linha: dict):
+    """Append de 1 linha no fim da aba (não relê nem reescreve o histórico) + saldo em memória."""
     sh = _open_sheet()
     ws = _ensure_worksheet(sh, ABA_ESTOQUE, COLS_ESTOQUE)
-    df = carregar_df_estoque()
-    df = pd.concat([df, pd.DataFrame([linha])], ignore_index=True)
-    set_with_dataframe(ws, df, include_index=False, include_column_header=True)
-    st.cache_data.clear()
-
-def saldo_atual(df: pd.DataFrame) -> pd.DataFrame:
-    df_calc = df.copy()
-    def efeito(row):
-        if row["TipoMov"] == "Entrada": return row["Qtd"]
-        if row["TipoMov"] == "Saída":   return -abs(row["Qtd"])
-        return row["Qtd"]  # Ajuste pode ser +/-
-    if not df_calc.empty:
-        df_calc["Efeito"] = df_calc.apply(efeito, axis=1)
-        sld = df_calc.groupby(["Produto","Unidade"], as_index=False)["Efeito"].sum()
-        sld = sld.rename(columns={"Efeito":"Saldo"})
-    else:
-        sld = pd.DataFrame(columns=["Produto","Unidade","Saldo"])
-    for p in PRODUTOS:
-        if sld.empty or not (sld["Produto"] == p).any():
-            sld = pd.concat([sld, pd.DataFrame([{"Produto":p,"Unidade":UNIDADES[p],"Saldo":0}])], ignore_index=True)
-    sld["Saldo"] = sld["Saldo"].fillna(0).round(2)
-    return sld.sort_values("Produto")
+    escrita.acrescentar(ws, [linha], cabecalho_padrao=COLS_ESTOQUE)
+    saldo_estoque().aplicar(linha)
+    carregar_df_estoque.clear()
+
+# ---------- saldo ----------
+def efeitos(df: pd.DataFrame) -> np.ndarray:
+    """Entrada soma, Saída subtrai |Qtd|, Ajuste entra com o sinal digitado."""
+    qtd = pd.to_numeric(df["Qtd"], errors="coerce").fillna(0.0).to_numpy(dtype=float)
+    tipo = df["TipoMov"].to_numpy()
+    return np.where(tipo == "Saída", -np.abs(qtd), qtd)
+
+def saldo_recalculado(df: pd.DataFrame) -> dict:
+    """Reconstrução completa (auditoria): {(Produto, Unidade): saldo} a partir de TODOS os movimentos."""
+    if df.empty:
+        return {}
+    s = pd.Series(efeitos(df)).groupby([df["Produto"].to_numpy(), df["Unidade"].to_numpy()]).sum()
+    return {k: float(v) for k, v in s.items()}
+
+class SaldoEstoque:
+    """Saldo corrente por (Produto, Unidade): montado 1x do histórico, cada movimento novo soma em O(1)."""
+    def __init__(self, df: pd.DataFrame):
+        self._lock = threading.Lock()
+        self._saldo = saldo_recalculado(df)
+
+    def aplicar(self, linha: dict):
+        ef = efeitos(pd.DataFrame([linha]))[0]
+        chave = (linha["Produto"], linha["Unidade"])
+        with self._lock:
+            self._saldo[chave] = self._saldo.get(chave, 0.0) + float(ef)
+
+    def saldo(self, produto: str, unidade: str | None = None) -> float:
+        with self._lock:
+            return round(self._saldo.get((produto, unidade or UNIDADES.get(produto, "un")), 0.0), 2)
+
+    def tabela(self) -> pd.DataFrame:
+        """Produto, Unidade, Saldo — produtos controlados sem movimento aparecem com 0."""
+        with self._lock:
+            itens = dict(self._saldo)
+        for p in PRODUTOS:
+            if not any(k[0] == p for k in itens):
+                itens[(p, UNIDADES[p])] = 0.0
+        sld = pd.DataFrame([(p, u, s) for (p, u), s in itens.items()], columns=["Produto", "Unidade", "Saldo"])
+        sld["Saldo"] = sld["Saldo"].fillna(0).round(2)
+        return sld.sort_values(["Produto", "Unidade"]).reset_index(drop=True)
+
+    def divergencias(self, df: pd.DataFrame) -> pd.DataFrame:
+        """Compara o saldo em memória com a reconstrução completa de df."""
+        full = saldo_recalculado(df)
+        with self._lock:
+            atual = dict(self._saldo)
+        linhas = [(p, u, round(atual.get((p, u), 0.0), 2), round(full.get((p, u), 0.0), 2))
+                  for (p, u) in sorted(set(atual) | set(full))]
+        out = pd.DataFrame(linhas, columns=["Produto", "Unidade", "Em memória", "Recalculado"])
+        return out[out["Em memória"] != out["Recalculado"]]
+
+@st.cache_resource(ttl=300, show_spinner=False)
+def saldo_estoque() -> SaldoEstoque:
+    return SaldoEstoque(carregar_df_estoque())
+
+def saldo_atual(df: pd.DataFrame | None = None) -> pd.DataFrame:
+    """Tabela de saldo: df=None usa o saldo corrente em cache; com df, recalcula tudo (auditoria)."""
+    if df is None:
+        return saldo_estoque().tabela()
+    return SaldoEstoque(df).tabela()
 
 # =============================================================================
 # DESPESAS — salva respeitando SOMENTE colunas existentes (usa apenas “Me Pag”)
@@ -181,10 +227,8 @@ def registrar_mov(tipo: str, produto: str, qtd: float, obs: str,
         st.error("Quantidade deve ser maior que zero.")
         return
 
-    df = carregar_df_estoque()
-    sld = saldo_atual(df)
     unid = UNIDADES.get(produto, "un")
-    saldo_prod = float(sld.loc[sld["Produto"] == produto, "Saldo"].iloc[0]) if not sld.empty else 0.0
+    saldo_prod = saldo_estoque().saldo(produto, unid)
     if tipo == "Saída" and qtd > saldo_prod:
         st.error(f"Saldo insuficiente de **{produto}**. Saldo atual: {saldo_prod:g} {unid}.")
         return
@@ -281,13 +325,12 @@ with tab_reg:
 
 with tab_saldo:
     st.subheader("Saldo por produto")
-    df_e = carregar_df_estoque()
-    sld = saldo_atual(df_e)
+    sld = saldo_atual()
     st.dataframe(sld, hide_index=True, use_container_width=True)
     cols = st.columns(3)
     for i, p in enumerate(PRODUTOS):
-        saldo_p = float(sld.loc[sld["Produto"] == p, "Saldo"].iloc[0])
         unid = UNIDADES[p]
+        saldo_p = saldo_estoque().saldo(p, unid)
         with cols[i % 3]:
             st.metric(p, f"{saldo_p:g} {unid}")
 
@@ -323,4 +366,15 @@ with tab_diag:
     except Exception as e:
         st.error(f"Falha ao abrir planilha: {e}")
 
+    st.markdown("#### Conferir saldo")
+    if st.button("Recalcular saldo do zero"):
+        carregar_df_estoque.clear()
+        div = saldo_estoque().divergencias(carregar_df_estoque())
+        if div.empty:
+            st.success("Saldo em memória confere com todos os movimentos da aba.")
+        else:
+            st.warning("Saldo em memória diverge da aba (edição manual?). Saldo recarregado.")
+            st.dataframe(div, hide_index=True, use_container_width=True)
+            saldo_estoque.clear()
+
 st.caption("Use **Entrada** para compras/estoque (gera despesa), **Saída** para venda/uso, e **Ajuste** para correções.")
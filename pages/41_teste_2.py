@@ -3,6 +3,9 @@ import streamlit as st
 import pandas as pd
 import plotly.express as px
 import unicodedata
+import gspread
+from google.oauth2.service_account import Credentials
+from utils import fake_sheets, base_dados, visitas
 
 st.set_page_config(page_title="Atendimentos por Período", page_icon="⏱️", layout="wide")
 st.title("⏱️ Atendimentos por DIA (com Período da planilha)")
@@ -10,53 +13,35 @@ st.title("⏱️ Atendimentos por DIA (com Período da planilha)")
 # =========================
 # Helpers
 # =========================
-CATS = pd.CategoricalDtype(categories=["Manhã", "Tarde", "Noite"], ordered=True)
-
 def _norm_txt(s: str) -> str:
     if pd.isna(s):
         return ""
     s = unicodedata.normalize("NFKD", str(s)).encode("ASCII", "ignore").decode("ASCII")
     return s.strip().lower()
 
-def _norm_periodo(x):
-    """Normaliza qualquer variação (com/sem acento, maiúsculas, espaços) para Manhã/Tarde/Noite."""
-    if pd.isna(x):
-        return pd.NA
-    s = unicodedata.normalize("NFKD", str(x)).encode("ASCII", "ignore").decode("ASCII")
-    s = s.strip().lower()
-    # aceita 'manha', 'manhã', 'man', 'manha ', etc.
-    if s.startswith("man"):
-        return "Manhã"
-    if s.startswith("tar"):
-        return "Tarde"
-    if s.startswith("noi"):
-        return "Noite"
-    return pd.NA
-
-def _periodo_moda(serie):
-    """Seleciona o Período da moda; em empate usa prioridade Manhã > Tarde > Noite."""
-    s = serie.dropna().astype("string")
-    if s.empty:
-        return pd.NA
-    modos = s.mode()
-    if len(modos) == 1:
-        return modos.iloc[0]
-    cand = pd.Series(modos).astype("category").cat.set_categories(CATS.categories, ordered=True)
-    return cand.sort_values().iloc[0]
-
 # =========================
 # 1) Carregar & preparar
 # =========================
-@st.cache_data
+SHEET_ID = "1qtOF1I7Ap4By2388ySThoVlZHbI3rAJv_haEcil0IUE"
+
+@st.cache_resource
+def conectar_sheets():
+    if fake_sheets.backend_fake_ativo():
+        return fake_sheets.cliente_fake().open_by_key(SHEET_ID)
+    info = st.secrets["GCP_SERVICE_ACCOUNT"]
+    escopo = ["https://spreadsheets.google.com/feeds", "https://www.googleapis.com/auth/drive"]
+    credenciais = Credentials.from_service_account_info(info, scopes=escopo)
+    return gspread.authorize(credenciais).open_by_key(SHEET_ID)
+
+def _auxiliares(df: pd.DataFrame) -> pd.DataFrame:
+    df["Data_dt"] = df["Data"]
+    df["Cliente_norm"] = base_dados.mapear_categorias(df["Cliente"], _norm_txt, padrao="")
+    return df
+
+@st.cache_data(ttl=300)
 def carregar_dados_google_sheets():
-    url = ("https://docs.google.com/spreadsheets/d/"
-           "1qtOF1I7Ap4By2388ySThoVlZHbI3rAJv_haEcil0IUE/gviz/tq?"
-           "tqx=out:csv&sheet=Base%20de%20Dados")
-    df = pd.read_csv(url)
-
-    # Datas (br)
-    if "Data" in df.columns:
-        df["Data"] = pd.to_datetime(df["Data"], errors="coerce", dayfirst=True)
+    # Datas (br) já saem em datetime do schema da base
+    df = base_dados.carregar_base(conectar_sheets())
     df = df.dropna(subset=["Data"]).copy()
 
     # Colunas necessárias
@@ -64,14 +49,15 @@ def carregar_dados_google_sheets():
         if c not in df.columns:
             df[c] = pd.NA
 
-    # Normaliza Período (agora robusto)
-    df["Período"] = df["Período"].apply(_norm_periodo)
+    # Normaliza Período (robusto: com/sem acento, caixa, abreviado)
+    df["Período"] = visitas.normalizar_periodo(df["Período"])
 
-    # Auxiliares
-    df["Data_dt"] = pd.to_datetime(df["Data"], errors="coerce")
-    df["Cliente_norm"] = df["Cliente"].map(_norm_txt)
+    return _auxiliares(df)
 
-    return df
+@st.cache_data(ttl=300)
+def carregar_visitas():
+    """VISITAS: 1 por Cliente+Data com Período = moda (empate: Manhã>Tarde>Noite) — 1x por versão da base."""
+    return _auxiliares(visitas.montar(carregar_dados_google_sheets()))
 
 df_raw = carregar_dados_google_sheets()
 st.caption(f"Registros carregados: {len(df_raw)}")
@@ -82,7 +68,7 @@ st.caption(f"Registros carregados: {len(df_raw)}")
 st.markdown("### 🎛️ Filtros")
 
 col_f1, col_f2, col_f3 = st.columns([1, 1, 1.2])
-funcionarios = sorted([x for x in df_raw["Funcionário"].dropna().unique().tolist()])
+funcionarios = sorted([str(x) for x in df_raw["Funcionário"].dropna().unique().tolist()])
 periodos_opts = ["Manhã", "Tarde", "Noite"]
 
 with col_f1:
@@ -96,7 +82,7 @@ min_d, max_d = df_raw["Data_dt"].min().date(), df_raw["Data_dt"].max().date()
 de, ate = st.date_input("Intervalo de datas", value=(min_d, max_d), min_value=min_d, max_value=max_d)
 
 col_c1, col_c2 = st.columns([1.2, 1])
-clientes_base = sorted([x for x in df_raw["Cliente"].dropna().unique().tolist()])
+clientes_base = sorted([str(x) for x in df_raw["Cliente"].dropna().unique().tolist()])
 with col_c1:
     sel_clientes = st.multiselect("Cliente(s) (da base)", ["(Todos)"] + clientes_base, default=["(Todos)"])
 with col_c2:
@@ -109,50 +95,35 @@ count_visita = st.toggle("Contar **Visitas únicas (Cliente+Data)** (desmarque p
 st.caption(f"Linhas SEM Período reconhecido (após normalização): {(df_raw['Período'].isna()).sum()}")
 
 # =========================
-# 3) Aplicar filtros
+# 3) Base de trabalho (VISITAS ou LINHAS) + filtros
 # =========================
-df_f = df_raw.copy()
+# VISITAS: tabela pronta (1 por Cliente+Data); LINHAS: cada linha/serviço (Período da própria linha)
+# Os filtros valem para a unidade contada (no modo visitas: Funcionário/Período da visita)
+base = carregar_visitas() if count_visita else df_raw
 
 # Datas
-df_f = df_f[(df_f["Data_dt"].dt.date >= de) & (df_f["Data_dt"].dt.date <= ate)]
+base = base[(base["Data_dt"] >= pd.Timestamp(de)) & (base["Data_dt"] <= pd.Timestamp(ate))]
 
 # Funcionário
 if sel_funcs:
-    df_f = df_f[df_f["Funcionário"].isin(sel_funcs)]
+    base = base[base["Funcionário"].isin(sel_funcs)]
 
 # Período (filtro ESTRITO: só os selecionados)
 if sel_periodos:
-    df_f = df_f[df_f["Período"].isin(sel_periodos)]
+    base = base[base["Período"].isin(sel_periodos)]
 
 # Clientes (lista ou busca)
 if sel_clientes and "(Todos)" not in sel_clientes:
-    df_f = df_f[df_f["Cliente"].isin(sel_clientes)]
+    base = base[base["Cliente"].isin(sel_clientes)]
 elif q:
     qn = _norm_txt(q)
-    df_f = df_f[df_f["Cliente_norm"].str.contains(qn, na=False)]
+    base = base[base["Cliente_norm"].str.contains(qn, na=False, regex=False)]
 
-# =========================
-# 4) Base de trabalho (VISITAS ou LINHAS)
-# =========================
-if count_visita:
-    # VISITAS: 1 por Cliente+Data com Período = moda (empate: Manhã>Tarde>Noite)
-    base = (
-        df_f.groupby(["Cliente", "Data"], as_index=False)
-            .agg({
-                "Funcionário": "first",
-                "Tipo": lambda x: ", ".join(sorted({str(v) for v in x if pd.notna(v)})),
-                "Combo": lambda x: ", ".join(sorted({str(v) for v in x if pd.notna(v)})),
-                "Período": _periodo_moda
-            })
-    )
-    base["Data_dt"] = pd.to_datetime(base["Data"], errors="coerce")
-else:
-    # LINHAS: usa cada linha/serviço (Período da própria linha)
-    base = df_f.copy()
-    base["Data_dt"] = base["Data_dt"]
+base = base.copy()
+base["Cliente"] = base["Cliente"].astype(str)
 
 # Tira registros que ainda ficaram sem período (não deveriam, mas por segurança)
-base["Período"] = base["Período"].where(base["Período"].isin(["Manhã", "Tarde", "Noite"]), pd.NA)
+base["Período"] = base["Período"].astype(object).where(base["Período"].isin(["Manhã", "Tarde", "Noite"]), pd.NA)
 
 # Dia da semana
 WEEKMAP = {0: "Segunda", 1: "Terça", 2: "Quarta", 3: "Quinta", 4: "Sexta", 5: "Sábado", 6: "Domingo"}
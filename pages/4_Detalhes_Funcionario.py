@@ -5,6 +5,7 @@ from io import BytesIO
 import gspread
 from gspread_dataframe import get_as_dataframe
 from google.oauth2.service_account import Credentials
+from utils import base_dados, resumo_funcionario
 
 st.set_page_config(layout="wide")
 st.title("🧑‍💼 Detalhes do Funcionário")
@@ -32,6 +33,7 @@ def carregar_dados():
     df["Data"] = pd.to_datetime(df["Data"], errors="coerce")
     df = df.dropna(subset=["Data"])
     df["Ano"] = df["Data"].dt.year.astype(int)
+    df["Visita"] = base_dados.chave_visita(df)  # linha antes de 11/05/2025, (Cliente, dia) depois
 
     # numéricos
     if "Valor" in df.columns:
@@ -78,8 +80,13 @@ def carregar_despesas():
 
     return df_desp
 
+@st.cache_data
+def carregar_resumo():
+    """Resumo por funcionário + comissão paga (Despesas), 1x por versão dos dados."""
+    return resumo_funcionario.montar(carregar_dados(), carregar_despesas())
+
 df = carregar_dados()
-df_despesas = carregar_despesas()
+resumo = carregar_resumo()
 
 # === Lista de funcionários / Ano ===
 funcionarios = sorted(df["Funcionário"].dropna().unique().tolist())
@@ -96,6 +103,7 @@ modo_pag = col_top[0].radio(
     help="Considera a coluna Conta/Forma de Pagamento normalizada."
 )
 
+fiado_filtro = {"Apenas pagos": False, "Apenas fiado": True}.get(modo_pag)
 df_base_ano = df[df["Ano"] == ano_escolhido].copy()
 if modo_pag == "Apenas pagos":
     df_base_ano = df_base_ano[df_base_ano["Conta_norm"] != "fiado"]
@@ -135,6 +143,12 @@ tipo_selecionado = st.multiselect("Filtrar por tipo de serviço", tipos_servico)
 if tipo_selecionado:
     df_func = df_func[df_func["Serviço"].isin(tipo_selecionado)]
 
+# resumo pronto serve enquanto só ano/pagamento/mês estão filtrados; dia/semana/serviço
+# recortam linhas → resumo montado só do recorte do funcionário
+sub_filtros = dia_filtro != "Todos" or semana_filtro != "Todas" or bool(tipo_selecionado)
+res_func = resumo_funcionario.montar(df_func) if sub_filtros else resumo
+meses_sel = None if mes_filtro == "Todos" else [mes_filtro]
+
 # === INSIGHTS ===
 st.subheader("📌 Insights do Funcionário")
 col1, col2, col3, col4 = st.columns(4)
@@ -182,7 +196,7 @@ st.plotly_chart(fig_dia_mes, use_container_width=True, key="graf_media_dia")
 
 # Ticket médio comparativo entre funcionários (mesmo ano e filtro de pagamento)
 st.markdown("### ⚖️ Comparativo com a média dos outros funcionários")
-media_geral = df_base_ano.groupby("Funcionário")["Valor"].mean().reset_index(name="Ticket Médio")
+media_geral = resumo_funcionario.ticket_por_funcionario(resumo, ano_escolhido, fiado_filtro)
 media_geral["Ticket Médio Formatado"] = media_geral["Ticket Médio"].apply(lambda x: f"R$ {x:,.2f}".replace(",", "v").replace(".", ",").replace("v", "."))
 media_ordenada = media_geral.sort_values("Ticket Médio", ascending=False)
 st.dataframe(media_ordenada[["Funcionário", "Ticket Médio Formatado"]], use_container_width=True)
@@ -197,41 +211,21 @@ meses_pt = {
     1: "Janeiro", 2: "Fevereiro", 3: "Março", 4: "Abril", 5: "Maio", 6: "Junho",
     7: "Julho", 8: "Agosto", 9: "Setembro", 10: "Outubro", 11: "Novembro", 12: "Dezembro"
 }
-df_func["MesNum"] = df_func["Data"].dt.month
-df_func["MesNome"] = df_func["MesNum"].map(meses_pt) + df_func["Data"].dt.strftime(" %Y")
-receita_jp = df_func.groupby(["MesNum", "MesNome"])["Valor"].sum().reset_index(name="JPaulo")
-receita_jp = receita_jp.sort_values("MesNum")
+receita_jp = (resumo_funcionario.receita_mensal(res_func, ano_escolhido, fiado_filtro, funcionario_escolhido, meses_sel)
+              .rename(columns={"Mês": "MesNum", "Valor": "JPaulo"}))
+receita_jp["MesNome"] = receita_jp["MesNum"].map(meses_pt) + f" {ano_escolhido}"
 
 # === Comissão real do Vinicius (despesa, não depende do filtro de pagamento, mas filtra por ano) ===
-df_com_vinicius = df_despesas[
-    (df_despesas["Prestador"] == "Vinicius") &
-    (df_despesas["Descrição"].str.contains("comissão", case=False, na=False)) &
-    (df_despesas["Ano"] == ano_escolhido)
-].copy()
-
-# 🔧 Normaliza sinal: garante valor positivo para a despesa de comissão
-df_com_vinicius["Valor"] = df_com_vinicius["Valor"].abs()
-
-df_com_vinicius["MesNum"] = df_com_vinicius["Data"].dt.month
-df_com_vinicius = df_com_vinicius.groupby("MesNum")["Valor"].sum().reset_index(name="ComissaoRealVinicius")
+comissao_ano = float(resumo_funcionario.filtrar(resumo["comissao"], ano=ano_escolhido)["Comissao"].sum())
 
 # === Quando o funcionário selecionado é JPaulo, mostramos o comparativo com a Receita Real do Salão ===
 if funcionario_escolhido.lower() == "jpaulo":
-    # Receita bruta do Vinicius (respeita o filtro de pagamento aplicado em df_base_ano)
-    receita_mes_vinicius = df_base_ano[
-        (df_base_ano["Funcionário"] == "Vinicius") & (df_base_ano["Ano"] == ano_escolhido)
-    ].copy()
-    receita_mes_vinicius["MesNum"] = receita_mes_vinicius["Data"].dt.month
-    receita_mes_vinicius = receita_mes_vinicius.groupby("MesNum")["Valor"].sum().reset_index(name="ReceitaVinicius")
-
-    # Junta tudo
-    receita_merged = receita_jp.merge(df_com_vinicius, on="MesNum", how="left").merge(
-        receita_mes_vinicius, on="MesNum", how="left"
-    ).fillna(0)
-
-    # Receita líquida do Vinicius e Receita Real do Salão
-    receita_merged["LiquidoVinicius"] = (receita_merged["ReceitaVinicius"] - receita_merged["ComissaoRealVinicius"]).clip(lower=0)
-    receita_merged["ReceitaRealSalao"] = receita_merged["JPaulo"] + receita_merged["LiquidoVinicius"]
+    # Receita bruta do Vinicius respeita o filtro de pagamento; comissão vem das Despesas
+    receita_merged = resumo_funcionario.receita_real_salao(
+        resumo, ano_escolhido, fiado_filtro,
+        receita_dono=receita_jp.rename(columns={"MesNum": "Mês", "JPaulo": "Valor"}),
+    ).rename(columns={"Mês": "MesNum"})
+    receita_merged["MesNome"] = receita_merged["MesNum"].map(meses_pt) + f" {ano_escolhido}"
 
     # Gráfico (JPaulo x Receita Real do Salão)
     receita_melt = receita_merged.melt(
@@ -269,14 +263,8 @@ else:
 
 # === Receita Bruta vs Comissão (resumos) ===
 if funcionario_escolhido.lower() == "vinicius":
-    bruto = float(df_func["Valor"].sum())
-    comissao_real = float(
-        df_despesas[
-            (df_despesas["Prestador"] == "Vinicius") &
-            (df_despesas["Descrição"].str.contains("comissão", case=False, na=False)) &
-            (df_despesas["Ano"] == ano_escolhido)
-        ]["Valor"].abs().sum()  # abs para não somar negativo
-    )
+    bruto = float(receita_jp["JPaulo"].sum())
+    comissao_real = comissao_ano
     receita_liquida = comissao_real
     receita_salao = bruto - comissao_real
 
@@ -293,17 +281,11 @@ if funcionario_escolhido.lower() == "vinicius":
     st.dataframe(comparativo_vinicius[["Tipo de Receita", "Valor Formatado"]], use_container_width=True)
 
 elif funcionario_escolhido.lower() == "jpaulo":
-    receita_jpaulo = float(df_func["Valor"].sum())
+    receita_jpaulo = float(receita_jp["JPaulo"].sum())
     receita_vinicius_total = float(
-        df_base_ano[(df_base_ano["Funcionário"] == "Vinicius") & (df_base_ano["Ano"] == ano_escolhido)]["Valor"].sum()
-    )
-    comissao_paga = float(
-        df_despesas[
-            (df_despesas["Prestador"] == "Vinicius") &
-            (df_despesas["Descrição"].str.contains("comissão", case=False, na=False)) &
-            (df_despesas["Ano"] == ano_escolhido)
-        ]["Valor"].abs().sum()
+        resumo_funcionario.receita_mensal(resumo, ano_escolhido, fiado_filtro, "Vinicius")["Valor"].sum()
     )
+    comissao_paga = comissao_ano
     receita_liquida_vinicius = max(0.0, receita_vinicius_total - comissao_paga)
     receita_total_salao = receita_jpaulo + receita_liquida_vinicius
 
@@ -322,19 +304,9 @@ elif funcionario_escolhido.lower() == "jpaulo":
 
 # === Ticket Médio por Mês (com a lógica 11/05) ===
 st.subheader("📉 Ticket Médio por Mês")
-data_referencia = pd.to_datetime("2025-05-11")
-df_func["Grupo"] = df_func["Data"].dt.strftime("%Y-%m-%d") + "_" + df_func["Cliente"]
-
-antes_ticket = df_func[df_func["Data"] < data_referencia].copy()
-antes_ticket["AnoMes"] = antes_ticket["Data"].dt.to_period("M").astype(str)
-antes_ticket = antes_ticket.groupby("AnoMes")["Valor"].mean().reset_index(name="Ticket Médio")
-
-depois_ticket = df_func[df_func["Data"] >= data_referencia].copy()
-depois_ticket = depois_ticket.groupby(["Grupo", "Data"])["Valor"].sum().reset_index()
-depois_ticket["AnoMes"] = depois_ticket["Data"].dt.to_period("M").astype(str)
-depois_ticket = depois_ticket.groupby("AnoMes")["Valor"].mean().reset_index(name="Ticket Médio")
-
-ticket_mensal = pd.concat([antes_ticket, depois_ticket]).groupby("AnoMes")["Ticket Médio"].mean().reset_index()
+# valor por atendimento (chave Visita) → média por mês
+ticket_mensal = resumo_funcionario.ticket_por_visita(res_func, ano_escolhido, fiado_filtro,
+                                                     funcionario_escolhido, meses_sel)
 ticket_mensal["Ticket Médio Formatado"] = ticket_mensal["Ticket Médio"].apply(lambda x: f"R$ {x:,.2f}".replace(",", "v").replace(".", ",").replace("v", "."))
 st.dataframe(ticket_mensal, use_container_width=True)
 
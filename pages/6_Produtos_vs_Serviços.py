@@ -1,6 +1,7 @@
 import streamlit as st
 import pandas as pd
 import plotly.express as px
+from utils import categorias_despesa
 
 st.set_page_config(layout="wide")
 st.title("🧴 Produtos - Análise Financeira")
@@ -33,10 +34,16 @@ mes_selecionado = st.selectbox("🗖️ Filtrar por Mês (opcional)", options=["
 
 # === IDENTIFICAR PRODUTOS POR PALAVRAS-CHAVE ===
 palavras_chave = ["pomada", "gel", "cera", "pó", "barbeador", "produto"]
-df_produtos = df_base[
-    (df_base["Ano"] == ano_selecionado) &
-    (df_base["Serviço"].str.lower().str.contains('|'.join(palavras_chave), na=False))
-].copy()
+
+@st.cache_resource(show_spinner=False)
+def classificador_produto():
+    """Mesma regex para Serviço (base) e Descrição (despesas); 1x por texto distinto."""
+    return categorias_despesa.Classificador({"|".join(palavras_chave): "Produto"}, padrao="")
+
+def eh_produto(textos: pd.Series) -> pd.Series:
+    return classificador_produto().classificar(textos) == "Produto"
+
+df_produtos = df_base[(df_base["Ano"] == ano_selecionado) & eh_produto(df_base["Serviço"])].copy()
 df_produtos["Mês"] = df_produtos["Data"].dt.month
 
 if mes_selecionado != "Todos":
@@ -63,7 +70,7 @@ df_despesas_prod["Valor"] = df_despesas_prod["Valor"].apply(converter_para_float
 receita_total = df_produtos["Valor"].sum()
 
 # Filtrar despesas relacionadas a produtos
-df_despesas_prod = df_despesas_prod[df_despesas_prod["Descrição"].str.lower().str.contains('|'.join(palavras_chave), na=False)].copy()
+df_despesas_prod = df_despesas_prod[eh_produto(df_despesas_prod["Descrição"])].copy()
 custo_total = df_despesas_prod["Valor"].sum()
 
 lucro_bruto = receita_total - custo_total
@@ -5,6 +5,7 @@ from unidecode import unidecode
 import gspread
 from gspread_dataframe import get_as_dataframe
 from google.oauth2.service_account import Credentials
+from utils import ranking
 
 st.set_page_config(layout="wide")
 st.title("🏆 Top 20 Clientes")
@@ -34,13 +35,11 @@ def carregar_dados():
     df["Mês_Nome"] = df["Data"].dt.strftime('%b')
     return df
 
+FUNCIONARIOS = ["JPaulo", "Vinicius"]
+
 # === Filtros iniciais
 ano = st.selectbox("📅 Filtrar por ano", options=[2023, 2024, 2025], index=2)
-funcionarios = st.multiselect("👥 Filtrar por funcionário", ["JPaulo", "Vinicius"], default=["JPaulo", "Vinicius"])
-
-df = carregar_dados()
-df = df[df["Ano"] == ano]
-df = df[df["Funcionário"].isin(funcionarios)]
+funcionarios = st.multiselect("👥 Filtrar por funcionário", FUNCIONARIOS, default=FUNCIONARIOS)
 
 # === Remove nomes genéricos para ranking
 nomes_excluir = ["boliviano", "brasileiro", "menino"]
@@ -48,28 +47,34 @@ def limpar_nome(nome):
     nome_limpo = unidecode(str(nome).lower())
     return not any(generico in nome_limpo for generico in nomes_excluir)
 
-df_ranking = df[df["Cliente"].apply(limpar_nome)]
-
-# === Agrupamento Cliente + Data
-agrupado = df_ranking.groupby(["Cliente", "Data"]).agg(
-    Qtd_Serviços=('Serviço', 'count'),
-    Qtd_Produtos=('Tipo', lambda x: (x == "Produto").sum()),
-    Valor_Total=('Valor', 'sum')
-).reset_index()
-
-agrupado["Qtd_Combo"] = agrupado["Qtd_Serviços"].apply(lambda x: 1 if x > 1 else 0)
-agrupado["Qtd_Simples"] = agrupado["Qtd_Serviços"].apply(lambda x: 1 if x == 1 else 0)
-
 @st.cache_data
-def top_20_por(df):
-    resumo = df.groupby("Cliente").agg(
-        Qtd_Serviços=("Qtd_Serviços", "sum"),
-        Qtd_Produtos=("Qtd_Produtos", "sum"),
-        Qtd_Atendimento=("Data", "count"),
-        Qtd_Combo=("Qtd_Combo", "sum"),
-        Qtd_Simples=("Qtd_Simples", "sum"),
-        Valor_Total=("Valor_Total", "sum")
-    ).reset_index()
+def base_ranking():
+    """Linhas que entram no ranking (2 funcionários, sem nomes genéricos), todos os anos."""
+    d = carregar_dados()
+    d = d[d["Funcionário"].isin(FUNCIONARIOS)]
+    return d[d["Cliente"].apply(limpar_nome)].assign(EhProduto=lambda x: x["Tipo"] == "Produto")
+
+@st.cache_resource
+def motor_ranking():
+    """Totais por (Ano, Funcionário, Cliente); base nova → só as linhas do fim entram."""
+    return ranking.Ranking(col_produto="EhProduto")
+
+df_todos = carregar_dados()
+df = df_todos[(df_todos["Ano"] == ano) & df_todos["Funcionário"].isin(funcionarios)]
+
+rk = motor_ranking()
+rk.sincronizar(base_ranking())
+
+def top_20_por(ano, funcionarios):
+    # os dois juntos = salão (Funcionário ""), com dias contados 1x mesmo se os dois atenderam
+    if not funcionarios:
+        return pd.DataFrame(columns=["Posição", "Cliente", "Qtd_Serviços", "Qtd_Produtos", "Qtd_Atendimento",
+                                     "Qtd_Combo", "Qtd_Simples", "Valor_Total", "Valor_Formatado", "Categoria"])
+    func = funcionarios[0] if len(funcionarios) == 1 else None
+    resumo = rk.top(None, por="Valor", ano=ano, funcionario=func).rename(columns={
+        "Linhas": "Qtd_Serviços", "Produtos": "Qtd_Produtos", "Dias": "Qtd_Atendimento",
+        "Combos": "Qtd_Combo", "Simples": "Qtd_Simples", "Valor": "Valor_Total",
+    })
 
     resumo["Valor_Formatado"] = resumo["Valor_Total"].apply(lambda x: f"R$ {x:,.2f}".replace(".", "x").replace(",", ".").replace("x", ","))
 
@@ -82,11 +87,9 @@ def top_20_por(df):
             return "🥉 Novato"
     
     resumo["Categoria"] = resumo["Valor_Total"].apply(categoria_cliente)
-    resumo = resumo.sort_values(by="Valor_Total", ascending=False).reset_index(drop=True)
-    resumo["Posição"] = resumo.index + 1
     return resumo
 
-resumo_geral = top_20_por(agrupado)
+resumo_geral = top_20_por(ano, funcionarios)
 
 # === Filtros dinâmicos
 st.subheader("🎯 Top 20 Clientes - Geral")
@@ -11,6 +11,7 @@ import numpy as np
 import gspread, re, io
 from gspread_dataframe import get_as_dataframe
 from google.oauth2.service_account import Credentials
+from utils import taxa_cartao, categorias_despesa
 import plotly.express as px
 import plotly.graph_objects as go
 from datetime import datetime
@@ -31,22 +32,7 @@ PADROES_NAO_RECEITA = [
     "fiado pagamento","pagamento fiado","baixa fiado","cofre saida"
 ]
 
-# Mapeamento de categorias para a aba Despesas (ajuste livre)
-CATEG_MAP = {
-    "comissão": "Comissão",
-    "taxa|maquin|stone|sumup|clip|cartão|cartao": "Taxa de Cartão",
-    "luz|energia|enel|celg|equatorial": "Energia",
-    "água|agua|saneago": "Água",
-    "aluguel|locação|locacao": "Aluguel",
-    "produto|pomada|gel|cera|creme|lâmina|lamina|barber|tesoura|máquina|maquina": "Produtos/Insumos",
-    "limpeza|detergente|sabão|sabao|álcool|alcool|descartável|descartavel": "Limpeza/EPI",
-    "internet|wifi|roteador|modem|provedor|claro|vivo|oi|tim": "Internet/Telefonia",
-    "marketing|instagram|facebook|canva|anúncio|anuncio|arte|impressão|impressao|banner": "Marketing",
-    "manutenção|manutencao|reparo|conserto|técnico|tecnico|suporte": "Manutenção",
-    "transporte|uber|combustível|combustivel|gasolina|estacionamento": "Transporte",
-    "imposto|taxa prefeitura|alvará|alvara|mei|simples": "Impostos/Taxas",
-    "equipamento|cadeira|espelho|móvel|movel|microfone|câmera|camera|pc|notebook": "Equipamentos",
-}
+# Categorias da aba Despesas: utils/categorias_despesa.CATEG_MAP (ajuste livre)
 
 # =========================
 # HELPERS
@@ -77,13 +63,6 @@ def to_brl(x) -> float:
     except:
         return 0.0
 
-def classif_categoria(desc: str) -> str:
-    text = str(desc).lower()
-    for patt, nome in CATEG_MAP.items():
-        if pd.Series([text]).str.contains(patt, regex=True).iloc[0]:
-            return nome
-    return "Outros"
-
 def ensure_text_col(df, name, default=""):
     if name not in df.columns:
         df[name] = default
@@ -106,11 +85,19 @@ def _connect():
     creds = Credentials.from_service_account_info(info, scopes=scopes)
     return gspread.authorize(creds).open_by_key(SHEET_ID)
 
+@st.cache_resource(show_spinner=False)
+def classificador():
+    """Regex das categorias compilada 1x; guarda descrição → categoria entre recargas."""
+    return categorias_despesa.Classificador()
+
 @st.cache_data(show_spinner=True)
 def load_data(_v:int):
     sh = _connect()
     df_base = get_as_dataframe(sh.worksheet("Base de Dados")).dropna(how="all")
     df_desp = get_as_dataframe(sh.worksheet("Despesas")).dropna(how="all")
+    # taxa de cartão por linha, 1x por versão (mesma regra do app.py: valor → bruto−líquido → %)
+    df_base.columns = df_base.columns.str.strip()
+    taxa_cartao.marcar_taxa_cartao(df_base, taxa_cartao.col_conta(df_base.columns))
     return df_base, df_desp
 
 # botão limpar cache
@@ -137,7 +124,9 @@ for col in ["Funcionário","Conta","StatusFiado","Tipo","Serviço","Cliente"]:
 # cria colunas numéricas convertidas
 ensure_num_parsed_col(df_rec, "Valor", "ValorNum", 0.0)
 ensure_num_parsed_col(df_rec, "ValorBruto", "ValorBrutoNum", np.nan)
-ensure_num_parsed_col(df_rec, "TaxaCartaoValor", "TaxaCartaoValorNum", 0.0)
+# "Bruto - Taxa" desconta só a taxa GRAVADA: as estimativas (diff/pct) partem do líquido e
+# ValorBrutoNum cai no próprio Valor (líquido) quando não há bruto → descontaria 2x
+df_rec["TaxaCartaoValorNum"] = df_rec["TaxaCartaoCalc"].where(df_rec["MetodoTaxa"] == "valor(q)", 0.0)
 
 # restrição de unidade: SOMENTE JP (JPaulo e Vinicius)
 FUNC_VALIDOS = {"jpaulo", "vinicius"}
@@ -167,7 +156,7 @@ df_desp["Mês"] = df_desp["Data"].dt.month
 df_desp["ValorNum"] = df_desp["Valor"].apply(to_brl)
 df_desp["Tipo"] = np.where(df_desp["Prestador"].astype(str).str.contains("vinici", case=False, na=False),
                            "Comissão (Vinicius)", "Despesa do Salão")
-df_desp["Categoria"] = df_desp["Descrição"].apply(classif_categoria)
+df_desp["Categoria"] = classificador().classificar(df_desp["Descrição"])
 
 # =========================
 # FILTROS
@@ -303,7 +292,7 @@ top_prest = (f.groupby("Prestador", as_index=False)["ValorNum"]
 top_prest["Gasto (R$)"] = top_prest["ValorNum"].map(brl)
 cA.dataframe(top_prest[["Prestador","Gasto (R$)"]], use_container_width=True, height=380)
 
-top_categ = (f.groupby("Categoria", as_index=False)["ValorNum"]
+top_categ = (f.groupby("Categoria", as_index=False, observed=True)["ValorNum"]
                .sum().sort_values("ValorNum", ascending=False))
 top_categ["Gasto (R$)"] = top_categ["ValorNum"].map(brl)
 cB.dataframe(top_categ[["Categoria","Gasto (R$)"]], use_container_width=True, height=380)
@@ -6,6 +6,7 @@ from gspread_dataframe import get_as_dataframe, set_with_dataframe
 from google.oauth2.service_account import Credentials
 from datetime import datetime
 import pytz
+from utils import sheets_cache, fake_sheets, ranking
 
 # ===== CONFIG =====
 TZ = "America/Sao_Paulo"
@@ -18,7 +19,7 @@ TELEGRAM_TOKEN = os.getenv("TELEGRAM_TOKEN")            # defina nos secrets/var
 TELEGRAM_CHAT_ID = "-1002953102982"                     # canal fixo
 LOGO_PADRAO = "https://res.cloudinary.com/db8ipmete/image/upload/v1752463905/Logo_sal%C3%A3o_kz9y9c.png"
 
-GCP_SERVICE_ACCOUNT = json.loads(os.getenv("GCP_SERVICE_ACCOUNT"))  # JSON completo
+GCP_SERVICE_ACCOUNT = json.loads(os.getenv("GCP_SERVICE_ACCOUNT") or "{}")  # JSON completo (vazio só com SHEETS_BACKEND=fake)
 
 # ===== Helpers =====
 def now_br_dt():
@@ -53,17 +54,20 @@ def tg_send_photo(photo_url: str, caption: str):
         tg_send(caption + "\n(foto indisponível)")
 
 # ===== Conectar Sheets =====
-scopes = ["https://spreadsheets.google.com/feeds", "https://www.googleapis.com/auth/drive"]
-creds = Credentials.from_service_account_info(GCP_SERVICE_ACCOUNT, scopes=scopes)
-gc = gspread.authorize(creds)
+if fake_sheets.backend_fake_ativo():
+    gc = fake_sheets.cliente_fake()
+else:
+    scopes = ["https://spreadsheets.google.com/feeds", "https://www.googleapis.com/auth/drive"]
+    creds = Credentials.from_service_account_info(GCP_SERVICE_ACCOUNT, scopes=scopes)
+    gc = gspread.authorize(creds)
 sh = gc.open_by_key(SHEET_ID)
-abas = {w.title: w for w in sh.worksheets()}
+abas = sheets_cache.mapa_abas(sh)
 
 def get_or_create_cache_ws():
     if ABA_CACHE in abas:
         return abas[ABA_CACHE]
     ws = sh.add_worksheet(title=ABA_CACHE, rows=2000, cols=10)
-    abas[ABA_CACHE] = ws
+    sheets_cache.registrar_aba(sh, ws)
     df_init = pd.DataFrame(columns=["ts", "categoria", "pos", "chave", "extra"])
     set_with_dataframe(ws, df_init, include_index=False)
     return ws
@@ -116,26 +120,15 @@ def foto_de(nome: str) -> str:
     return foto_map.get(_norm(nome), LOGO_PADRAO)
 
 # ===== Ranking base: usa Valor + CaixinhaDia =====
-def build_ranking(df_base: pd.DataFrame) -> pd.DataFrame:
-    if df_base.empty:
-        return pd.DataFrame(columns=["Cliente","total_gasto","atendimentos"])
-    # soma o gasto da linha com a caixinha daquela linha
-    df_base = df_base.copy()
-    df_base["ValorTotal"] = df_base["Valor"] + df_base["CaixinhaDia"]
+# motor com totais acumulados por cliente (1 atendimento por dia); Top 10 sai de um heap
+motor = ranking.Ranking(df, col_valor="Valor", col_caixinha="CaixinhaDia")
 
-    # 1 atendimento por dia (Cliente + _data_dia)
-    por_dia = df_base.groupby(["Cliente","_data_dia"], as_index=False)["ValorTotal"].sum()
-
-    # total gasto no período e contagem de atendimentos
-    tot = por_dia.groupby("Cliente", as_index=False)["ValorTotal"].sum().rename(columns={"ValorTotal":"total_gasto"})
-    atend = por_dia.groupby("Cliente", as_index=False)["_data_dia"].nunique().rename(columns={"_data_dia":"atendimentos"})
-
-    out = tot.merge(atend, on="Cliente", how="left").sort_values("total_gasto", ascending=False)
-    return out
+def build_ranking(k: int | None = None) -> pd.DataFrame:
+    top = motor.top(k, por="ValorComCx")
+    return top.rename(columns={"ValorComCx": "total_gasto", "Dias": "atendimentos"})[["Cliente", "total_gasto", "atendimentos"]]
 
 # Top 10 Geral
-rank_geral = build_ranking(df)
-top10_geral = rank_geral.head(10)
+top10_geral = build_ranking(10)
 
 # ===== Top 3 Famílias (mantido) =====
 top3_fam = []
@@ -225,25 +218,9 @@ def save_current_top(run_ts: datetime, atuais: dict):
     df_new = pd.concat([df_old, pd.DataFrame(rows)], ignore_index=True) if not df_old.empty else pd.DataFrame(rows)
     set_with_dataframe(ws, df_new, include_index=False, resize=True)
 
-def movements(prev: list[str], curr: list[str]):
-    pos_prev = {n: i+1 for i, n in enumerate(prev)}
-    pos_curr = {n: i+1 for i, n in enumerate(curr)}
-    ups, downs, new, out = [], [], [], []
-    for n in curr:
-        if n in pos_prev:
-            if pos_curr[n] < pos_prev[n]:
-                ups.append((n, pos_prev[n], pos_curr[n]))
-            elif pos_curr[n] > pos_prev[n]:
-                downs.append((n, pos_prev[n], pos_curr[n]))
-        else:
-            new.append((n, pos_curr[n]))
-    for n in prev:
-        if n not in pos_curr:
-            out.append((n, pos_prev[n]))
-    return ups, downs, new, out
-
-def send_movements(cat: str, prev_list: list[str], curr_list: list[str]):
-    ups, downs, new, out = movements(prev_list, curr_list)
+def send_movements(cat: str, curr_list: list[str]):
+    # posições anteriores guardadas no motor (carregadas do premiacao_cache)
+    ups, downs, new, out = motor.registrar(cat, curr_list)
     if not (ups or downs or new or out):
         return
     lines = [f"<b>Atualização no {html.escape(cat)}</b>"]
@@ -298,9 +275,9 @@ atuais = {
     "Top 10": list_from_df(top10_geral, "Cliente"),
     "Famílias": familias_list(),
 }
-prev = load_prev_topn(n=10)
+motor.carregar_anteriores(load_prev_topn(n=10))
 for cat, curr_list in atuais.items():
-    send_movements(cat, prev.get(cat, []), curr_list)
+    send_movements(cat, curr_list)
 
 # Salva snapshot atual
 save_current_top(now_br_dt(), atuais)
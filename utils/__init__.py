@@ -0,0 +1,3 @@
+# -*- coding: utf-8 -*-
+# utils — código compartilhado entre as páginas e os jobs (notify_inline / top_3)
+# Só depende de pandas / gspread / pytz / requests (os jobs do Actions não instalam streamlit).
@@ -0,0 +1,157 @@
+# -*- coding: utf-8 -*-
+# utils/base_dados.py — carga da "Base de Dados" com schema compacto
+# - Texto de baixa cardinalidade (Cliente, Funcionário, Serviço, Conta, ...) → category
+#   (1 código int8/int16 por linha em vez de 1 objeto str; groupby fica bem mais rápido)
+# - Valores em R$ → float64 (somas mostradas ao centavo; float32 erra o centavo em 1M linhas)
+# - Datas → datetime64 (dd/mm/aaaa, com fallback dayfirst)
+# - Ano/Mês → int16/int8
+# Obs.: coluna category só aceita valores já existentes; quem for ESCREVER na base
+#       (loc[...] = "novo") deve converter a coluna antes com .astype(object)
+
+import re
+
+import numpy as np
+import pandas as pd
+from gspread_dataframe import get_as_dataframe
+
+from utils import sheets_cache
+
+BASE_ABA = "Base de Dados"
+DATA_FMT = "%d/%m/%Y"
+DATA_CORTE_UNICIDADE = pd.Timestamp("2025-05-11")  # antes: 1 linha = 1 atendimento
+
+COLS_CATEGORIA = (
+    "Cliente", "Funcionário", "Serviço", "Conta", "Tipo", "Combo",
+    "Período", "Fase", "StatusFiado", "FormaPagDetalhe",
+)
+COLS_DINHEIRO = (
+    "Valor", "ValorBrutoRecebido", "ValorLiquidoRecebido", "TaxaCartaoValor",
+    "CaixinhaDia", "Caixinha_Fundo", "CaixinhaFundo", "Caixinha", "Gorjeta",
+)
+COLS_DATA = ("Data", "DataPagamento", "VencimentoFiado")
+
+# ponto de milhar só no formato BR completo: 1.234 / 12.345,67 / 1.234.567,8 (não "0.125" nem "73.27")
+_RE_MILHAR = re.compile(r"^-?[1-9]\d{0,2}(?:\.\d{3})+(?:,\d+)?$")
+
+# Produtos / URNA pelo nome do serviço
+REGEX_PRODUTO = re.compile(r"(produto|gel|pomad|shampoo|cera|spray|po\b|pó\b|p\u00f3\b)", re.IGNORECASE)
+REGEX_URNA = re.compile(
+    r"(caixinh[aã].*nat|caixinh[aã].*urna|urna.*caixinh[aã]|caixinh[aã]\s*natal|natal\s*caixinh[aã])",
+    re.IGNORECASE
+)
+
+
+# =========================
+# CONVERSORES (vetorizados)
+# =========================
+def para_numero(s: pd.Series) -> pd.Series:
+    """'R$ 1.234,56' / '25,00' / '25.5' / 25 → float64 (inválido → NaN).
+    Número de verdade numa coluna object (float lido da planilha) passa direto, sem virar texto."""
+    if pd.api.types.is_numeric_dtype(s):
+        return s.astype("float64")
+    out = pd.Series(np.nan, index=s.index, dtype="float64")
+    real = np.zeros(len(s), dtype=bool)
+    if s.dtype == object:
+        real = s.map(lambda v: isinstance(v, (int, float, np.number)) and not isinstance(v, bool)).to_numpy(dtype=bool)
+        out[real] = s[real].astype("float64")
+    txt = (s[~real].astype("string").str.strip()
+             .str.replace("R$", "", regex=False).str.replace(" ", "", regex=False))
+    txt = txt.where(~txt.str.match(_RE_MILHAR, na=False), txt.str.replace(".", "", regex=False))
+    out[~real] = pd.to_numeric(txt.str.replace(",", ".", regex=False), errors="coerce").astype("float64")
+    return out
+
+def para_data(s: pd.Series) -> pd.Series:
+    """dd/mm/aaaa → datetime64; o que não casar tenta dayfirst (ISO, dd-mm-aaaa...)."""
+    if pd.api.types.is_datetime64_any_dtype(s):
+        return s
+    txt = s.astype("string").str.strip()
+    dt = pd.to_datetime(txt, format=DATA_FMT, errors="coerce")
+    resto = dt.isna() & txt.notna() & (txt != "")
+    if resto.any():
+        dt[resto] = pd.to_datetime(txt[resto], dayfirst=True, errors="coerce", format="mixed")
+    return dt
+
+def mapear_categorias(s: pd.Series, func, padrao=False) -> np.ndarray:
+    """Aplica func(str) só 1x por categoria e espalha pelo código de cada linha.
+    Para coluna não-categórica cai no caminho normal (func por valor único)."""
+    if not isinstance(s.dtype, pd.CategoricalDtype):
+        s = s.astype("category")
+    cats = np.asarray([func(str(c)) for c in s.cat.categories], dtype=object)
+    codes = s.cat.codes.to_numpy()
+    out = np.full(len(s), padrao, dtype=object)
+    ok = codes >= 0
+    if len(cats):
+        out[ok] = cats[codes[ok]]
+    return out
+
+
+# =========================
+# SCHEMA
+# =========================
+def compactar(df: pd.DataFrame, numeros: bool = True, datas: bool = True) -> pd.DataFrame:
+    """Converte as colunas conhecidas IN PLACE e devolve o próprio df.
+    numeros/datas=False mantém os textos originais (ex.: RefID calculado sobre str(Valor))."""
+    for c in COLS_CATEGORIA:
+        if c in df.columns and not isinstance(df[c].dtype, pd.CategoricalDtype):
+            df[c] = df[c].astype("category")
+    if numeros:
+        for c in COLS_DINHEIRO:
+            if c in df.columns:
+                df[c] = para_numero(df[c])
+    if datas:
+        for c in COLS_DATA:
+            if c in df.columns:
+                df[c] = para_data(df[c])
+    return df
+
+def marcar_flags(df: pd.DataFrame) -> pd.DataFrame:
+    """EhProduto / EhUrna / EhServico pelo nome do serviço (regex 1x por serviço distinto)."""
+    serv = df["Serviço"] if "Serviço" in df.columns else pd.Series("", index=df.index, dtype="category")
+    df["EhProduto"] = mapear_categorias(serv, lambda s: bool(REGEX_PRODUTO.search(s))).astype(bool)
+    df["EhUrna"] = mapear_categorias(serv, lambda s: bool(REGEX_URNA.search(s))).astype(bool)
+    df["EhServico"] = ~(df["EhProduto"] | df["EhUrna"])
+    return df
+
+def chave_visita(df: pd.DataFrame, col_data: str = "Data", col_cliente: str = "Cliente",
+                 corte=DATA_CORTE_UNICIDADE, ignorar_vazios: bool = False) -> pd.Series:
+    """Chave do atendimento (Int64), vetorizada:
+    - dia < corte → id próprio da linha (cada linha é um atendimento)
+    - dia >= corte (ou sempre, com corte=None) → 1 id por (Cliente, dia)
+    Sem data (ou cliente vazio, com ignorar_vazios) → <NA>.
+    Atendimentos de qualquer recorte = df["Visita"].nunique()."""
+    n = len(df)
+    dia = pd.to_datetime(pd.Series(df[col_data], index=df.index), errors="coerce").dt.normalize()
+    cli = df[col_cliente] if col_cliente in df.columns else pd.Series("", index=df.index)
+    if not isinstance(cli.dtype, pd.CategoricalDtype):
+        cli = cli.astype("string").str.strip()
+    cli_cod = pd.factorize(cli)[0].astype("int64")
+    dia_cod = pd.factorize(dia)[0].astype("int64")
+
+    grupo = pd.factorize(cli_cod * (int(dia_cod.max(initial=0)) + 2) + dia_cod)[0].astype("int64")
+    unico = np.ones(n, dtype=bool) if corte is None else (dia >= pd.Timestamp(corte)).to_numpy()
+    chave = np.where(unico, grupo, int(grupo.max(initial=-1)) + 1 + np.arange(n, dtype="int64"))
+
+    invalido = dia.isna().to_numpy()
+    if ignorar_vazios:
+        invalido |= (cli_cod < 0) | (cli.astype("string").fillna("").str.strip() == "").to_numpy()
+    out = pd.array(chave, dtype="Int64")
+    out[invalido] = pd.NA
+    return pd.Series(out, index=df.index, name="Visita")
+
+def carregar_base(sh, aba: str = BASE_ABA) -> pd.DataFrame:
+    """get_as_dataframe da aba + limpeza padrão + schema compacto."""
+    ws = sheets_cache.get_ws(sh, aba)
+    df = get_as_dataframe(ws).dropna(how="all")
+    df.columns = [str(c).strip() for c in df.columns]
+    df = df.loc[:, [c for c in df.columns if c and not c.startswith("Unnamed")]]
+    return compactar(df)
+
+def versao(df: pd.DataFrame) -> int:
+    """Impressão digital do conteúdo (hash de cada linha, somado): chave de cache_resource por versão da base."""
+    if df.empty:
+        return 0
+    h = pd.util.hash_pandas_object(df.astype(str), index=False).to_numpy(dtype=np.uint64)
+    return int(h.sum(dtype=np.uint64)) ^ len(df)
+
+def memoria_mb(df: pd.DataFrame) -> float:
+    return float(df.memory_usage(deep=True).sum()) / 2**20
@@ -0,0 +1,142 @@
+# -*- coding: utf-8 -*-
+# utils/busca_clientes.py — índice de BUSCA de clientes (sem acento, sem caixa)
+# - Chave = unidecode + casefold + espaços colapsados ("João  Silva" → "joao silva")
+# - Ordem de relevância: frequência (dias distintos) com meia-vida de 180 dias
+#   sobre a última visita; sem histórico → ordem alfabética no fim
+# - Prefixos curtos (até 3 letras) já vêm ordenados: início do nome e início de
+#   outra palavra → buscar() é fatiar duas listas
+# - Termos maiores: trigramas → interseção de candidatos → confere o "contém"
+# - buscar(): top k para searchbox; filtrar(): todos os nomes que contêm o termo
+
+import re
+import heapq
+import threading
+
+import pandas as pd
+from unidecode import unidecode
+
+PREFIXO_MAX = 3
+MEIA_VIDA_DIAS = 180.0
+
+
+def normalizar(nome) -> str:
+    return re.sub(r"\s+", " ", unidecode(str(nome or "")).casefold()).strip()
+
+def _trigramas(s: str) -> set:
+    return {s[i:i + 3] for i in range(len(s) - 2)}
+
+
+class IndiceClientes:
+    def __init__(self, nomes, ultima: dict | None = None, dias: dict | None = None, hoje=None):
+        """nomes: lista de exibição; ultima/dias: {nome: última data} e {nome: nº de dias com visita}."""
+        self._lock = threading.RLock()
+        self._ultima, self._dias = dict(ultima or {}), dict(dias or {})
+        self._hoje = pd.Timestamp(hoje) if hoje is not None else None
+        self._montar({str(n).strip() for n in nomes if str(n).strip() and not pd.isna(n)})
+
+    @classmethod
+    def da_base(cls, df: pd.DataFrame, col_cliente: str = "Cliente", col_data: str = "Data",
+                data_fmt: str | None = None, nomes=None):
+        """Estatísticas de recência/frequência a partir da base. nomes: limita quem entra no índice."""
+        cli = df[col_cliente].astype("string").fillna("").str.strip()
+        dt = df[col_data] if pd.api.types.is_datetime64_any_dtype(df[col_data]) \
+            else pd.to_datetime(df[col_data], format=data_fmt, errors="coerce")
+        v = pd.DataFrame({"c": cli, "d": pd.to_datetime(dt).dt.normalize()}).dropna()
+        v = v[v["c"] != ""].drop_duplicates()
+        g = v.groupby("c")["d"].agg(["max", "size"])
+        return cls(cli[cli != ""].unique() if nomes is None else nomes, g["max"].to_dict(), g["size"].to_dict())
+
+    # ---------- montagem ----------
+    def _score(self, nome: str, hoje) -> float:
+        n = self._dias.get(nome, 0)
+        if not n:
+            return 0.0
+        idade = max((hoje - self._ultima[nome]).days, 0) if hoje is not None else 0
+        return n * 0.5 ** (idade / MEIA_VIDA_DIAS)
+
+    def _montar(self, nomes: set):
+        hoje = self._hoje or (max(self._ultima.values()) if self._ultima else None)
+        # id = posição na ordem de relevância → listas de ids já saem ordenadas
+        ordem = sorted(nomes, key=lambda n: (-self._score(n, hoje), normalizar(n), n))
+        chaves = [normalizar(n) for n in ordem]
+        ini, pal, tri = {}, {}, {}
+        for i, k in enumerate(chaves):
+            for p in range(1, min(PREFIXO_MAX, len(k)) + 1):
+                ini.setdefault(k[:p], []).append(i)
+            vistos = set()
+            for w in k.split(" ")[1:]:
+                for p in range(1, min(PREFIXO_MAX, len(w)) + 1):
+                    pre = w[:p]
+                    if pre not in vistos and not k.startswith(pre):
+                        vistos.add(pre)
+                        pal.setdefault(pre, []).append(i)
+            for t in _trigramas(k):
+                tri.setdefault(t, set()).add(i)
+        with self._lock:
+            self.nomes, self._chaves = ordem, chaves
+            self._ini, self._pal, self._tri = ini, pal, tri
+
+    def acrescentar(self, nomes_datas):
+        """[(nome, data)] recém-gravados: atualiza recência/frequência e remonta (ms p/ milhares de nomes)."""
+        novos = set(self.nomes)
+        for nome, dt in nomes_datas:
+            nome = str(nome or "").strip()
+            if not nome:
+                continue
+            novos.add(nome)
+            dt = pd.to_datetime(dt, dayfirst=True, errors="coerce")
+            if pd.isna(dt):
+                continue
+            dt = dt.normalize()
+            if self._ultima.get(nome) != dt:  # 1 dia novo (mesmo dia não conta 2x)
+                self._dias[nome] = self._dias.get(nome, 0) + 1
+                self._ultima[nome] = max(dt, self._ultima.get(nome, dt))
+        self._montar(novos)
+
+    # ---------- consultas ----------
+    def _candidatos(self, q: str):
+        """ids cuja chave contém todos os termos de q."""
+        toks = q.split(" ")
+        ids = None
+        for t in sorted(toks, key=len, reverse=True):
+            if len(t) >= 3:
+                sets = sorted((self._tri.get(g, set()) for g in _trigramas(t)), key=len)
+                cand = set.intersection(*sets) if sets else set()
+            else:
+                cand = set(range(len(self._chaves))) if ids is None else ids
+            ids = cand if ids is None else ids & cand
+            if not ids:
+                return []
+        return [i for i in ids if all(t in self._chaves[i] for t in toks)]
+
+    def _camada(self, i: int, q: str, t0: str) -> int:
+        k = self._chaves[i]
+        if k.startswith(q):
+            return 0
+        if (" " + t0) in (" " + k):
+            return 1
+        return 2
+
+    def buscar(self, termo: str, k: int = 10) -> list:
+        """Top k nomes para o termo: começa com > palavra começa com > contém; empate → relevância."""
+        q = normalizar(termo)
+        with self._lock:
+            if not q:
+                return self.nomes[:k]
+            if " " not in q and len(q) <= PREFIXO_MAX:
+                ids = self._ini.get(q, [])[:k]
+                if len(ids) < k:
+                    ids = ids + self._pal.get(q, [])[:k - len(ids)]
+                if len(ids) == k or len(q) < PREFIXO_MAX:
+                    return [self.nomes[i] for i in ids]
+            t0 = q.split(" ")[0]
+            top = heapq.nsmallest(k, self._candidatos(q), key=lambda i: (self._camada(i, q, t0), i))
+            return [self.nomes[i] for i in top]
+
+    def filtrar(self, termo: str) -> list:
+        """Todos os nomes que contêm o termo (ignorando acento/caixa), na ordem de relevância."""
+        q = normalizar(termo)
+        with self._lock:
+            if not q:
+                return list(self.nomes)
+            return [self.nomes[i] for i in sorted(self._candidatos(q))]
@@ -0,0 +1,66 @@
+# -*- coding: utf-8 -*-
+# utils/categorias_despesa.py — CATEGORIA de despesa pela descrição (regex compilada 1x)
+# - 1 regex só: cada categoria vira um lookahead com grupo nomeado, ancorado no início
+#   → a 1ª categoria do mapa que casar em QUALQUER ponto do texto vence (mesma regra do loop antigo)
+# - Roda só sobre as descrições DISTINTAS (lower); o resultado volta por código (factorize)
+#   como coluna category
+# - Memo descrição → categoria guardado no classificador: releituras da aba só classificam o que é novo
+
+import re
+import threading
+
+import numpy as np
+import pandas as pd
+
+# Mapeamento de categorias para a aba Despesas (ordem = prioridade; ajuste livre)
+CATEG_MAP = {
+    "comissão": "Comissão",
+    "taxa|maquin|stone|sumup|clip|cartão|cartao": "Taxa de Cartão",
+    "luz|energia|enel|celg|equatorial": "Energia",
+    "água|agua|saneago": "Água",
+    "aluguel|locação|locacao": "Aluguel",
+    "produto|pomada|gel|cera|creme|lâmina|lamina|barber|tesoura|máquina|maquina": "Produtos/Insumos",
+    "limpeza|detergente|sabão|sabao|álcool|alcool|descartável|descartavel": "Limpeza/EPI",
+    "internet|wifi|roteador|modem|provedor|claro|vivo|oi|tim": "Internet/Telefonia",
+    "marketing|instagram|facebook|canva|anúncio|anuncio|arte|impressão|impressao|banner": "Marketing",
+    "manutenção|manutencao|reparo|conserto|técnico|tecnico|suporte": "Manutenção",
+    "transporte|uber|combustível|combustivel|gasolina|estacionamento": "Transporte",
+    "imposto|taxa prefeitura|alvará|alvara|mei|simples": "Impostos/Taxas",
+    "equipamento|cadeira|espelho|móvel|movel|microfone|câmera|camera|pc|notebook": "Equipamentos",
+}
+PADRAO = "Outros"
+
+
+class Classificador:
+    def __init__(self, mapa: dict = CATEG_MAP, padrao: str = PADRAO):
+        """mapa: {regex: categoria}, na ordem de prioridade; padrao: quando nada casa (ou descrição vazia)."""
+        self.padrao = padrao
+        self.categorias = list(dict.fromkeys([*mapa.values(), padrao]))
+        self._pos = {c: i for i, c in enumerate(self.categorias)}
+        self._nome = {}
+        grupos = []
+        for i, (patt, nome) in enumerate(mapa.items()):
+            self._nome[f"c{i}"] = nome
+            grupos.append(f"(?=.*?(?P<c{i}>{patt}))")
+        self._re = re.compile("^(?:" + "|".join(grupos) + ")", re.DOTALL)
+        self._lock = threading.Lock()
+        self._memo = {}  # descrição (lower) → posição da categoria
+
+    def categoria(self, desc) -> str:
+        """Uma descrição (já em minúsculas ou não)."""
+        m = self._re.match(str(desc).lower())
+        return self._nome[m.lastgroup] if m else self.padrao
+
+    def classificar(self, descricoes: pd.Series) -> pd.Series:
+        """Coluna category com a categoria de cada linha (regex só 1x por descrição distinta)."""
+        codes, uniq = pd.factorize(descricoes.astype("string").str.lower())
+        with self._lock:
+            for u in uniq:
+                if u not in self._memo:
+                    self._memo[u] = self._pos[self.categoria(u)]
+            por_uniq = np.fromiter((self._memo[u] for u in uniq), dtype="int16", count=len(uniq))
+        out = np.full(len(codes), self._pos[self.padrao], dtype="int16")
+        ok = codes >= 0
+        if ok.any():
+            out[ok] = por_uniq[codes[ok]]
+        return pd.Series(pd.Categorical.from_codes(out, categories=self.categorias), index=descricoes.index)
@@ -0,0 +1,94 @@
+# -*- coding: utf-8 -*-
+# utils/comissao.py — motor COLUNAR da comissão semanal (28_Comissoes_Vinicius)
+# - preparar_base(): 1 passada sobre a Base → só linhas do funcionário, com datas/valores/RefID
+#   já convertidos (não depende da terça escolhida → a página guarda em cache_data,
+#   chave = sheets_cache.versao_escrita da Base)
+# - separar_semana(): máscaras da janela terça→segunda, fiados liberados e pendentes
+# - valor_base(): arredondamento p/ preço cheio de tabela (snap) em array
+# Tudo é operação de coluna; nada de apply(axis=1) / parse linha a linha.
+
+import numpy as np
+import pandas as pd
+
+from utils import base_dados, refid
+
+FORMATOS_DATA = ("%d/%m/%Y", "%d-%m-%Y", "%Y-%m-%d")
+COLS_CAIXINHA = ["CaixinhaDia", "CaixinhaFundo"]
+
+
+# =========================
+# CONVERSORES
+# =========================
+def _lower(s: pd.Series) -> pd.Series:
+    """= s.astype(str).str.strip().str.lower(), mas 1x por categoria quando category."""
+    if isinstance(s.dtype, pd.CategoricalDtype):
+        return pd.Series(base_dados.mapear_categorias(s, lambda v: v.strip().lower(), padrao="nan"), index=s.index)
+    return s.astype(str).str.strip().str.lower()
+
+def datas_br(s: pd.Series) -> pd.Series:
+    """Texto → datetime64 tentando dd/mm/aaaa, dd-mm-aaaa e aaaa-mm-dd (inválido → NaT)."""
+    txt = s.astype(str).str.strip()
+    out = pd.Series(pd.NaT, index=s.index, dtype="datetime64[ns]")
+    for fmt in FORMATOS_DATA:
+        falta = out.isna()
+        if not falta.any():
+            break
+        out[falta] = pd.to_datetime(txt[falta], format=fmt, errors="coerce")
+    return out
+
+def valores_brl(s: pd.Series) -> pd.Series:
+    """'R$ 1.234,56' / '25,00' / 25 → float (inválido/vazio → 0.0)."""
+    return base_dados.para_numero(s).fillna(0.0)
+
+
+# =========================
+# MOTOR
+# =========================
+def preparar_base(base: pd.DataFrame, funcionario: str = "vinicius") -> pd.DataFrame:
+    """Linhas do funcionário + colunas derivadas (independe da terça)."""
+    d = base[_lower(base["Funcionário"]) == funcionario.lower()].copy()
+    conta, tipo, serv = _lower(d["Conta"]), _lower(d["Tipo"]), _lower(d["Serviço"])
+    status = _lower(d["StatusFiado"])
+
+    d["_tipo"] = tipo
+    d["_eh_caixinha"] = (conta == "caixinha") | (tipo == "caixinha") | (serv == "caixinha")
+    d["_nao_fiado"] = status.isin(["", "nao"])
+    d["_eh_fiado"] = (status != "") | (_lower(d["IDLancFiado"]) != "")
+    d["_dt_serv"] = datas_br(d["Data"])
+    d["_dt_pagto"] = datas_br(d["DataPagamento"])
+    d["Valor_num"] = valores_brl(d["Valor"])
+    d["Competência"] = d["_dt_serv"].dt.strftime("%m/%Y").fillna("")
+    d["RefID"] = refid.refid_atendimento(d)
+    for c in COLS_CAIXINHA:
+        d[f"{c}_num"] = valores_brl(d[c]) if c in d.columns else 0.0
+    return d
+
+def separar_semana(d: pd.DataFrame, ini, fim, terca, incluir_produtos: bool = False) -> dict:
+    """Máscaras da folha da terça (tudo booleano sobre o mesmo frame)."""
+    comissionavel = ~d["_eh_caixinha"]
+    if not incluir_produtos:
+        comissionavel &= d["_tipo"] == "serviço"
+    na_janela = d["_dt_serv"].notna() & (d["_dt_serv"] >= ini) & (d["_dt_serv"] <= fim)
+    fiado = comissionavel & d["_eh_fiado"]
+    pago_ate_terca = d["_dt_pagto"].notna() & (d["_dt_pagto"] <= terca)
+    return {
+        "comissionavel": comissionavel,
+        "janela": na_janela,  # todas as linhas do funcionário (caixinha da janela)
+        "semana": comissionavel & na_janela & d["_nao_fiado"],
+        "fiado": fiado,
+        "fiado_liberado": fiado & pago_ate_terca,
+        "fiado_pendente": fiado & ~pago_ate_terca,
+    }
+
+def valor_base(d: pd.DataFrame, tabela: dict, tol: float, habilitado: bool) -> np.ndarray:
+    """snap_para_preco_cheio em array: |valor − tabela[serviço]| <= tol → preço de tabela."""
+    valor = d["Valor_num"].to_numpy(dtype="float64")
+    if not habilitado or d.empty:
+        return valor
+    cheio = d["Serviço"].astype(str).str.strip().map(tabela).astype("float64").to_numpy()
+    snap = ~np.isnan(cheio) & (np.abs(valor - cheio) <= tol)
+    return np.where(snap, cheio, valor)
+
+def comissao(valor_base_arr, pct) -> np.ndarray:
+    """valor × % / 100, arredondado ao centavo."""
+    return np.round(np.asarray(valor_base_arr, dtype="float64") * np.asarray(pct, dtype="float64") / 100.0, 2)
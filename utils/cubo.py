@@ -0,0 +1,117 @@
+# -*- coding: utf-8 -*-
+# utils/cubo.py — cubo agregado DIÁRIO da Base de Dados
+# - Dimensões: Data (dia), Funcionário, Classe (servico/produto/urna), Fiado (bool), Fase
+# - Medidas : ValorNum, CaixinhaDiaTotal, Linhas, Visitas, VisitasCombo
+# - Montado 1x por versão dos dados (cache_data da página); filtros da tela só fazem
+#   rolar() sobre o cubo (milhares de linhas) em vez de varrer a base inteira
+#
+# Regra de VISITAS (mesma da casa: base_dados.chave_visita, por Funcionário):
+#   antes de 11/05/2025 → cada linha é um atendimento
+#   a partir de 11/05/2025 → 1 atendimento por (Cliente, Data) de cada Funcionário —
+#   pago + fiado no mesmo dia é UM atendimento, creditado na 1ª linha do grupo
+#   (por isso Visitas soma exato ao rolar qualquer dimensão exceto Classe/Fase/Fiado,
+#   onde vale a classe/fase/conta da 1ª linha)
+
+import numpy as np
+import pandas as pd
+
+from utils import base_dados
+
+DATA_CORTE_UNICIDADE = base_dados.DATA_CORTE_UNICIDADE
+DIMENSOES = ["Data", "Funcionário", "Classe", "Fiado", "Fase"]
+MEDIDAS = ["ValorNum", "CaixinhaDiaTotal", "Linhas", "Visitas", "VisitasCombo"]
+CLASSES = ["servico", "produto", "urna"]
+COLS_CAIXINHA = ["CaixinhaDia", "Caixinha_Fundo", "CaixinhaFundo", "Caixinha", "Gorjeta"]
+
+
+def _coluna(df, nome, padrao=""):
+    if nome in df.columns:
+        return df[nome]
+    return pd.Series(padrao, index=df.index, dtype="category")
+
+def montar_cubo(df: pd.DataFrame, col_conta: str | None = "Conta") -> pd.DataFrame:
+    """df = base já compactada (base_dados.carregar_base); linhas sem Data são ignoradas."""
+    df = df[df["Data"].notna()] if "Data" in df.columns else df.iloc[0:0]
+    if "EhProduto" not in df.columns or "EhUrna" not in df.columns:
+        df = base_dados.marcar_flags(df.copy())
+
+    valor = df["ValorNum"] if "ValorNum" in df.columns else base_dados.para_numero(_coluna(df, "Valor", np.nan))
+    cx_cols = [c for c in COLS_CAIXINHA if c in df.columns]
+    if "CaixinhaDiaTotal" in df.columns:
+        caixinha = df["CaixinhaDiaTotal"]
+    elif cx_cols:
+        caixinha = sum(base_dados.para_numero(df[c]).fillna(0.0) for c in cx_cols)
+    else:
+        caixinha = pd.Series(0.0, index=df.index)
+
+    classe = np.where(df["EhUrna"], "urna", np.where(df["EhProduto"], "produto", "servico"))
+    if col_conta and col_conta in df.columns:
+        fiado = base_dados.mapear_categorias(df[col_conta], lambda s: s.strip().lower() == "fiado").astype(bool)
+    else:
+        fiado = np.zeros(len(df), dtype=bool)
+
+    d = pd.DataFrame({
+        "Data": df["Data"].dt.normalize(),
+        "Funcionário": _coluna(df, "Funcionário").astype("category"),
+        "Classe": pd.Categorical(classe, categories=CLASSES),
+        "Fiado": fiado,
+        "Fase": _coluna(df, "Fase").astype("category"),
+        "Cliente": _coluna(df, "Cliente").astype("category"),
+        "ValorNum": pd.to_numeric(valor, errors="coerce").fillna(0.0).to_numpy(),
+        "CaixinhaDiaTotal": pd.to_numeric(caixinha, errors="coerce").fillna(0.0).to_numpy(),
+    }, index=df.index)
+    d["Visita"] = base_dados.chave_visita(df, corte=DATA_CORTE_UNICIDADE)
+
+    g = d.groupby(["Visita", "Funcionário"], observed=True, dropna=False, sort=False)
+    primeira = (g.cumcount() == 0).to_numpy()
+    tamanho = g["ValorNum"].transform("size").to_numpy()
+
+    d["Linhas"] = np.int32(1)
+    d["Visitas"] = primeira.astype("int32")  # antes do corte cada linha já é uma Visita própria
+    d["VisitasCombo"] = (primeira & (tamanho > 1)).astype("int32")
+
+    cubo = (d.groupby(DIMENSOES, observed=True, dropna=False, sort=True)[MEDIDAS]
+              .sum().reset_index())
+    return cubo
+
+
+def _filtrar(cubo, valores):
+    m = np.ones(len(cubo), dtype=bool)
+    for col, v in valores.items():
+        if v is None:
+            continue
+        if isinstance(v, (list, tuple, set, frozenset)):
+            m &= cubo[col].isin(list(v)).to_numpy()
+        else:
+            m &= (cubo[col] == v).to_numpy()
+    return cubo[m]
+
+def rolar(cubo: pd.DataFrame, por=(), ano=None, meses=None, ini=None, fim=None,
+          medidas=MEDIDAS, **filtros) -> pd.DataFrame:
+    """Agrega o cubo por `por` (dimensões + derivadas Ano/Mês/AnoMes).
+    filtros: Funcionário=..., Classe=[...], Fiado=True/False, Fase=... (escalar ou lista)."""
+    c = _filtrar(cubo, filtros)
+    if ini is not None:
+        c = c[c["Data"] >= pd.Timestamp(ini)]
+    if fim is not None:
+        c = c[c["Data"] <= pd.Timestamp(fim)]
+    por = list(por)
+    usadas = set(por) | ({"Ano"} if ano is not None else set()) | ({"Mês"} if meses is not None else set())
+    if "Ano" in usadas:
+        c = c.assign(Ano=c["Data"].dt.year.astype("int16"))
+    if "Mês" in usadas:
+        c = c.assign(**{"Mês": c["Data"].dt.month.astype("int8")})
+    if "AnoMes" in usadas:
+        c = c.assign(AnoMes=c["Data"].dt.strftime("%Y-%m"))
+    if ano is not None:
+        c = c[c["Ano"].isin(ano if isinstance(ano, (list, tuple, set)) else [ano])]
+    if meses is not None:
+        c = c[c["Mês"].isin(list(meses))]
+    medidas = list(medidas)
+    if not por:
+        return c[medidas].sum().to_frame().T
+    return c.groupby(por, observed=True, dropna=False)[medidas].sum().reset_index()
+
+def total(cubo: pd.DataFrame, medida: str = "ValorNum", **kw) -> float:
+    """Atalho: soma escalar de uma medida com os mesmos filtros de rolar()."""
+    return float(rolar(cubo, medidas=[medida], **kw)[medida].sum())
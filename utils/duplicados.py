@@ -0,0 +1,186 @@
+# -*- coding: utf-8 -*-
+# utils/duplicados.py — candidatos a CLIENTE DUPLICADO ("Joao" / "João" / "joão ")
+# - Chave normalizada (sem acento/caixa/espaços extras): nomes com a mesma chave = duplicata certa
+# - Blocos: código fonético do nome inteiro, 5 primeiros e 5 últimos caracteres da chave
+#   (erro de digitação no meio mantém os dois; no começo/fim mantém um deles);
+#   a distância de edição só é calculada DENTRO de cada bloco (nunca todos × todos)
+#   + dentro do bloco, filtro vetorizado (numpy): tamanho e contagem de letras — cada edição
+#     muda o vetor de contagens em no máximo 2 → só sobra quem pode estar a ≤ EDICOES_MAX
+# - Levenshtein em faixa (|i − j| ≤ edições permitidas; para cedo quando passa) — no máximo
+#   EDICOES_MAX edições: nomes longos com sobrenome diferente não viram "parecidos"
+# - Grupos em estrela: a grafia mais usada é a âncora e só entra quem é parecido COM ELA
+#   (sem encadear A~B~C) → sugestão: trocar tudo pela variante mais usada da âncora
+
+from collections import defaultdict
+
+import numpy as np
+import pandas as pd
+
+from utils.busca_clientes import normalizar
+
+LIMIAR_PADRAO = 0.85
+EDICOES_MAX = 2
+
+_FON = [("ph", "f"), ("th", "t"), ("sh", "x"), ("ch", "x"), ("lh", "l"), ("nh", "n"), ("qu", "k"),
+        ("gu", "g"), ("sc", "s"), ("w", "v"), ("y", "i"), ("z", "s"), ("k", "c"), ("q", "c"), ("h", "")]
+
+
+def compacto(nome) -> str:
+    return "".join(ch for ch in normalizar(nome) if ch.isalnum())
+
+def fonetica(palavra: str) -> str:
+    """Código fonético simples (pt-BR): dígrafos → 1 letra, sem h, sem vogais depois da 1ª letra."""
+    s = "".join(ch for ch in palavra if ch.isalpha())
+    for a, b in _FON:
+        s = s.replace(a, b)
+    out = []
+    for i, ch in enumerate(s):
+        if out and ch == out[-1]:
+            continue
+        if i > 0 and ch in "aeiou":
+            continue
+        out.append(ch)
+    return "".join(out)
+
+def _blocos(chave_comp: str) -> list:
+    return [f"f:{fonetica(chave_comp)}", f"p:{chave_comp[:5]}", f"s:{chave_comp[-5:]}"]
+
+def levenshtein(a: str, b: str, max_d: int) -> int:
+    """Distância de edição só na faixa |i − j| ≤ max_d; devolve max_d + 1 assim que passar do limite."""
+    la, lb = len(a), len(b)
+    if abs(la - lb) > max_d:
+        return max_d + 1
+    fora = max_d + 1
+    ant = [j if j <= max_d else fora for j in range(lb + 1)]
+    for i in range(1, la + 1):
+        ca = a[i - 1]
+        ini, fim = max(1, i - max_d), min(lb, i + max_d)
+        atual = [fora] * (lb + 1)
+        atual[0] = i if i <= max_d else fora
+        menor = atual[0] if ini == 1 else fora
+        for j in range(ini, fim + 1):
+            v = ant[j - 1] + (ca != b[j - 1])
+            if ant[j] + 1 < v:
+                v = ant[j] + 1
+            if atual[j - 1] + 1 < v:
+                v = atual[j - 1] + 1
+            atual[j] = v
+            if v < menor:
+                menor = v
+        if menor > max_d:
+            return fora
+        ant = atual
+    return min(ant[lb], fora)
+
+def similaridade(a: str, b: str, limiar: float = 0.0) -> float:
+    n = max(len(a), len(b))
+    if not n:
+        return 1.0
+    max_d = min(EDICOES_MAX, int((1.0 - limiar) * n))
+    d = levenshtein(a, b, max_d)
+    return 0.0 if d > max_d else 1.0 - d / n
+
+_ALFABETO = {ch: k for k, ch in enumerate("abcdefghijklmnopqrstuvwxyz0123456789")}
+
+def _contagens(comp: list) -> np.ndarray:
+    m = np.zeros((len(comp), len(_ALFABETO) + 1), dtype=np.int16)
+    for i, c in enumerate(comp):
+        for ch in c:
+            m[i, _ALFABETO.get(ch, len(_ALFABETO))] += 1
+    return m
+
+def _pares_do_bloco(membros: np.ndarray, tam: np.ndarray, cont: np.ndarray, lote: int = 256):
+    """Pares (i, j), i antes de j no bloco, que ainda podem estar a ≤ EDICOES_MAX edições."""
+    t, c = tam[membros], cont[membros]
+    for ini in range(0, len(membros), lote):
+        tl, cl = t[ini:ini + lote], c[ini:ini + lote]
+        ok = np.abs(tl[:, None] - t[None, :]) <= EDICOES_MAX
+        ok &= np.abs(cl[:, None, :].astype(np.int32) - c[None, :, :]).sum(axis=2) <= 2 * EDICOES_MAX
+        x, y = np.nonzero(ok)
+        frente = y > x + ini
+        yield from zip(membros[x[frente] + ini].tolist(), membros[y[frente]].tolist())
+
+
+def estatisticas(df: pd.DataFrame, col_cliente: str = "Cliente", col_data: str = "Data",
+                 data_fmt: str | None = None) -> pd.DataFrame:
+    """Cliente (como está na base) → Linhas, Dias, Ultima."""
+    cli = df[col_cliente]
+    d = pd.DataFrame({"Cliente": cli.where(cli.notna(), "").astype(str)})
+    d["Dia"] = pd.to_datetime(df[col_data], format=data_fmt, errors="coerce").dt.normalize() \
+        if col_data in df.columns else pd.NaT
+    d = d[d["Cliente"].str.strip() != ""]
+    g = d.groupby("Cliente", sort=False)
+    return pd.DataFrame({"Linhas": g.size(), "Dias": g["Dia"].nunique(), "Ultima": g["Dia"].max()}).reset_index()
+
+
+def candidatos(stats: pd.DataFrame, limiar: float = LIMIAR_PADRAO) -> pd.DataFrame:
+    """Grupos de nomes parecidos. stats = estatisticas(base).
+    Cada grupo gira em torno da grafia mais usada (âncora): todo membro é parecido com ela
+    (sem encadear A~B~C). Saída: Grupo, Cliente, Sugestao, Linhas, Dias, Ultima, Similaridade, Motivo."""
+    cols = ["Grupo", "Cliente", "Sugestao", "Linhas", "Dias", "Ultima", "Similaridade", "Motivo"]
+    stats = stats.reset_index(drop=True)
+    nomes = stats["Cliente"].astype(str).tolist()
+    norm = [normalizar(n) for n in nomes]
+
+    # 1) mesma chave compacta → duplicata certa (variantes de uma chave)
+    variantes = defaultdict(list)
+    for i, n in enumerate(nomes):
+        c = compacto(n)
+        if c:
+            variantes[c].append(i)
+    chaves = list(variantes)
+    pos_chave = {c: k for k, c in enumerate(chaves)}
+    linhas_chave = np.array([int(stats.loc[variantes[c], "Linhas"].sum()) for c in chaves])
+
+    # 2) blocos → distância de edição só dentro do bloco
+    blocos = defaultdict(list)
+    for k, c in enumerate(chaves):
+        for b in _blocos(c):
+            blocos[b].append(k)
+    tam = np.array([len(c) for c in chaves])
+    cont = _contagens(chaves)
+    vizinhos = defaultdict(dict)  # chave → {chave parecida: similaridade}
+    vistos = set()
+    for membros in blocos.values():
+        if len(membros) < 2:
+            continue
+        for i, j in _pares_do_bloco(np.array(membros), tam, cont):
+            par = (i, j) if i < j else (j, i)
+            if par in vistos:
+                continue
+            vistos.add(par)
+            s = similaridade(chaves[i], chaves[j], limiar)
+            if s >= limiar:
+                vizinhos[i][j] = vizinhos[j][i] = s
+
+    # 3) âncoras: da chave mais usada para a menos; vizinho livre entra no grupo da âncora
+    dono = {}
+    grupos = []
+    for k in sorted(range(len(chaves)), key=lambda k: -linhas_chave[k]):
+        if k in dono:
+            continue
+        membros = [k] + [v for v in sorted(vizinhos.get(k, {}), key=lambda v: -linhas_chave[v]) if v not in dono]
+        for m in membros:
+            dono[m] = k
+        idx = [i for m in membros for i in variantes[chaves[m]]]
+        if len(idx) > 1:
+            grupos.append((k, idx))
+
+    linhas = []
+    for n_grupo, (k, idx) in enumerate(sorted(grupos, key=lambda g: -linhas_chave[g[0]]), 1):
+        # sugestão: variante mais usada da âncora; empate → mais recente → com acento/maiúscula
+        anc = stats.loc[variantes[chaves[k]]]
+        anc = anc.assign(_acento=[nomes[i] != norm[i] for i in anc.index]) \
+                 .sort_values(["Linhas", "Ultima", "_acento"], ascending=False, na_position="last")
+        sugestao = nomes[int(anc.index[0])]
+        for i in idx:
+            c = compacto(nomes[i])
+            mesma = c == chaves[k]
+            linhas.append({
+                "Grupo": n_grupo, "Cliente": nomes[i], "Sugestao": sugestao,
+                "Linhas": int(stats.at[i, "Linhas"]),
+                "Dias": int(stats.at[i, "Dias"]), "Ultima": stats.at[i, "Ultima"],
+                "Similaridade": 1.0 if mesma else round(vizinhos[k][pos_chave[c]], 3),
+                "Motivo": "acento/caixa/espaço" if mesma else "grafia parecida",
+            })
+    return pd.DataFrame(linhas, columns=cols)
@@ -0,0 +1,63 @@
+# -*- coding: utf-8 -*-
+# utils/escrita.py — escrita INCREMENTAL em abas (append / delete pontual)
+# - acrescentar(): append_rows só das linhas novas, na ordem do cabeçalho da aba
+#   (cabeçalho vem do sheets_cache; colunas padrão que faltarem entram no fim da linha 1)
+# - linhas_onde(): nº das linhas (1-based, já contando o cabeçalho) cujo valor na coluna casa
+#   — lê SÓ aquela coluna (1 col_values)
+# - apagar_linhas(): delete_rows em blocos contíguos, de baixo p/ cima (1 chamada por bloco)
+# Custo de escrita proporcional ao que mudou, não ao histórico da aba.
+
+from utils import sheets_cache
+
+
+def _blocos(linhas):
+    """[7, 3, 4, 5, 9] → [(9, 9), (7, 7), (3, 5)] (contíguos, do fim p/ o início)."""
+    out = []
+    for r in sorted(set(int(x) for x in linhas), reverse=True):
+        if out and out[-1][0] == r + 1:
+            out[-1] = (r, out[-1][1])
+        else:
+            out.append((r, r))
+    return out
+
+def acrescentar(ws, dicts, cabecalho_padrao=None, value_input_option="USER_ENTERED") -> int:
+    """Append das linhas (lista de dicts) casando chave ↔ cabeçalho (NFKC+casefold)."""
+    dicts = list(dicts)
+    if not dicts:
+        return 0
+    headers = sheets_cache.cabecalho(ws)
+    while headers and not str(headers[-1]).strip():
+        headers.pop()
+    hdr_norm = [sheets_cache._norm_key(h) for h in headers]
+    faltando = [c for c in (cabecalho_padrao or dict.fromkeys(k for d in dicts for k in d))
+                if sheets_cache._norm_key(c) not in hdr_norm]
+    if faltando:  # aba vazia ou sem alguma coluna padrão → completa a linha 1
+        headers += faltando
+        if len(headers) > ws.col_count:
+            ws.resize(cols=len(headers))
+        ws.update("A1", [headers])
+        sheets_cache.definir_cabecalho(ws, headers)
+        hdr_norm = [sheets_cache._norm_key(h) for h in headers]
+    rows = []
+    for d in dicts:
+        d_norm = {sheets_cache._norm_key(k): v for k, v in d.items()}
+        rows.append(["" if d_norm.get(h) is None else d_norm[h] for h in hdr_norm])
+    ws.append_rows(rows, value_input_option=value_input_option)
+    return len(rows)
+
+def linhas_onde(ws, coluna: str, valor) -> list:
+    """Linhas da aba com `coluna` == valor (comparação por str().strip())."""
+    pos = sheets_cache.col_map(ws).get(sheets_cache._norm_key(coluna))
+    if not pos:
+        return []
+    alvo = str(valor).strip()
+    vals = ws.col_values(pos)
+    return [i + 1 for i, v in enumerate(vals) if i > 0 and str(v).strip() == alvo]
+
+def apagar_linhas(ws, linhas) -> int:
+    """Apaga as linhas informadas em blocos contíguos; devolve quantas apagou."""
+    n = 0
+    for ini, fim in _blocos(r for r in linhas if int(r) >= 2):  # nunca o cabeçalho
+        ws.delete_rows(ini, fim)
+        n += fim - ini + 1
+    return n
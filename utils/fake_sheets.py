@@ -0,0 +1,414 @@
+# -*- coding: utf-8 -*-
+# utils/fake_sheets.py — Google Sheets FALSO (em memória) p/ testes offline e benchmarks
+# - Implementa só o subconjunto do gspread usado no repo:
+#     Spreadsheet: id, title, worksheets, worksheet, add_worksheet, values_get
+#     Worksheet:   get_all_values, get_all_records, get, row_values, col_values,
+#                  update, update_cell, update_cells, batch_update, append_row(s),
+#                  clear, delete_rows, resize, format
+#   (+ o que get_as_dataframe / set_with_dataframe precisam)
+# - Latência e quota (leituras/escritas por minuto) configuráveis
+# - Seleção por ambiente (os secrets de 1º nível do Streamlit também viram env):
+#     SHEETS_BACKEND=fake
+#     FAKE_SHEETS_DIR=<pasta com um CSV por aba, nome do arquivo = título da aba>
+#     FAKE_SHEETS_LATENCIA_MS=120
+#     FAKE_SHEETS_LIMITE_LEITURA=60   (por minuto; 0 = sem limite)
+#     FAKE_SHEETS_LIMITE_ESCRITA=60   (por minuto; 0 = sem limite)
+#     FAKE_SHEETS_QUOTA_MODO=erro|espera
+
+import os
+import re
+import csv
+import json
+import time
+import threading
+from collections import Counter, deque
+
+import requests
+import gspread
+from gspread.utils import a1_range_to_grid_range, rowcol_to_a1
+
+_NUM_RE = re.compile(r"^-?\d+(?:[.,]\d+)?$")
+
+# =========================
+# CONFIG
+# =========================
+def backend_fake_ativo() -> bool:
+    return (os.getenv("SHEETS_BACKEND") or "").strip().lower() == "fake"
+
+def _env_float(nome, default=0.0) -> float:
+    try:
+        return float(os.getenv(nome) or default)
+    except ValueError:
+        return float(default)
+
+# =========================
+# VALORES
+# =========================
+def _user_entered(v):
+    """Imita o USER_ENTERED do Sheets: texto numérico vira número; '=...' fica como está."""
+    if isinstance(v, bool) or v is None:
+        return "" if v is None else v
+    if isinstance(v, (int, float)):
+        return v
+    s = str(v)
+    if s.startswith("'"):
+        return s[1:]
+    t = s.strip()
+    if t.upper() in ("TRUE", "FALSE"):
+        return t.upper() == "TRUE"
+    if _NUM_RE.match(t):
+        f = float(t.replace(",", "."))
+        return int(f) if f.is_integer() and "." not in t and "," not in t else f
+    return s
+
+def _formatado(v) -> str:
+    """FORMATTED_VALUE simplificado (o que row_values/col_values/get_all_values devolvem)."""
+    if v is None or v == "":
+        return ""
+    if isinstance(v, bool):
+        return "TRUE" if v else "FALSE"
+    if isinstance(v, float) and v.is_integer():
+        return str(int(v))
+    return str(v)
+
+def _api_error(status: int, msg: str) -> gspread.exceptions.APIError:
+    r = requests.Response()
+    r.status_code = status
+    r._content = json.dumps({"error": {"code": status, "message": msg, "status": "RESOURCE_EXHAUSTED"}}).encode()
+    return gspread.exceptions.APIError(r)
+
+# =========================
+# CLIENTE (latência + quota + contadores)
+# =========================
+class FakeClient:
+    def __init__(self, latencia_ms=0.0, limite_leitura=0, limite_escrita=0, quota_modo="erro", pasta=None):
+        self.pasta = pasta
+        self.latencia_ms = float(latencia_ms)
+        self.limite_leitura = int(limite_leitura)
+        self.limite_escrita = int(limite_escrita)
+        self.quota_modo = quota_modo
+        self._planilhas = {}
+        self._lock = threading.RLock()
+        self._janela = {"leitura": deque(), "escrita": deque()}
+        self.chamadas = Counter()
+        self.latencia_total = 0.0
+
+    def _chamada(self, metodo: str, tipo: str):
+        limite = self.limite_leitura if tipo == "leitura" else self.limite_escrita
+        with self._lock:
+            self.chamadas[metodo] += 1
+            self.chamadas[f"__{tipo}__"] += 1
+            if limite:
+                jan = self._janela[tipo]
+                agora = time.monotonic()
+                while jan and agora - jan[0] >= 60:
+                    jan.popleft()
+                if len(jan) >= limite:
+                    if self.quota_modo != "espera":
+                        self.chamadas["__429__"] += 1
+                        raise _api_error(429, f"Quota exceeded ({tipo}) — fake_sheets")
+                    time.sleep(max(0.0, 60 - (agora - jan[0])))
+                    jan.popleft()
+                jan.append(time.monotonic())
+        if self.latencia_ms:
+            time.sleep(self.latencia_ms / 1000.0)
+            self.latencia_total += self.latencia_ms / 1000.0
+
+    def open_by_key(self, key: str):
+        self._chamada("open_by_key", "leitura")
+        with self._lock:
+            if key not in self._planilhas:
+                sh = FakeSpreadsheet(self, key)
+                if self.pasta and os.path.isdir(self.pasta):
+                    sh.carregar_dir(self.pasta)
+                self._planilhas[key] = sh
+            return self._planilhas[key]
+
+    def estatisticas(self) -> dict:
+        with self._lock:
+            d = dict(self.chamadas)
+        d["__latencia_s__"] = round(self.latencia_total, 3)
+        return d
+
+    def zerar_estatisticas(self):
+        with self._lock:
+            self.chamadas.clear()
+            self.latencia_total = 0.0
+
+# =========================
+# PLANILHA
+# =========================
+class FakeSpreadsheet:
+    def __init__(self, client: FakeClient, key: str, title: str = "Planilha fake"):
+        self.client = client
+        self.id = key
+        self.title = title
+        self._abas = []
+        self._prox_id = 0
+
+    def _nova_aba(self, title, rows, cols):
+        ws = FakeWorksheet(self, self._prox_id, title, rows, cols)
+        self._prox_id += 1
+        self._abas.append(ws)
+        return ws
+
+    def worksheets(self, exclude_hidden: bool = False):
+        self.client._chamada("worksheets", "leitura")
+        return list(self._abas)
+
+    def worksheet(self, title: str):
+        self.client._chamada("worksheet", "leitura")
+        for ws in self._abas:
+            if ws.title == title:
+                return ws
+        raise gspread.WorksheetNotFound(title)
+
+    def get_worksheet(self, index: int):
+        self.client._chamada("get_worksheet", "leitura")
+        return self._abas[index] if 0 <= index < len(self._abas) else None
+
+    @property
+    def sheet1(self):
+        return self.get_worksheet(0)
+
+    def add_worksheet(self, title: str, rows: int = 100, cols: int = 26, index=None):
+        self.client._chamada("add_worksheet", "escrita")
+        if any(ws.title == title for ws in self._abas):
+            raise _api_error(400, f'A sheet with the name "{title}" already exists.')
+        return self._nova_aba(title, int(rows), int(cols))
+
+    def values_get(self, range_name: str, params=None):
+        """Usado por get_as_dataframe: devolve a aba inteira (valores crus)."""
+        self.client._chamada("values_get", "leitura")
+        title = range_name.split("!")[0].strip("'").replace("''", "'")
+        for ws in self._abas:
+            if ws.title == title:
+                return {"range": range_name, "values": [list(r) for r in ws._dados]}
+        raise _api_error(400, f"Unable to parse range: {range_name}")
+
+    # ---- carga / descarga (CSV) ----
+    def carregar_csv(self, title: str, caminho: str):
+        with open(caminho, newline="", encoding="utf-8") as fh:
+            linhas = [[_user_entered(v) if v else "" for v in r] for r in csv.reader(fh)]
+        ws = next((w for w in self._abas if w.title == title), None)
+        if ws is None:
+            ws = self._nova_aba(title, max(len(linhas), 1000), max((len(r) for r in linhas), default=26))
+        ws._dados = linhas
+        ws._ajustar_tamanho(len(linhas), max((len(r) for r in linhas), default=0))
+        return ws
+
+    def carregar_dir(self, pasta: str):
+        for nome in sorted(os.listdir(pasta)):
+            if nome.lower().endswith(".csv"):
+                self.carregar_csv(nome[:-4], os.path.join(pasta, nome))
+
+    def salvar_dir(self, pasta: str):
+        os.makedirs(pasta, exist_ok=True)
+        for ws in self._abas:
+            with open(os.path.join(pasta, f"{ws.title}.csv"), "w", newline="", encoding="utf-8") as fh:
+                csv.writer(fh).writerows([[_formatado(v) for v in r] for r in ws._dados])
+
+# =========================
+# ABA
+# =========================
+class FakeWorksheet:
+    def __init__(self, spreadsheet: FakeSpreadsheet, ws_id: int, title: str, rows: int, cols: int):
+        self.spreadsheet = spreadsheet
+        self.spreadsheet_id = spreadsheet.id
+        self.client = spreadsheet.client
+        self.id = ws_id
+        self.title = title
+        self.row_count = rows
+        self.col_count = cols
+        self._dados = []   # lista de linhas (podem ter tamanhos diferentes)
+        self.formatos = {}  # range -> formato (só registra)
+
+    def __repr__(self):
+        return f"<FakeWorksheet {self.title!r} id:{self.id}>"
+
+    # ---- internos ----
+    def _ajustar_tamanho(self, rows: int, cols: int):
+        self.row_count = max(self.row_count, rows)
+        self.col_count = max(self.col_count, cols)
+
+    def _set(self, row: int, col: int, valor):
+        while len(self._dados) < row:
+            self._dados.append([])
+        linha = self._dados[row - 1]
+        if len(linha) < col:
+            linha.extend([""] * (col - len(linha)))
+        linha[col - 1] = valor
+        self._ajustar_tamanho(row, col)
+
+    def _grid(self, rng: str):
+        g = a1_range_to_grid_range(rng)
+        r0 = g.get("startRowIndex", 0)
+        c0 = g.get("startColumnIndex", 0)
+        r1 = g.get("endRowIndex", max(len(self._dados), r0 + 1))
+        c1 = g.get("endColumnIndex", max((len(r) for r in self._dados), default=c0 + 1))
+        return r0, c0, r1, c1
+
+    def _escrever_bloco(self, rng: str, values, value_input_option):
+        conv = _user_entered if value_input_option == "USER_ENTERED" else (lambda v: v)
+        r0, c0, _, _ = self._grid(rng.split("!")[-1])
+        for i, linha in enumerate(values or []):
+            for j, v in enumerate(linha):
+                self._set(r0 + i + 1, c0 + j + 1, conv(v))
+
+    # ---- leitura ----
+    def get_all_values(self, **kwargs):
+        self.client._chamada("get_all_values", "leitura")
+        largura = max((len(r) for r in self._dados), default=0)
+        return [[_formatado(v) for v in r] + [""] * (largura - len(r)) for r in self._dados]
+
+    def get_all_records(self, **kwargs):
+        vals = self.get_all_values()
+        if not vals:
+            return []
+        cab = vals[0]
+        return [dict(zip(cab, r)) for r in vals[1:]]
+
+    def get(self, range_name=None, value_render_option=None, **kwargs):
+        self.client._chamada("get", "leitura")
+        if not range_name:
+            return [list(r) for r in self._dados]
+        r0, c0, r1, c1 = self._grid(range_name)
+        crus = value_render_option == "UNFORMATTED_VALUE"
+        out = []
+        for r in self._dados[r0:r1]:
+            linha = r[c0:c1]
+            out.append(list(linha) if crus else [_formatado(v) for v in linha])
+        while out and not any(v != "" for v in out[-1]):
+            out.pop()
+        return out
+
+    def batch_get(self, ranges, value_render_option=None, **kwargs):
+        self.client._chamada("batch_get", "leitura")
+        out = []
+        for rng in ranges:
+            r0, c0, r1, c1 = self._grid(rng)
+            out.append([[_formatado(v) for v in r[c0:c1]] for r in self._dados[r0:r1]])
+        return out
+
+    def row_values(self, row: int, **kwargs):
+        self.client._chamada("row_values", "leitura")
+        if row > len(self._dados):
+            return []
+        vals = [_formatado(v) for v in self._dados[row - 1]]
+        while vals and vals[-1] == "":
+            vals.pop()
+        return vals
+
+    def col_values(self, col: int, **kwargs):
+        self.client._chamada("col_values", "leitura")
+        vals = [_formatado(r[col - 1]) if len(r) >= col else "" for r in self._dados]
+        while vals and vals[-1] == "":
+            vals.pop()
+        return vals
+
+    def acell(self, label: str, **kwargs):
+        self.client._chamada("acell", "leitura")
+        r0, c0, _, _ = self._grid(label)
+        v = self._dados[r0][c0] if r0 < len(self._dados) and c0 < len(self._dados[r0]) else ""
+        return gspread.Cell(r0 + 1, c0 + 1, _formatado(v))
+
+    # ---- escrita ----
+    def update(self, range_name=None, values=None, value_input_option="RAW", **kwargs):
+        # aceita update("A1", [[...]]) e update([[...]], "A1")
+        if isinstance(range_name, list):
+            range_name, values = values or "A1", range_name
+        self.client._chamada("update", "escrita")
+        self._escrever_bloco(range_name or "A1", values, value_input_option)
+        return {"updatedRange": range_name}
+
+    def update_cell(self, row: int, col: int, value):
+        self.client._chamada("update_cell", "escrita")
+        self._set(int(row), int(col), _user_entered(value))
+        return {"updatedRange": rowcol_to_a1(row, col)}
+
+    def update_cells(self, cell_list, value_input_option="RAW"):
+        self.client._chamada("update_cells", "escrita")
+        conv = _user_entered if value_input_option == "USER_ENTERED" else (lambda v: v)
+        for c in cell_list:
+            self._set(c.row, c.col, conv(c.value))
+        return {"updatedCells": len(cell_list)}
+
+    def batch_update(self, data, value_input_option="RAW", **kwargs):
+        self.client._chamada("batch_update", "escrita")
+        for item in data:
+            self._escrever_bloco(item["range"], item["values"], value_input_option)
+        return {"totalUpdatedCells": sum(len(r) for it in data for r in it["values"])}
+
+    def append_row(self, values, value_input_option="RAW", **kwargs):
+        return self.append_rows([values], value_input_option=value_input_option)
+
+    def append_rows(self, values, value_input_option="RAW", **kwargs):
+        self.client._chamada("append_rows", "escrita")
+        conv = _user_entered if value_input_option == "USER_ENTERED" else (lambda v: v)
+        # o Sheets acrescenta depois da última linha com conteúdo
+        while self._dados and not any(v != "" for v in self._dados[-1]):
+            self._dados.pop()
+        ini = len(self._dados) + 1
+        for linha in values:
+            self._dados.append([conv(v) for v in linha])
+        largura = max((len(r) for r in values), default=0)
+        self._ajustar_tamanho(len(self._dados), largura)
+        faixa = f"'{self.title}'!A{ini}:{rowcol_to_a1(len(self._dados), max(largura, 1))}"
+        return {"updates": {"updatedRange": faixa, "updatedRows": len(values)}}
+
+    def clear(self):
+        self.client._chamada("clear", "escrita")
+        self._dados = []
+        return {}
+
+    def delete_rows(self, start_index: int, end_index=None):
+        self.client._chamada("delete_rows", "escrita")
+        end_index = end_index or start_index
+        del self._dados[start_index - 1:end_index]
+        self.row_count = max(1, self.row_count - (end_index - start_index + 1))
+        return {}
+
+    def resize(self, rows=None, cols=None):
+        self.client._chamada("resize", "escrita")
+        if rows is not None:
+            self.row_count = int(rows)
+            del self._dados[self.row_count:]
+        if cols is not None:
+            self.col_count = int(cols)
+            for r in self._dados:
+                del r[self.col_count:]
+        return {}
+
+    def format(self, ranges, format=None):
+        self.client._chamada("format", "escrita")
+        self.formatos[str(ranges)] = format
+        return {}
+
+# =========================
+# SINGLETON (compartilhado pelo processo)
+# =========================
+_cliente = None
+_cliente_lock = threading.Lock()
+
+def cliente_fake() -> FakeClient:
+    global _cliente
+    with _cliente_lock:
+        if _cliente is None:
+            _cliente = FakeClient(
+                latencia_ms=_env_float("FAKE_SHEETS_LATENCIA_MS"),
+                limite_leitura=_env_float("FAKE_SHEETS_LIMITE_LEITURA"),
+                limite_escrita=_env_float("FAKE_SHEETS_LIMITE_ESCRITA"),
+                quota_modo=(os.getenv("FAKE_SHEETS_QUOTA_MODO") or "erro").strip().lower(),
+                pasta=(os.getenv("FAKE_SHEETS_DIR") or "").strip() or None,
+            )
+        return _cliente
+
+def abrir_planilha_fake(sheet_id: str) -> FakeSpreadsheet:
+    """Abre (ou cria) a planilha fake; na 1ª vez carrega os CSVs de FAKE_SHEETS_DIR."""
+    return cliente_fake().open_by_key(sheet_id)
+
+def resetar_cliente_fake():
+    """Descarta o cliente atual (dados + contadores); o próximo uso relê o ambiente."""
+    global _cliente
+    with _cliente_lock:
+        _cliente = None
@@ -0,0 +1,207 @@
+# -*- coding: utf-8 -*-
+# utils/linha_id.py — RowID estável por linha da "Base de Dados" + localizador RowID → linha
+# - Toda linha nova sai com RowID (carimbar / carimbar_df); a LEITURA não grava nada
+#   (registrar_lidas só normaliza e guarda o mapa). Linhas antigas sem RowID ganham um
+#   numa ação explícita (preencher_faltantes): só células vazias, conferindo antes que
+#   o cabeçalho e o nº de linhas não mudaram desde a leitura
+# - localizar(ws, rowids): mapa em cache (1 col_values por TTL) + conferência barata
+#   (1 batch_get só das células RowID das linhas alvo). Se alguém inseriu/apagou linhas
+#   no meio, a conferência falha, o mapa é relido e o nº certo é usado — sem reler a base
+# - Quem grava mantém o mapa: registrar_append() / registrar_delete() / definir()
+# Substitui o "linha = idx + 2" calculado na hora da leitura.
+
+import re
+import time
+import bisect
+import uuid
+import threading
+
+import pandas as pd
+from gspread.utils import rowcol_to_a1
+
+from utils import sheets_cache
+
+COL_ROWID = "RowID"
+TTL_PADRAO = sheets_cache.TTL_PADRAO
+
+_lock = threading.RLock()
+_mapas = {}   # (sheet_id, ws_id) -> (ts, {rowid: linha})
+_RE_FAIXA = re.compile(r"![A-Z]+(\d+)(?::[A-Z]+(\d+))?$")
+
+
+def novo_rowid() -> str:
+    """'R' + 15 hex — o prefixo impede o Sheets/pandas de ler o RowID como número."""
+    return "R" + uuid.uuid4().hex[:15]
+
+def _vazio(v) -> bool:
+    return v is None or (isinstance(v, float) and pd.isna(v)) or str(v).strip() in ("", "nan")
+
+# =========================
+# CARIMBO (inserções)
+# =========================
+def carimbar(dicts) -> list:
+    """Garante RowID em cada dict de linha nova (in place); devolve a lista de RowIDs."""
+    out = []
+    for d in dicts:
+        if _vazio(d.get(COL_ROWID)):
+            d[COL_ROWID] = novo_rowid()
+        out.append(str(d[COL_ROWID]))
+    return out
+
+def carimbar_df(df: pd.DataFrame) -> pd.DataFrame:
+    """Preenche RowID vazio no DataFrame (in place) e devolve o df."""
+    if COL_ROWID not in df.columns:
+        df[COL_ROWID] = ""
+    col = df[COL_ROWID].astype(object)
+    falta = col.map(_vazio)
+    if falta.any():
+        col[falta] = [novo_rowid() for _ in range(int(falta.sum()))]
+    df[COL_ROWID] = col.astype(str)
+    return df
+
+def garantir_coluna(ws) -> int:
+    """Nº (1-based) da coluna RowID; cria no fim do cabeçalho se não existir."""
+    pos = sheets_cache.col_map(ws).get(sheets_cache._norm_key(COL_ROWID))
+    if pos:
+        return pos
+    headers = list(sheets_cache.cabecalho(ws))
+    while headers and not str(headers[-1]).strip():
+        headers.pop()
+    pos = len(headers) + 1
+    if pos > ws.col_count:
+        ws.resize(cols=pos)
+    ws.update_cell(1, pos, COL_ROWID)
+    sheets_cache.definir_cabecalho(ws, headers + [COL_ROWID])
+    return pos
+
+def registrar_lidas(ws, df: pd.DataFrame, linha_de=lambda i: int(i) + 2) -> pd.DataFrame:
+    """Para um df recém-lido da aba: coluna RowID como texto (sem RowID → "") e mapa RowID → linha.
+    Não grava na planilha; o mapa é conferido por localizar() antes de cada escrita."""
+    if COL_ROWID not in df.columns:
+        df[COL_ROWID] = ""
+    col = df[COL_ROWID].astype(object)
+    df[COL_ROWID] = col.where(~col.map(_vazio), "").astype(str).str.strip()
+    if not df.empty:
+        definir(ws, df[COL_ROWID], [linha_de(i) for i in df.index])
+    return df
+
+# =========================
+# PREENCHIMENTO (ação explícita)
+# =========================
+def faltantes(ws) -> dict:
+    """Retrato da aba para preencher_faltantes: cabeçalho, nº de linhas e linhas com dados sem RowID."""
+    valores = ws.get_all_values()
+    headers = valores[0] if valores else []
+    pos = next((i + 1 for i, h in enumerate(headers)
+                if sheets_cache._norm_key(h) == sheets_cache._norm_key(COL_ROWID)), None)
+    linhas = []
+    for ln, row in enumerate(valores[1:], start=2):
+        if not any(str(v).strip() for v in row):
+            continue  # linha em branco não ganha RowID
+        if pos is None or len(row) < pos or _vazio(row[pos - 1]):
+            linhas.append(ln)
+    return {"headers": headers, "n_linhas": len(valores), "linhas": linhas}
+
+def preencher_faltantes(ws, retrato: dict) -> int:
+    """Grava RowID só nas células vazias de retrato["linhas"]; devolve quantas.
+    Se o cabeçalho ou o nº de linhas mudou desde o retrato, não grava nada (ValueError)."""
+    if not retrato["linhas"]:
+        return 0
+    valores = ws.get_all_values()
+    if not valores or valores[0] != retrato["headers"] or len(valores) != retrato["n_linhas"]:
+        raise ValueError("A aba mudou desde a leitura (cabeçalho ou nº de linhas); leia de novo.")
+    pos = garantir_coluna(ws)
+    data = [{"range": rowcol_to_a1(ln, pos), "values": [[novo_rowid()]]} for ln in retrato["linhas"]]
+    for i in range(0, len(data), 500):
+        ws.batch_update(data[i:i + 500], value_input_option="RAW")
+    invalidar(ws)  # o próximo localizar relê a coluna inteira
+    return len(data)
+
+# =========================
+# LOCALIZADOR
+# =========================
+def _key(ws):
+    return (sheets_cache._sheet_id_ws(ws), ws.id)
+
+def mapa(ws, ttl: float = TTL_PADRAO, refresh: bool = False) -> dict:
+    """{RowID: linha} da aba; 1 col_values por TTL."""
+    with _lock:
+        hit = _mapas.get(_key(ws))
+        if hit and not refresh and (time.monotonic() - hit[0]) < ttl:
+            return hit[1]
+    pos = sheets_cache.col_map(ws, ttl=ttl).get(sheets_cache._norm_key(COL_ROWID))
+    vals = ws.col_values(pos) if pos else []
+    m = {str(v).strip(): i + 1 for i, v in enumerate(vals) if i > 0 and str(v).strip()}
+    with _lock:
+        _mapas[_key(ws)] = (time.monotonic(), m)
+    return m
+
+def definir(ws, rowids, linhas):
+    """Registra o mapa completo (ex.: logo após ler ou reescrever a aba inteira)."""
+    m = {str(r).strip(): int(ln) for r, ln in zip(rowids, linhas) if str(r).strip()}
+    with _lock:
+        _mapas[_key(ws)] = (time.monotonic(), m)
+
+def _conferir(ws, alvo: dict) -> bool:
+    if not alvo:
+        return True
+    pos = sheets_cache.col_map(ws).get(sheets_cache._norm_key(COL_ROWID))
+    if not pos:
+        return False
+    itens = list(alvo.items())
+    vals = ws.batch_get([rowcol_to_a1(ln, pos) for _, ln in itens])
+    for (rid, _), v in zip(itens, vals):
+        atual = v[0][0] if v and v[0] else ""
+        if str(atual).strip() != rid:
+            return False
+    return True
+
+def localizar(ws, rowids, conferir: bool = True) -> dict:
+    """{RowID: linha atual} dos RowIDs pedidos (os que não existem mais ficam de fora)."""
+    rowids = [str(r).strip() for r in rowids if str(r).strip()]
+    m = mapa(ws)
+    alvo = {r: m[r] for r in rowids if r in m}
+    if len(alvo) == len(rowids) and (not conferir or _conferir(ws, alvo)):
+        return alvo
+    m = mapa(ws, refresh=True)
+    return {r: m[r] for r in rowids if r in m}
+
+def registrar_append(ws, rowids, resposta=None):
+    """Após append_rows: usa o updatedRange da resposta p/ saber as linhas novas;
+    sem ele, invalida (o próximo localizar relê a coluna)."""
+    faixa = ((resposta or {}).get("updates") or {}).get("updatedRange", "")
+    achou = _RE_FAIXA.search(faixa)
+    with _lock:
+        hit = _mapas.get(_key(ws))
+        if not hit:
+            return
+        if not achou:
+            _mapas.pop(_key(ws), None)
+            return
+        ini = int(achou.group(1))
+        for k, rid in enumerate(rowids):
+            hit[1][str(rid).strip()] = ini + k
+
+def registrar_delete(ws, linhas):
+    """Após apagar linhas: tira do mapa e desloca as de baixo."""
+    apagadas = sorted(int(x) for x in set(linhas))
+    if not apagadas:
+        return
+    with _lock:
+        hit = _mapas.get(_key(ws))
+        if not hit:
+            return
+        novo = {}
+        for rid, ln in hit[1].items():
+            k = bisect.bisect_left(apagadas, ln)
+            if k < len(apagadas) and apagadas[k] == ln:
+                continue
+            novo[rid] = ln - k
+        _mapas[_key(ws)] = (hit[0], novo)
+
+def invalidar(ws=None):
+    with _lock:
+        if ws is None:
+            _mapas.clear()
+        else:
+            _mapas.pop(_key(ws), None)
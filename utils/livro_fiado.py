@@ -0,0 +1,160 @@
+# -*- coding: utf-8 -*-
+# utils/livro_fiado.py — livro-razão dos FIADOS EM ABERTO (11_Fiado)
+# - Montado 1x por versão da base (a página guarda em cache_resource com TTL)
+# - abertas : linhas com StatusFiado == "Em aberto" (+ ValorNum, DataDt, Venc)
+# - ids     : 1 linha por (IDLancFiado, Cliente) → total em aberto, qtde, combo, serviços,
+#             vencimento, período, data de registro e RowIDs das linhas
+# - por cliente: índice groupby → fiados/linhas/histórico do cliente sem varrer a base
+# - quitar()/lancar(): atualizam o livro NO LUGAR depois de gravar na planilha
+#   (RLock: o objeto é compartilhado entre sessões; consultas e mudanças passam pelo lock)
+# Nº da linha na planilha NÃO fica aqui: quem grava resolve RowID → linha com utils.linha_id.
+
+import threading
+from datetime import datetime
+
+import pandas as pd
+
+DATA_FMT = "%d/%m/%Y"
+STATUS_ABERTO = "Em aberto"
+
+
+def _data_reg_do_id(idl) -> pd.Timestamp:
+    """L-YYYYMMDDHHMMSSmmm → data de registro (NaT se não der)."""
+    digs = "".join(ch for ch in str(idl) if ch.isdigit())
+    try:
+        return pd.Timestamp(datetime.strptime(digs[:8], "%Y%m%d")) if len(digs) >= 8 else pd.NaT
+    except ValueError:
+        return pd.NaT
+
+def _periodo_unico(s: pd.Series) -> str:
+    vals = {v for v in s.astype(str).str.strip() if v}
+    return next(iter(vals)) if len(vals) == 1 else ""
+
+def _servicos(s: pd.Series) -> str:
+    servs = sorted({v for v in s.astype(str).str.strip() if v})
+    return "+".join(servs) if servs else "-"
+
+
+class LivroFiado:
+    def __init__(self, base: pd.DataFrame):
+        """base = read_base_raw() (strings, fillna(""), índice alinhado à planilha)."""
+        self.base = base
+        self._lock = threading.RLock()
+        self._reindexar_clientes()
+        self._montar_abertas()
+
+    # ---------- montagem ----------
+    def _reindexar_clientes(self):
+        cli = self.base.get("Cliente", pd.Series("", index=self.base.index)).astype(str).str.strip()
+        self._idx_cliente = dict(cli.groupby(cli, sort=False).groups)  # cliente → Index das linhas
+
+    def _preparar(self, df: pd.DataFrame) -> pd.DataFrame:
+        df = df.copy()
+        df["_cli"] = df["Cliente"].astype(str).str.strip()
+        df["ValorNum"] = pd.to_numeric(df["Valor"], errors="coerce").fillna(0.0)
+        df["DataDt"] = pd.to_datetime(df["Data"], format=DATA_FMT, errors="coerce")
+        df["Venc"] = pd.to_datetime(df["VencimentoFiado"].astype(str), format=DATA_FMT, errors="coerce")
+        return df
+
+    def _montar_abertas(self):
+        st_col = self.base.get("StatusFiado", pd.Series("", index=self.base.index))
+        self.abertas = self._preparar(self.base[st_col == STATUS_ABERTO])
+        self.ids = self.resumir(self.abertas)
+
+    @staticmethod
+    def resumir(ab: pd.DataFrame) -> pd.DataFrame:
+        """1 linha por (IDLancFiado, Cliente) das linhas em aberto informadas."""
+        cols = ["IDLancFiado", "Cliente", "Data", "ValorTotal", "QtdeServicos", "Combo", "VencPrimeiro",
+                "VencMin", "Periodo", "RegistradoEm", "Servicos", "RowIDs"]
+        if ab.empty:
+            return pd.DataFrame(columns=cols)
+        g = ab.groupby(["IDLancFiado", "_cli"], sort=True)
+        out = g.agg(Data=("DataDt", "min"), ValorTotal=("ValorNum", "sum"), QtdeServicos=("Serviço", "count"),
+                    Combo=("Combo", "first"), VencPrimeiro=("Venc", "first"), VencMin=("Venc", "min"),
+                    RowIDs=("RowID", list))
+        out["Periodo"] = g["Período"].agg(_periodo_unico)
+        out["Servicos"] = g["Serviço"].agg(_servicos)
+        out = out.reset_index().rename(columns={"_cli": "Cliente"})
+        out["RegistradoEm"] = out["IDLancFiado"].map(_data_reg_do_id)
+        return out[cols]
+
+    # ---------- consultas ----------
+    def clientes(self) -> list:
+        with self._lock:
+            return sorted(c for c in self.ids["Cliente"].unique() if c)
+
+    def ids_do_cliente(self, cliente: str) -> pd.DataFrame:
+        with self._lock:
+            return self.ids[self.ids["Cliente"] == str(cliente).strip()]
+
+    def abertas_do_cliente(self, cliente: str) -> pd.DataFrame:
+        with self._lock:
+            return self.abertas[self.abertas["_cli"] == str(cliente).strip()]
+
+    def selecao(self, ids=None, idxs=None) -> pd.DataFrame:
+        """Linhas em aberto por IDLancFiado (combo inteiro) ou por índice da base."""
+        with self._lock:
+            if ids is not None:
+                return self.abertas[self.abertas["IDLancFiado"].isin(list(ids))]
+            return self.abertas[self.abertas.index.isin(list(idxs or []))]
+
+    def linhas_do_cliente(self, cliente: str) -> pd.DataFrame:
+        """Todas as linhas (pagas ou não) do cliente, via índice — O(linhas do cliente)."""
+        with self._lock:
+            idx = self._idx_cliente.get(str(cliente).strip())
+            return self.base.loc[idx] if idx is not None else self.base.iloc[0:0]
+
+    @staticmethod
+    def dias_atraso(venc: pd.Series, hoje) -> pd.Series:
+        d = (pd.Timestamp(hoje) - venc).dt.days
+        return d.where(d > 0, 0).fillna(0).astype(int)
+
+    def retrato(self):
+        """(base, abertas, ids) do mesmo instante — para telas que leem os três juntos."""
+        with self._lock:
+            return self.base, self.abertas, self.ids
+
+    def total_aberto(self) -> float:
+        with self._lock:
+            return float(self.abertas["ValorNum"].sum())
+
+    # ---------- manutenção ----------
+    def quitar(self, valores_por_idx: dict):
+        """Aplica na base os campos gravados {idx: {col: valor}} e tira as linhas do aberto."""
+        with self._lock:
+            for i, campos in valores_por_idx.items():
+                for col, val in campos.items():
+                    if col not in self.base.columns:
+                        self.base[col] = ""
+                    elif self.base[col].dtype != object:
+                        self.base[col] = self.base[col].astype(object)
+                    self.base.at[i, col] = val
+            self._atualizar_abertas(list(valores_por_idx))
+
+    def lancar(self, novas_dicts):
+        """Linhas acabadas de anexar no fim da aba (append_rows) entram na base e no livro."""
+        novas_dicts = list(novas_dicts)
+        if not novas_dicts:
+            return
+        with self._lock:
+            ini = int(self.base.index.max()) + 1 if len(self.base) else 0
+            novas = pd.DataFrame(novas_dicts, index=range(ini, ini + len(novas_dicts)))
+            novas = novas.reindex(columns=self.base.columns, fill_value="").fillna("")
+            self.base = pd.concat([self.base, novas])
+            cli = novas["Cliente"].astype(str).str.strip()
+            for c, idx in cli.groupby(cli, sort=False).groups.items():
+                ant = self._idx_cliente.get(c)
+                self._idx_cliente[c] = ant.append(idx) if ant is not None else idx
+            self._atualizar_abertas(list(novas.index))
+
+    def _atualizar_abertas(self, idxs):
+        """Recalcula só os IDs tocados (linhas em idxs); chamar com o lock."""
+        toc = self.base.loc[idxs]
+        ids_toc = set(toc["IDLancFiado"].astype(str))
+        ainda = self._preparar(toc[toc["StatusFiado"] == STATUS_ABERTO])
+        resto = self.abertas[~self.abertas.index.isin(idxs)]
+        self.abertas = (pd.concat([resto, ainda]) if not ainda.empty else resto).sort_index()
+        afetadas = self.abertas[self.abertas["IDLancFiado"].astype(str).isin(ids_toc)]
+        manter = self.ids[~self.ids["IDLancFiado"].astype(str).isin(ids_toc)]
+        self.ids = (pd.concat([manter, self.resumir(afetadas)]) if not afetadas.empty else manter)
+        self.ids = self.ids.sort_values(["IDLancFiado", "Cliente"]).reset_index(drop=True)
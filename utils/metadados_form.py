@@ -0,0 +1,90 @@
+# -*- coding: utf-8 -*-
+# utils/metadados_form.py — listas e sugestões dos FORMULÁRIOS de atendimento/fiado
+# - Montado 1x por versão da base (a página guarda em cache_resource); rerun do form só lê daqui
+# - Listas ordenadas de Clientes / Serviços / Contas / Combos (opcional: só de um ano)
+# - Por cliente: último (Conta, Período, Funcionário, Combo) e última Conta que não foi fiado
+# - acrescentar(): linhas recém-gravadas entram no lugar, sem reler a base
+
+import threading
+
+import pandas as pd
+
+DATA_FMT = "%d/%m/%Y"
+LISTAS = {"clientes": "Cliente", "servicos": "Serviço", "contas": "Conta", "combos": "Combo"}
+CAMPOS_ULTIMO = ["Conta", "Período", "Funcionário", "Combo"]
+
+
+def _txt(df: pd.DataFrame, col: str) -> pd.Series:
+    if col not in df.columns:
+        return pd.Series("", index=df.index)
+    return df[col].fillna("").astype(str).str.strip()
+
+
+class MetadadosForm:
+    def __init__(self, df: pd.DataFrame, ano: int | None = None, data_fmt: str = DATA_FMT):
+        """ano: as listas só consideram linhas desse ano (sugestões usam o histórico todo)."""
+        self.ano, self.data_fmt = ano, data_fmt
+        self._lock = threading.RLock()
+        self._valores = {k: set() for k in LISTAS}
+        self._ordenadas = {}
+        self._ultimo = {}       # cliente → (data, {Conta, Período, Funcionário, Combo})
+        self._ultima_paga = {}  # cliente → (data, Conta) — ignora fiado
+        self.acrescentar(df)
+
+    def acrescentar(self, df: pd.DataFrame):
+        """Soma linhas (na ordem da planilha) às listas e às últimas escolhas de cada cliente."""
+        if df is None or df.empty:
+            return
+        d = pd.DataFrame({c: _txt(df, c) for c in ["Cliente", *CAMPOS_ULTIMO, "Serviço"]})
+        d["_dt"] = pd.to_datetime(_txt(df, "Data"), format=self.data_fmt, errors="coerce")
+        lst = d if self.ano is None else d[d["_dt"].dt.year == self.ano]
+        hist = d[d["_dt"].notna() & (d["Cliente"] != "")].sort_values("_dt", kind="stable")
+        ultimo = hist.groupby("Cliente", sort=False).tail(1)
+        pagas = hist[(hist["Conta"] != "") & (hist["Conta"].str.lower() != "fiado")]
+        ultima_paga = pagas.groupby("Cliente", sort=False).tail(1)
+        with self._lock:
+            for k, col in LISTAS.items():
+                self._valores[k].update(v for v in lst[col].unique() if v)
+            self._ordenadas.clear()
+            for r in ultimo[["Cliente", "_dt", *CAMPOS_ULTIMO]].itertuples(index=False):
+                ant = self._ultimo.get(r[0])
+                if ant is None or r[1] >= ant[0]:
+                    self._ultimo[r[0]] = (r[1], dict(zip(CAMPOS_ULTIMO, r[2:])))
+            for cli, dt, conta in ultima_paga[["Cliente", "_dt", "Conta"]].itertuples(index=False):
+                ant = self._ultima_paga.get(cli)
+                if ant is None or dt >= ant[0]:
+                    self._ultima_paga[cli] = (dt, conta)
+
+    # ---------- consultas ----------
+    def lista(self, nome: str) -> list:
+        """clientes / servicos / contas / combos, ordenadas."""
+        with self._lock:
+            out = self._ordenadas.get(nome)
+            if out is None:
+                out = self._ordenadas[nome] = sorted(self._valores[nome])
+            return out
+
+    @property
+    def clientes(self) -> list:
+        return self.lista("clientes")
+
+    @property
+    def servicos(self) -> list:
+        return self.lista("servicos")
+
+    @property
+    def contas(self) -> list:
+        return self.lista("contas")
+
+    @property
+    def combos(self) -> list:
+        return self.lista("combos")
+
+    def ultimo(self, cliente: str) -> dict | None:
+        """{Conta, Período, Funcionário, Combo} do último atendimento datado do cliente."""
+        hit = self._ultimo.get(str(cliente or "").strip())
+        return hit[1] if hit else None
+
+    def ultima_conta_paga(self, cliente: str) -> str | None:
+        hit = self._ultima_paga.get(str(cliente or "").strip())
+        return hit[1] if hit else None
@@ -0,0 +1,160 @@
+# -*- coding: utf-8 -*-
+# utils/perfil_cliente.py — perfis por cliente PRONTOS (2_Detalhes_Cliente)
+# - Montado 1x por versão da base (a página guarda em cache_resource)
+# - Índice groupby Cliente → posições: fatiar um cliente custa O(linhas do cliente),
+#   não uma varredura da base a cada seleção
+# - Situação de pagamento (não fiado / fiado quitado / fiado em aberto) vira 1 coluna
+#   categórica na montagem; o filtro da tela só escolhe quais situações entram
+# - perfil(): dict de frames pequenos (histórico, receita mensal, serviços, caixinha,
+#   períodos, fiado, ...) montado na 1ª visita ao cliente e memorizado — trocar de
+#   cliente e voltar não recalcula nada
+
+import re
+import threading
+
+import pandas as pd
+
+FUNC_JPAULO = "JPaulo"
+FUNC_VINICIUS = "Vinicius"
+PERIODOS = ["Manhã", "Tarde", "Noite"]
+NOMES_COL_PERIODO = {"periodo", "período", "periodododia", "periodo_dia", "periodoatendimento",
+                     "turno", "faixahoraria"}
+COLS_HISTORICO = ["Data_str", "Serviço", "Tipo", "Valor", "Funcionário", "Período"]
+COLS_CAIXINHA = ["CaixinhaDia", "Caixinha_Fundo", "CaixinhaFundo"]
+
+# situação de pagamento que entra em cada opção do filtro da tela
+FILTROS = {
+    "pagos": ("nao_fiado", "quitado"),
+    "fiado": ("aberto",),
+    "tudo": ("nao_fiado", "quitado", "aberto"),
+}
+
+
+def _sem_acento(s: pd.Series) -> pd.Series:
+    return (s.astype(str).str.strip().fillna("").str.lower()
+             .str.replace("ã", "a").str.replace("á", "a").str.replace("â", "a").str.replace("ç", "c"))
+
+def _periodo(x) -> str | None:
+    s = str(x).strip().lower().replace("ã", "a").replace("á", "a").replace("â", "a").replace("é", "e")
+    if s.startswith("man"):
+        return "Manhã"
+    if s.startswith("tar"):
+        return "Tarde"
+    if s.startswith("noi"):
+        return "Noite"
+    return None  # fora de Manhã/Tarde/Noite → ignorado
+
+def situacao_pagamento(df: pd.DataFrame) -> pd.Series:
+    """nao_fiado / quitado (Conta fiado + StatusFiado 'pag…' ou DataPagamento) / aberto."""
+    vazio = pd.Series("", index=df.index)
+    conta = _sem_acento(df["Conta"]) if "Conta" in df.columns else vazio
+    status = _sem_acento(df["StatusFiado"]) if "StatusFiado" in df.columns else vazio
+    if "DataPagamento" in df.columns:
+        s_pag = df["DataPagamento"]
+        if pd.api.types.is_datetime64_any_dtype(s_pag):
+            tem_pag = s_pag.notna()
+        else:
+            tem_pag = s_pag.astype(str).str.strip().ne("") & s_pag.notna()
+    else:
+        tem_pag = pd.Series(False, index=df.index)
+    fiado = conta.eq("fiado")
+    quitado = fiado & (status.str.contains("pag", na=False) | tem_pag)
+    sit = pd.Series("nao_fiado", index=df.index)
+    sit[quitado] = "quitado"
+    sit[fiado & ~quitado] = "aberto"
+    return sit.astype(pd.CategoricalDtype(["nao_fiado", "quitado", "aberto"]))
+
+
+class PerfisClientes:
+    def __init__(self, df: pd.DataFrame):
+        """df = carregar_dados() da página (Data datetime, ValorNumBruto, CaixinhaDiaTotal, Visita)."""
+        self.df = df.assign(ValorNum=df["ValorNumBruto"].astype(float), _pagto=situacao_pagamento(df))
+        if "CaixinhaDiaTotal" not in self.df.columns:
+            self.df["CaixinhaDiaTotal"] = 0.0
+        self.df["CaixinhaDiaTotal"] = self.df["CaixinhaDiaTotal"].astype(float).fillna(0.0)
+        self._pos = self.df.groupby("Cliente", sort=False).indices  # cliente → posições
+        self.col_periodo = next((c for c in self.df.columns
+                                 if re.sub(r"[\W_]+", "", str(c).strip().lower()) in NOMES_COL_PERIODO), None)
+        self.contagem = self.df["_pagto"].value_counts().to_dict()
+        self._perfis = {}
+        self._lock = threading.RLock()  # objeto compartilhado entre sessões (cache_resource)
+
+    def clientes(self) -> list:
+        return sorted(c for c in self._pos if pd.notna(c))
+
+    def linhas(self, cliente: str) -> pd.DataFrame:
+        pos = self._pos.get(cliente)
+        return self.df.take(pos) if pos is not None else self.df.iloc[0:0]
+
+    def perfil(self, cliente: str, filtro: str = "pagos", historico_filtrado: bool = False) -> dict:
+        chave = (cliente, filtro, bool(historico_filtrado))
+        with self._lock:
+            p = self._perfis.get(chave)
+            if p is None:
+                p = self._perfis[chave] = self._montar(cliente, filtro, bool(historico_filtrado))
+            return p
+
+    # ---------- montagem do perfil ----------
+    def _montar(self, cliente: str, filtro: str, historico_filtrado: bool) -> dict:
+        todas = self.linhas(cliente)
+        val = todas[todas["_pagto"].isin(FILTROS[filtro])]  # gráficos/somas
+        hist = val if historico_filtrado else todas         # tabela/contagens
+        p = {"historico": self._historico(hist), "fiado": self._historico(todas[todas["_pagto"] == "aberto"])}
+        p.update(self._periodos(val))
+        p.update(self._caixinha(val))
+        p["receita_mensal"] = self._receita_mensal(val)
+        p["servicos"] = (val.groupby(["Serviço", "Tipo"])["ValorNum"].sum()
+                            .reset_index().sort_values("ValorNum", ascending=False))
+        unicos = hist.drop_duplicates(subset=["Cliente", "Data", "Funcionário"])
+        por_func = unicos["Funcionário"].value_counts().reset_index()
+        por_func.columns = ["Funcionário", "Qtd Atendimentos"]
+        p["por_funcionario"] = por_func
+        por_dia = todas.groupby("Data").size()
+        p["resumo"] = pd.DataFrame({"Total Atendimentos": [len(por_dia)],
+                                    "Qtd Combos": [int((por_dia > 1).sum())],
+                                    "Qtd Simples": [int((por_dia == 1).sum())]})
+        p["visitas"] = todas.drop_duplicates(subset=["Visita"])["Data"].sort_values().tolist()
+        meses_ativos = hist["Mês_Ano"].nunique()
+        p["metricas"] = {
+            "meses_ativos": meses_ativos,
+            "gasto_mensal_medio": (val["ValorNum"].sum() / meses_ativos) if meses_ativos > 0 else 0,
+            "mais_frequente": hist["Funcionário"].mode()[0] if not hist.empty else "Indefinido",
+            "ticket_medio": val["ValorNum"].mean() if not val.empty else 0,
+            "visitas_periodo": val["Data"].dt.normalize().nunique(),
+        }
+        return p
+
+    def _historico(self, d: pd.DataFrame) -> pd.DataFrame:
+        cols = [c for c in COLS_HISTORICO if c in d.columns]
+        return d.sort_values("Data", ascending=False)[cols].rename(columns={"Data_str": "Data"})
+
+    def _periodos(self, val: pd.DataFrame) -> dict:
+        if not self.col_periodo:
+            return {"periodos": None, "periodo_preferido": "Sem registro"}
+        counts = val[self.col_periodo].map(_periodo).value_counts()
+        dist = pd.DataFrame({"Período": PERIODOS, "Qtd": [int(counts.get(p, 0)) for p in PERIODOS]})
+        pref = dist.sort_values("Qtd", ascending=False).iloc[0]["Período"] if dist["Qtd"].sum() else "Sem registro"
+        return {"periodos": dist, "periodo_preferido": pref}
+
+    def _caixinha(self, val: pd.DataFrame) -> dict:
+        func = val["Funcionário"].str.casefold()
+        cx = val["CaixinhaDiaTotal"]
+        por_func = (val.groupby("Funcionário", dropna=False)["CaixinhaDiaTotal"].sum().reset_index()
+                       .rename(columns={"CaixinhaDiaTotal": "Caixinha"}).sort_values("Caixinha", ascending=False))
+        cols = ["Data_str", "Funcionário"] + [c for c in COLS_CAIXINHA if c in val.columns] + ["CaixinhaDiaTotal"]
+        return {
+            "caixinha": {"total": float(cx.sum()),
+                         "jpaulo": float(cx[func == FUNC_JPAULO.casefold()].sum()),
+                         "vinicius": float(cx[func == FUNC_VINICIUS.casefold()].sum())},
+            "caixinha_func": por_func,
+            "caixinha_linhas": val.loc[cx > 0, cols],
+        }
+
+    def _receita_mensal(self, val: pd.DataFrame) -> pd.DataFrame:
+        """Valor e Valor+Caixinha por mês, com meses sem visita = 0 entre o 1º e o último."""
+        m = (val.assign(Data_Ref_Mensal=val["Data"].dt.to_period("M").dt.to_timestamp(),
+                        ValorComCx=val["ValorNum"] + val["CaixinhaDiaTotal"])
+                .groupby("Data_Ref_Mensal")[["ValorNum", "ValorComCx"]].sum())
+        if not m.empty:
+            m = m.reindex(pd.date_range(m.index.min(), m.index.max(), freq="MS"), fill_value=0.0)
+        return m.rename_axis("Data_Ref_Mensal").reset_index()
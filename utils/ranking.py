@@ -0,0 +1,200 @@
+# -*- coding: utf-8 -*-
+# utils/ranking.py — motor de RANKING de clientes com totais acumulados (Top K)
+# - Estado por (Ano, Mês, Funcionário) → {Cliente: [Valor, Caixinha, Linhas, Produtos, Dias, Combos]}
+#   + os mesmos totais no ano inteiro (Mês 0) e em todos os anos (Ano 0)
+#   + Funcionário "" = salão inteiro (dias distintos contados no salão, não somados por funcionário)
+# - Dias/Combos saem das contagens por (Cliente, Funcionário, dia): 1 atendimento por dia;
+#   combo = dia com mais de 1 linha
+# - acrescentar(): só as linhas novas entram; nada é reagrupado do zero
+#   sincronizar(df): base relida com linhas a mais no fim → acrescenta só o final
+#   (confere a impressão digital de TODAS as linhas já consumidas; editou/apagou no meio → remonta)
+# - Valor/Caixinha em float; Linhas/Produtos/Dias/Combos sempre int
+# - top(k): heapq.nlargest sobre os totais do recorte (sem ordenar todos os clientes)
+# - registrar()/movimentos(): sobe/desce/entrou/saiu em relação ao ranking anterior guardado
+
+import heapq
+import threading
+
+import numpy as np
+import pandas as pd
+
+TODOS = ""  # chave do salão inteiro
+MEDIDAS = ["Valor", "Caixinha", "Linhas", "Produtos", "Dias", "Combos"]
+DINHEIRO = MEDIDAS[:2]
+CONTAGENS = MEDIDAS[2:]
+_I = {m: i for i, m in enumerate(MEDIDAS)}
+
+
+def movimentos(anterior: list, atual: list):
+    """(subiram, caíram, entraram, saíram) — posições 1-based."""
+    pos_prev = {n: i + 1 for i, n in enumerate(anterior)}
+    pos_curr = {n: i + 1 for i, n in enumerate(atual)}
+    ups, downs, new, out = [], [], [], []
+    for n in atual:
+        if n in pos_prev:
+            if pos_curr[n] < pos_prev[n]:
+                ups.append((n, pos_prev[n], pos_curr[n]))
+            elif pos_curr[n] > pos_prev[n]:
+                downs.append((n, pos_prev[n], pos_curr[n]))
+        else:
+            new.append((n, pos_curr[n]))
+    for n in anterior:
+        if n not in pos_curr:
+            out.append((n, pos_prev[n]))
+    return ups, downs, new, out
+
+
+class Ranking:
+    def __init__(self, df: pd.DataFrame | None = None, col_valor: str = "Valor",
+                 col_caixinha: str | None = None, col_produto: str | None = None):
+        """col_caixinha: coluna numérica somada em Caixinha; col_produto: coluna booleana (linha é produto)."""
+        self.col_valor, self.col_caixinha, self.col_produto = col_valor, col_caixinha, col_produto
+        self._lock = threading.RLock()
+        self._ranks = {}
+        self._limpar()
+        if df is not None:
+            self.acrescentar(df)
+
+    def _limpar(self):
+        self._dias = {}   # (Cliente, Funcionário, dia) → linhas
+        self._tot = {}    # (Ano, Mês, Funcionário) → {Cliente: [medidas]}
+        self._n = 0       # linhas já consumidas (sincronizar)
+        self._hash = 0    # impressão digital dessas linhas
+
+    # ---------- carga ----------
+    def _impressao(self, df: pd.DataFrame) -> int:
+        """Soma (mod 2^64) do hash de cada linha nas colunas que entram nos totais.
+        Soma → acrescentar só soma o hash do final; qualquer valor editado/linha trocada muda o total."""
+        cols = [c for c in ("Cliente", "Funcionário", "Data", self.col_valor, self.col_caixinha, self.col_produto)
+                if c and c in df.columns]
+        if not len(df) or not cols:
+            return 0
+        h = pd.util.hash_pandas_object(df[cols], index=False).to_numpy(dtype=np.uint64)
+        return int(h.sum(dtype=np.uint64))
+
+    def acrescentar(self, df: pd.DataFrame):
+        """Soma as linhas de df (Cliente, Funcionário, Data + colunas de valor) aos totais.
+        Linhas sem Data ou sem Cliente não entram no ranking."""
+        d = df[df["Data"].notna() & df["Cliente"].notna()] if "Data" in df.columns else df.iloc[0:0]
+        with self._lock:
+            if not d.empty:
+                self._somar(d)
+            self._n += len(df)
+            self._hash = (self._hash + self._impressao(df)) % 2**64
+
+    def sincronizar(self, df: pd.DataFrame) -> bool:
+        """Traz o motor para o estado de df; True se bastou acrescentar o final."""
+        with self._lock:
+            n = self._n
+            if n and len(df) >= n and self._impressao(df.iloc[:n]) == self._hash:
+                if len(df) > n:
+                    self.acrescentar(df.iloc[n:])
+                return True
+            self._limpar()
+            self.acrescentar(df)
+            return False
+
+    def _somar(self, d: pd.DataFrame):
+        num = lambda c: pd.to_numeric(d[c], errors="coerce").fillna(0.0).to_numpy() if c and c in d.columns else 0.0
+        novos = pd.DataFrame({
+            "Cliente": d["Cliente"].astype(str).str.strip().to_numpy(),
+            "Funcionário": d["Funcionário"].astype(str).str.strip().to_numpy(),
+            "Dia": pd.to_datetime(d["Data"]).dt.normalize().to_numpy(),
+            "Valor": num(self.col_valor),
+            "Caixinha": num(self.col_caixinha),
+            "Produtos": d[self.col_produto].astype(bool).to_numpy().astype("int64")
+                        if self.col_produto and self.col_produto in d.columns else 0,
+        })
+        novos = novos[novos["Cliente"] != ""]
+        g = novos.groupby(["Cliente", "Funcionário", "Dia"], sort=False, as_index=False).agg(
+            Valor=("Valor", "sum"), Caixinha=("Caixinha", "sum"), Linhas=("Valor", "size"), Produtos=("Produtos", "sum"))
+        salao = (g.groupby(["Cliente", "Dia"], sort=False, as_index=False)[["Valor", "Caixinha", "Linhas", "Produtos"]]
+                  .sum().assign(**{"Funcionário": TODOS}))
+        for nivel in (g, salao):
+            self._somar_nivel(nivel)
+
+    def _somar_nivel(self, g: pd.DataFrame):
+        """g: 1 linha por (Cliente, Funcionário, dia) novos → atualiza contagens do dia e totais."""
+        chaves = list(zip(g["Cliente"], g["Funcionário"], g["Dia"]))
+        n = g["Linhas"].to_numpy()
+        antes = np.fromiter((self._dias.get(k, 0) for k in chaves), dtype="int64", count=len(chaves)) \
+            if self._dias else np.zeros(len(chaves), dtype="int64")
+        self._dias.update(zip(chaves, (antes + n).tolist()))
+        g = g.assign(Dias=(antes == 0).astype("int64"), Combos=((antes <= 1) & (antes + n > 1)).astype("int64"),
+                     Ano=g["Dia"].dt.year, Mes=g["Dia"].dt.month)
+        por_mes = g.groupby(["Ano", "Mes", "Funcionário", "Cliente"], sort=False)[MEDIDAS].sum()
+        por_ano = por_mes.groupby(level=["Ano", "Funcionário", "Cliente"], sort=False).sum()
+        geral = por_ano.groupby(level=["Funcionário", "Cliente"], sort=False).sum()
+        for (ano, mes, func, cli), t in zip(por_mes.index, self._listas(por_mes)):
+            self._acumular((int(ano), int(mes), func), cli, t)
+        for (ano, func, cli), t in zip(por_ano.index, self._listas(por_ano)):
+            self._acumular((int(ano), 0, func), cli, t)
+        for (func, cli), t in zip(geral.index, self._listas(geral)):
+            self._acumular((0, 0, func), cli, t)
+
+    @staticmethod
+    def _listas(frame: pd.DataFrame):
+        """[Valor, Caixinha (float), contagens (int)] por linha — to_numpy() do frame misto viraria tudo float."""
+        din = frame[DINHEIRO].to_numpy(dtype="float64").tolist()
+        cont = frame[CONTAGENS].to_numpy(dtype="int64").tolist()
+        return [d + c for d, c in zip(din, cont)]
+
+    def _acumular(self, chave, cli, t):
+        tot = self._tot.setdefault(chave, {})
+        acc = tot.get(cli)
+        tot[cli] = t if acc is None else [a + b for a, b in zip(acc, t)]
+
+    # ---------- consultas ----------
+    def totais(self, ano=None, meses=None, funcionario=None) -> dict:
+        """{Cliente: [medidas]} do recorte. ano: None (todos) / int / lista; meses exige ano."""
+        func = TODOS if funcionario is None else str(funcionario).strip()
+        anos = [0] if ano is None else (list(ano) if isinstance(ano, (list, tuple, set)) else [ano])
+        chaves = [(int(a), int(m), func) for a in anos for m in meses] if meses else [(int(a), 0, func) for a in anos]
+        with self._lock:
+            if len(chaves) == 1:
+                return dict(self._tot.get(chaves[0], {}))
+            out = {}
+            for ch in chaves:
+                for cli, t in self._tot.get(ch, {}).items():
+                    acc = out.get(cli)
+                    out[cli] = list(t) if acc is None else [a + b for a, b in zip(acc, t)]
+            return out
+
+    def top(self, k: int | None = 10, por: str = "Valor", ano=None, meses=None, funcionario=None,
+            excluir=()) -> pd.DataFrame:
+        """Top k clientes do recorte (k=None → todos, ordenados). por: Valor / ValorComCx / Dias / Linhas...
+        excluir: nomes (conjunto) ou função nome → bool."""
+        tot = self.totais(ano, meses, funcionario)
+        fora = excluir if callable(excluir) else set(excluir or ()).__contains__
+        itens = [(c, t) for c, t in tot.items() if not fora(c)]
+        if por == "ValorComCx":
+            chave = lambda it: it[1][0] + it[1][1]
+        else:
+            i = _I[por]
+            chave = lambda it: it[1][i]
+        sel = heapq.nlargest(k, itens, key=chave) if k else sorted(itens, key=chave, reverse=True)
+        out = pd.DataFrame([t for _, t in sel], columns=MEDIDAS)
+        out = out.astype({**{m: "float64" for m in DINHEIRO}, **{m: "int64" for m in CONTAGENS}})
+        out.insert(0, "Cliente", [c for c, _ in sel])
+        out.insert(0, "Posição", range(1, len(out) + 1))
+        out["ValorComCx"] = out["Valor"] + out["Caixinha"]
+        out["Simples"] = out["Dias"] - out["Combos"]
+        return out
+
+    def medida(self, nome: str, clientes, ano=None, meses=None, funcionario=None) -> list:
+        """Uma medida para cada cliente informado (0 se ele não aparece no recorte)."""
+        tot, i = self.totais(ano, meses, funcionario), _I[nome]
+        return [tot[c][i] if c in tot else 0 for c in clientes]
+
+    # ---------- movimentação ----------
+    def carregar_anteriores(self, anteriores: dict):
+        """{categoria: [clientes na ordem]} do último envio (ex.: aba premiacao_cache)."""
+        with self._lock:
+            self._ranks.update({k: list(v) for k, v in anteriores.items()})
+
+    def registrar(self, categoria: str, atual: list):
+        """Guarda o ranking atual da categoria e devolve os movimentos em relação ao anterior."""
+        with self._lock:
+            mov = movimentos(self._ranks.get(categoria, []), list(atual))
+            self._ranks[categoria] = list(atual)
+            return mov
@@ -0,0 +1,112 @@
+# -*- coding: utf-8 -*-
+# utils/refid.py — chaves de idempotência (RefID) em lote + índice de RefIDs por aba
+# - refid_atendimento / refid_despesa: monta o texto da chave por COLUNA (str.cat) e faz
+#   1 sha1 por linha num loop enxuto (sem Series/row por linha)
+# - O digest continua sendo sha1 sobre o MESMO texto de antes: RefIDs já gravados em
+#   comissoes_cache / Despesas seguem batendo (um hash novo duplicaria tudo já pago)
+# - indice(ws): RefIDs da aba como pd.Index, lidos por 1 col_values e guardados com TTL;
+#   quem grava chama acrescentar_indice()/definir_indice() e o próximo dedup não relê a aba
+# - so_novos(df, idx): dedup = anti-join por hash (Index.get_indexer), não set de Python
+
+import time
+import hashlib
+import threading
+
+import pandas as pd
+
+from utils import sheets_cache
+
+CAMPOS_ATENDIMENTO = ["Cliente", "Data", "Serviço", "Valor", "Funcionário", "Combo"]
+TTL_PADRAO = sheets_cache.TTL_PADRAO
+
+_lock = threading.RLock()
+_indices = {}   # (sheet_id, ws_id, coluna) -> (ts, pd.Index)
+
+
+# =========================
+# CHAVES
+# =========================
+def _texto(df: pd.DataFrame, col: str, minusculo: bool = False) -> pd.Series:
+    if col not in df.columns:
+        return pd.Series("", index=df.index)
+    s = df[col].astype(str).str.strip()
+    return s.str.lower() if minusculo else s
+
+def sha1(chaves: pd.Series, tamanho: int | None = None) -> pd.Series:
+    """sha1 hex de cada texto (utf-8); tamanho corta o hex (ex.: 16)."""
+    f = hashlib.sha1
+    out = [f(k.encode("utf-8")).hexdigest() for k in chaves]
+    if tamanho:
+        out = [h[:tamanho] for h in out]
+    return pd.Series(out, index=chaves.index, dtype=object)
+
+def chave(df: pd.DataFrame, colunas, minusculas=()) -> pd.Series:
+    """'v1|v2|...' por linha, com str().strip() (e lower() nas colunas em `minusculas`)."""
+    if df.empty:
+        return pd.Series([], index=df.index, dtype=object)
+    partes = [_texto(df, c, c in minusculas) for c in colunas]
+    return partes[0].str.cat(partes[1:], sep="|") if len(partes) > 1 else partes[0]
+
+def refid_atendimento(df: pd.DataFrame) -> pd.Series:
+    """sha1("Cliente|Data|Serviço|Valor|Funcionário|Combo")[:16]."""
+    return sha1(chave(df, CAMPOS_ATENDIMENTO), 16)
+
+def refid_despesa(df: pd.DataFrame, col_valor: str = "ValorFloat", col_mepag: str = "Me Pag:") -> pd.Series:
+    """sha1("Data|prestador|descrição|valor:.2f|me pag") — Prestador/Descrição/Me Pag em minúsculas."""
+    if df.empty:
+        return pd.Series([], index=df.index, dtype=object)
+    valor = pd.to_numeric(df[col_valor], errors="coerce").fillna(0.0).map("{:.2f}".format)
+    partes = [_texto(df, "Data"), _texto(df, "Prestador", True), _texto(df, "Descrição", True),
+              valor, _texto(df, col_mepag, True)]
+    return sha1(partes[0].str.cat(partes[1:], sep="|"))
+
+
+# =========================
+# ÍNDICE POR ABA
+# =========================
+def _key(ws, coluna):
+    return (sheets_cache._sheet_id_ws(ws), ws.id, coluna)
+
+def indice(ws, coluna: str = "RefID", ttl: float = TTL_PADRAO, refresh: bool = False) -> pd.Index:
+    """RefIDs (não vazios) da aba; 1 leitura da coluna por TTL."""
+    key = _key(ws, coluna)
+    with _lock:
+        hit = _indices.get(key)
+        if hit and not refresh and (time.monotonic() - hit[0]) < ttl:
+            return hit[1]
+    pos = sheets_cache.col_map(ws, ttl=ttl).get(sheets_cache._norm_key(coluna))
+    vals = ws.col_values(pos)[1:] if pos else []
+    idx = pd.Index([str(v).strip() for v in vals if str(v).strip()], dtype=object).unique()
+    with _lock:
+        _indices[key] = (time.monotonic(), idx)
+    return idx
+
+def definir_indice(ws, refids, coluna: str = "RefID"):
+    """Registra o conjunto COMPLETO de RefIDs que acabou de ser gravado na aba."""
+    idx = pd.Index([str(v).strip() for v in refids if str(v).strip()], dtype=object).unique()
+    with _lock:
+        _indices[_key(ws, coluna)] = (time.monotonic(), idx)
+
+def acrescentar_indice(ws, refids, coluna: str = "RefID"):
+    """Após append: junta os RefIDs novos ao índice em cache (se houver)."""
+    key = _key(ws, coluna)
+    with _lock:
+        hit = _indices.get(key)
+        if hit:
+            novos = pd.Index([str(v).strip() for v in refids if str(v).strip()], dtype=object)
+            _indices[key] = (hit[0], hit[1].append(novos).unique())
+
+def invalidar_indice(ws=None):
+    with _lock:
+        if ws is None:
+            _indices.clear()
+            return
+        for key in [k for k in _indices if k[:2] == _key(ws, None)[:2]]:
+            _indices.pop(key, None)
+
+def so_novos(df: pd.DataFrame, idx, coluna: str = "RefID") -> pd.DataFrame:
+    """Anti-join: linhas de df cujo RefID NÃO está em idx."""
+    if df.empty:
+        return df
+    idx = pd.Index(pd.Series(list(idx), dtype=object).astype(str).str.strip()).unique()
+    return df[idx.get_indexer(df[coluna].astype(str).str.strip()) < 0]
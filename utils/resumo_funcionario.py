@@ -0,0 +1,113 @@
+# -*- coding: utf-8 -*-
+# utils/resumo_funcionario.py — resumo MATERIALIZADO por funcionário (3_Funcionarios / 4_Detalhes_Funcionario)
+# - Montado 1x por versão dos dados (cache_data da página); widgets só filtram frames pequenos
+# - mensal  : (Funcionário, Ano, Mês, Fiado) → Valor, Linhas
+# - clientes: (Funcionário, Ano, Fiado, Cliente) → Valor            (top clientes)
+# - visitas : (Funcionário, Ano, Mês, Fiado, Visita) → Valor        (ticket por atendimento)
+# - comissao: (Ano, Mês) → comissão paga ao Vinicius (aba Despesas)
+# Fiado = Conta normalizada == "fiado" (filtro da tela: False / True / None = tudo).
+# receita_real_salao(): JPaulo + (Vinicius − comissão paga), mês a mês.
+
+import numpy as np
+import pandas as pd
+
+PRESTADOR_COMISSAO = "Vinicius"
+DIMS_MENSAL = ["Funcionário", "Ano", "Mês", "Fiado"]
+
+
+def _fiado(df: pd.DataFrame) -> np.ndarray:
+    if "Conta_norm" not in df.columns:
+        return np.zeros(len(df), dtype=bool)
+    return (df["Conta_norm"].astype(str) == "fiado").to_numpy()
+
+def _base(df: pd.DataFrame) -> pd.DataFrame:
+    d = df[df["Data"].notna()]
+    return pd.DataFrame({
+        "Funcionário": d["Funcionário"].astype(str).str.strip(),
+        "Cliente": d["Cliente"].astype(str).str.strip(),
+        "Ano": d["Data"].dt.year.astype("int16"),
+        "Mês": d["Data"].dt.month.astype("int8"),
+        "Fiado": _fiado(d),
+        "Valor": pd.to_numeric(d["Valor"], errors="coerce").fillna(0.0).to_numpy(),
+    }, index=d.index)
+
+def comissao_paga(despesas: pd.DataFrame, prestador: str = PRESTADOR_COMISSAO) -> pd.DataFrame:
+    """Despesas de comissão do prestador por (Ano, Mês), sempre positivas."""
+    if despesas is None or despesas.empty:
+        return pd.DataFrame(columns=["Ano", "Mês", "Comissao"])
+    m = (despesas["Prestador"] == prestador) & despesas["Descrição"].str.contains("comissão", case=False, na=False)
+    d = despesas[m]
+    return (pd.DataFrame({"Ano": d["Data"].dt.year.astype("int16"), "Mês": d["Data"].dt.month.astype("int8"),
+                          "Comissao": d["Valor"].abs()})
+              .groupby(["Ano", "Mês"], as_index=False)["Comissao"].sum())
+
+def montar(df: pd.DataFrame, despesas: pd.DataFrame | None = None) -> dict:
+    """df com Data (datetime), Funcionário, Cliente, Valor (float), Conta_norm e, se houver, Visita."""
+    b = _base(df)
+    res = {
+        "mensal": (b.groupby(DIMS_MENSAL, as_index=False)
+                     .agg(Valor=("Valor", "sum"), Linhas=("Valor", "size"))),
+        "clientes": b.groupby(["Funcionário", "Ano", "Fiado", "Cliente"], as_index=False)["Valor"].sum(),
+        "comissao": comissao_paga(despesas),
+    }
+    if "Visita" in df.columns:
+        v = b.assign(Visita=df.loc[b.index, "Visita"])
+        res["visitas"] = v.groupby(DIMS_MENSAL + ["Visita"], as_index=False)["Valor"].sum()
+    return res
+
+
+# =========================
+# CONSULTAS
+# =========================
+def filtrar(frame: pd.DataFrame, ano=None, fiado=None, funcionario=None, meses=None) -> pd.DataFrame:
+    """fiado: True / False / None (tudo)."""
+    m = np.ones(len(frame), dtype=bool)
+    if ano is not None and "Ano" in frame.columns:
+        m &= (frame["Ano"] == ano).to_numpy()
+    if fiado is not None:
+        m &= (frame["Fiado"] == fiado).to_numpy()
+    if funcionario is not None:
+        m &= (frame["Funcionário"] == funcionario).to_numpy()
+    if meses is not None:
+        m &= frame["Mês"].isin(list(meses)).to_numpy()
+    return frame[m]
+
+def top_clientes(res: dict, ano, fiado=None, n: int = 10, ignorar=()) -> pd.DataFrame:
+    """Funcionário, Cliente, Valor — os n maiores de cada funcionário."""
+    c = filtrar(res["clientes"], ano=ano, fiado=fiado)
+    c = c[~c["Cliente"].str.lower().isin(list(ignorar))]
+    c = (c.groupby(["Funcionário", "Cliente"], as_index=False)["Valor"].sum()
+          .sort_values(["Funcionário", "Valor"], ascending=[True, False]))
+    return c.groupby("Funcionário", sort=False).head(n)
+
+def receita_mensal(res: dict, ano, fiado=None, funcionario=None, meses=None) -> pd.DataFrame:
+    """Mês, Valor, Linhas (soma dos funcionários filtrados)."""
+    m = filtrar(res["mensal"], ano=ano, fiado=fiado, funcionario=funcionario, meses=meses)
+    return m.groupby("Mês", as_index=False)[["Valor", "Linhas"]].sum().sort_values("Mês")
+
+def ticket_por_funcionario(res: dict, ano, fiado=None) -> pd.DataFrame:
+    """Funcionário, Ticket Médio (valor por linha)."""
+    m = filtrar(res["mensal"], ano=ano, fiado=fiado).groupby("Funcionário", as_index=False)[["Valor", "Linhas"]].sum()
+    return pd.DataFrame({"Funcionário": m["Funcionário"], "Ticket Médio": m["Valor"] / m["Linhas"]})
+
+def ticket_por_visita(res: dict, ano, fiado=None, funcionario=None, meses=None) -> pd.DataFrame:
+    """AnoMes, Ticket Médio — média do valor de cada atendimento (Visita) no mês."""
+    v = filtrar(res["visitas"], ano=ano, fiado=fiado, funcionario=funcionario, meses=meses)
+    v = v.groupby(["Ano", "Mês", "Funcionário", "Visita"], as_index=False)["Valor"].sum()  # junta fiado + pago
+    t = v.groupby(["Ano", "Mês"], as_index=False)["Valor"].mean()
+    return pd.DataFrame({"AnoMes": t["Ano"].astype(str) + "-" + t["Mês"].astype(str).str.zfill(2),
+                         "Ticket Médio": t["Valor"]})
+
+def receita_real_salao(res: dict, ano, fiado=None, receita_dono: pd.DataFrame | None = None) -> pd.DataFrame:
+    """Mês, JPaulo, ComissaoRealVinicius, ReceitaVinicius, LiquidoVinicius, ReceitaRealSalao.
+    receita_dono: Mês, Valor do JPaulo já com os filtros da tela (padrão: o ano inteiro)."""
+    jp = receita_dono if receita_dono is not None else receita_mensal(res, ano, fiado, "JPaulo")
+    vin = receita_mensal(res, ano, fiado, PRESTADOR_COMISSAO)
+    com = filtrar(res["comissao"], ano=ano)
+    out = (jp[["Mês", "Valor"]].rename(columns={"Valor": "JPaulo"})
+           .merge(com[["Mês", "Comissao"]].rename(columns={"Comissao": "ComissaoRealVinicius"}), on="Mês", how="left")
+           .merge(vin[["Mês", "Valor"]].rename(columns={"Valor": "ReceitaVinicius"}), on="Mês", how="left")
+           .fillna(0))
+    out["LiquidoVinicius"] = (out["ReceitaVinicius"] - out["ComissaoRealVinicius"]).clip(lower=0)
+    out["ReceitaRealSalao"] = out["JPaulo"] + out["LiquidoVinicius"]
+    return out
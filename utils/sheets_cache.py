@@ -0,0 +1,126 @@
+# -*- coding: utf-8 -*-
+# utils/sheets_cache.py — cache de abas (worksheets) e cabeçalhos por planilha
+# - sh.worksheets() / sh.worksheet() / ws.row_values(1) são 1 round-trip HTTP cada
+# - Aqui guardamos os handles das abas e a linha 1 de cada aba com TTL curto
+# - Quem ESCREVE cabeçalho (append_row de header, update A1, clear + set_with_dataframe)
+#   deve chamar definir_cabecalho() ou invalidar_cabecalho() logo em seguida
+# - Quem REGRAVA linhas de uma aba chama marcar_escrita(titulo): estruturas em cache_resource
+#   de outras páginas usam versao_escrita(titulo) como chave e se remontam na próxima leitura
+
+import time
+import threading
+import unicodedata
+
+import gspread
+
+TTL_PADRAO = 120  # segundos — curto: a planilha também é editada à mão
+
+_lock = threading.RLock()
+_abas = {}      # sheet_id -> (ts, {titulo: ws})
+_headers = {}   # (sheet_id, ws_id) -> (ts, [cabeçalhos])
+_escritas = {}  # titulo normalizado -> nº de escritas neste processo
+
+
+def _norm_key(s: str) -> str:
+    return unicodedata.normalize("NFKC", str(s).strip()).casefold()
+
+def _sheet_id_ws(ws) -> str:
+    sid = getattr(ws, "spreadsheet_id", None)
+    if sid is None:
+        sid = ws.spreadsheet.id
+    return sid
+
+def _vivo(ts: float, ttl: float) -> bool:
+    return (time.monotonic() - ts) < ttl
+
+# =========================
+# ABAS
+# =========================
+def mapa_abas(sh, ttl: float = TTL_PADRAO, refresh: bool = False) -> dict:
+    """{titulo: ws} da planilha; 1 chamada a sh.worksheets() por TTL."""
+    with _lock:
+        hit = _abas.get(sh.id)
+        if hit and not refresh and _vivo(hit[0], ttl):
+            return hit[1]
+    abas = {w.title: w for w in sh.worksheets()}
+    with _lock:
+        _abas[sh.id] = (time.monotonic(), abas)
+    return abas
+
+def aba_existe(sh, titulo: str, ttl: float = TTL_PADRAO) -> bool:
+    return titulo in mapa_abas(sh, ttl=ttl)
+
+def get_ws(sh, titulo: str, ttl: float = TTL_PADRAO):
+    """Igual a sh.worksheet(titulo), mas reaproveita o handle em cache.
+    Se a aba não estiver no cache, força um refresh antes de levantar WorksheetNotFound."""
+    abas = mapa_abas(sh, ttl=ttl)
+    if titulo not in abas:
+        abas = mapa_abas(sh, refresh=True)
+    if titulo not in abas:
+        raise gspread.WorksheetNotFound(titulo)
+    return abas[titulo]
+
+def registrar_aba(sh, ws):
+    """Chamar após sh.add_worksheet() para o cache já enxergar a aba nova."""
+    with _lock:
+        hit = _abas.get(sh.id)
+        if hit:
+            hit[1][ws.title] = ws
+
+# =========================
+# CABEÇALHOS
+# =========================
+def cabecalho(ws, ttl: float = TTL_PADRAO, refresh: bool = False) -> list:
+    """Linha 1 da aba (como ws.row_values(1)), com cache por TTL."""
+    key = (_sheet_id_ws(ws), ws.id)
+    with _lock:
+        hit = _headers.get(key)
+        if hit and not refresh and _vivo(hit[0], ttl):
+            return list(hit[1])
+    headers = ws.row_values(1)
+    with _lock:
+        _headers[key] = (time.monotonic(), list(headers))
+    return list(headers)
+
+def col_map(ws, ttl: float = TTL_PADRAO) -> dict:
+    """{nome normalizado (NFKC+casefold): coluna 1-based}; mantém a 1ª ocorrência."""
+    cmap = {}
+    for i, h in enumerate(cabecalho(ws, ttl=ttl)):
+        k = _norm_key(h)
+        if k and k not in cmap:
+            cmap[k] = i + 1
+    return cmap
+
+def definir_cabecalho(ws, headers):
+    """Registra a linha 1 que acabou de ser escrita (evita reler do Sheets)."""
+    with _lock:
+        _headers[(_sheet_id_ws(ws), ws.id)] = (time.monotonic(), [str(h) for h in headers])
+
+def invalidar_cabecalho(ws):
+    with _lock:
+        _headers.pop((_sheet_id_ws(ws), ws.id), None)
+
+# =========================
+# ESCRITAS
+# =========================
+def marcar_escrita(titulo: str):
+    """Registra que a aba foi regravada (por esta ou outra página, neste processo)."""
+    with _lock:
+        k = _norm_key(titulo)
+        _escritas[k] = _escritas.get(k, 0) + 1
+
+def versao_escrita(titulo: str) -> int:
+    """Contador de escritas da aba: chave para caches que precisam ver o que outras páginas gravaram."""
+    with _lock:
+        return _escritas.get(_norm_key(titulo), 0)
+
+def invalidar(sh=None):
+    """Limpa tudo (sh=None) ou só o que pertence à planilha informada."""
+    with _lock:
+        if sh is None:
+            _abas.clear()
+            _headers.clear()
+            return
+        _abas.pop(sh.id, None)
+        for key in [k for k in _headers if k[0] == sh.id]:
+            _headers.pop(key, None)
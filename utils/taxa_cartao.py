@@ -0,0 +1,93 @@
+# -*- coding: utf-8 -*-
+# utils/taxa_cartao.py — taxa de cartão POR LINHA, calculada 1x na carga
+# Gera duas colunas:
+#   TaxaCartaoCalc (float64, R$) e MetodoTaxa ("valor(q)" | "diff" | "pct" | "")
+# Prioridade por linha (mesma ordem do antigo calcular_taxa_cartao do app.py):
+#   (1) TaxaCartaoValor preenchida
+#   (2) Bruto − Líquido (>0), só em linhas de cartão (regex na coluna de conta)
+#   (3) estimativa por % (sobre o bruto; sem bruto, "des-líquida" o valor)
+# Total de qualquer filtro = df.loc[mask, "TaxaCartaoCalc"].sum()
+
+import re
+
+import numpy as np
+import pandas as pd
+
+from utils import base_dados
+
+REGEX_CARTAO = re.compile(
+    r"(cart|cr[eé]dit|d[eé]bit|visa|master|elo|hiper|maquin|pos|sumup|pagbank|cielo|rede|nubank)",
+    re.IGNORECASE
+)
+PCT_MAX = 0.20
+# nomes aceitos para a coluna de conta / forma de pagamento (sem espaços, minúsculo)
+NOMES_CONTA = {"conta", "pagamento", "status", "formadepagamento", "formapagamento",
+               "formapagdetalhe", "formapagto", "formapag"}
+
+
+def _norm(s) -> str:
+    return re.sub(r"\s+", "", str(s).strip().lower())
+
+def _achar(cols, nomes):
+    return next((c for c in cols if _norm(c) in nomes), None)
+
+def col_conta(cols):
+    """Coluna de conta / forma de pagamento da base (None se não houver)."""
+    return _achar(cols, NOMES_CONTA)
+
+def _para_pct(s: pd.Series) -> pd.Series:
+    """'1,99%' / '1.99' / 0.0199 → fração (0.0199); acima de 1 é lido como %; teto PCT_MAX."""
+    txt = s if pd.api.types.is_numeric_dtype(s) else s.astype("string").str.replace("%", "", regex=False)
+    v = base_dados.para_numero(txt)
+    v = v.where(v <= 1.0, v / 100.0)
+    return v.clip(lower=0.0, upper=PCT_MAX)
+
+def marcar_taxa_cartao(df: pd.DataFrame, col_conta: str | None = None) -> pd.DataFrame:
+    """Adiciona TaxaCartaoCalc / MetodoTaxa IN PLACE e devolve o df."""
+    cols = list(df.columns)
+    n = len(df)
+    taxa = np.zeros(n, dtype="float64")
+    metodo = np.full(n, "", dtype=object)
+    livre = np.ones(n, dtype=bool)
+
+    # (1) TaxaCartaoValor
+    col_q = _achar(cols, {"taxacartaovalor"})
+    if col_q:
+        q = base_dados.para_numero(df[col_q]).to_numpy()
+        ok = ~np.isnan(q)
+        taxa[ok], metodo[ok] = q[ok], "valor(q)"
+        livre &= ~ok
+
+    # (2) Bruto − Líquido em linhas de cartão
+    col_b = _achar(cols, {"valorbrutorecebido", "valorbruto", "bruto"})
+    col_l = _achar(cols, {"valorliquidorecebido", "valorliquido", "valor"})
+    bruto = base_dados.para_numero(df[col_b]).to_numpy() if col_b else np.full(n, np.nan)
+    liq = base_dados.para_numero(df[col_l]).to_numpy() if col_l else np.full(n, np.nan)
+    if col_b and col_l:
+        diff = np.clip(bruto - liq, 0.0, None)
+        ok = livre & (diff > 0)
+        if col_conta and col_conta in cols:
+            ok &= base_dados.mapear_categorias(df[col_conta], lambda s: bool(REGEX_CARTAO.search(s))).astype(bool)
+        taxa[ok], metodo[ok] = diff[ok], "diff"
+        livre &= ~ok
+
+    # (3) Estimativa por %
+    col_p = next((c for c in cols if "pct" in c.lower() or "%" in c.lower()), None)
+    if col_p:
+        pct = _para_pct(df[col_p]).to_numpy()
+        est = np.where(~np.isnan(bruto), bruto * pct, liq * pct / (1 - np.minimum(pct, 0.99)))
+        ok = livre & ~np.isnan(est) & (est > 0)
+        taxa[ok], metodo[ok] = est[ok], "pct"
+
+    df["TaxaCartaoCalc"] = taxa
+    df["MetodoTaxa"] = pd.Categorical(metodo, categories=["valor(q)", "diff", "pct", ""])
+    return df
+
+def resumo_taxa(df: pd.DataFrame):
+    """(total, método predominante, coluna) — formato do antigo calcular_taxa_cartao."""
+    if df.empty or "TaxaCartaoCalc" not in df.columns:
+        return 0.0, "vazio", None
+    total = float(df["TaxaCartaoCalc"].sum())
+    usados = df.loc[df["TaxaCartaoCalc"] > 0, "MetodoTaxa"]
+    metodo = str(usados.value_counts().idxmax()) if not usados.empty else "vazio"
+    return total, metodo, "TaxaCartaoCalc"
@@ -0,0 +1,82 @@
+# -*- coding: utf-8 -*-
+# utils/visitas.py — tabela de VISITAS: 1 linha por (Cliente, dia), montada 1x por versão da base
+# - Período normalizado (Manhã/Tarde/Noite; aceita sem acento/caixa/abreviado) — regra 1x por categoria
+# - Tipo / Combo: valores distintos do dia, ordenados e juntos por ", "
+#   (drop_duplicates por (visita, valor); só visitas com 2+ valores passam pelo join)
+# - Período da visita = moda das linhas; empate → Manhã > Tarde > Noite
+# - Funcionário = 1º não vazio do dia (ordem da planilha); Categoria = Combo / Simples
+# Sem lambda por grupo: tudo sai de códigos (factorize) + groupby/drop_duplicates.
+
+import unicodedata
+
+import numpy as np
+import pandas as pd
+
+from utils.base_dados import mapear_categorias
+
+PERIODOS = ["Manhã", "Tarde", "Noite"]
+COLS = ["Cliente", "Data", "Funcionário", "Tipo", "Combo", "Período", "Categoria", "Linhas"]
+
+
+def _periodo(s: str):
+    s = unicodedata.normalize("NFKD", s).encode("ASCII", "ignore").decode("ASCII").strip().lower()
+    for p in PERIODOS:
+        if s.startswith(p[:3].lower()):
+            return p
+    return None
+
+def normalizar_periodo(s: pd.Series) -> pd.Series:
+    """Qualquer variação ('manha', 'MANHÃ ', 'man') → Manhã/Tarde/Noite; o resto → <NA>."""
+    out = mapear_categorias(s, _periodo, padrao=None)
+    return pd.Series(pd.Categorical(out, categories=PERIODOS), index=s.index)
+
+def _juntar_distintos(visita: np.ndarray, valores: pd.Series, n: int) -> np.ndarray:
+    """', '.join(sorted(set(valores não nulos))) por visita (vazio → '')."""
+    txt = valores.astype("string")
+    d = pd.DataFrame({"v": visita, "t": txt.to_numpy()}).dropna().drop_duplicates()
+    d = d.sort_values(["v", "t"], kind="stable")
+    out = np.full(n, "", dtype=object)
+    tam = d.groupby("v")["t"].transform("size").to_numpy()
+    um = d[tam == 1]
+    out[um["v"].to_numpy()] = um["t"].to_numpy()
+    varios = d[tam > 1]
+    if len(varios):
+        j = varios.groupby("v")["t"].agg(", ".join)
+        out[j.index.to_numpy()] = j.to_numpy()
+    return out
+
+def montar(df: pd.DataFrame) -> pd.DataFrame:
+    """df com Cliente, Data (datetime) e, se houver, Funcionário / Tipo / Combo / Período (já normalizado)."""
+    dia = pd.to_datetime(df["Data"], errors="coerce").dt.normalize()
+    cli = df["Cliente"]
+    ok = (dia.notna() & cli.notna() & (cli.astype("string").str.strip() != "")).to_numpy()
+    d, dia, cli = df[ok], dia[ok], cli[ok]
+    if d.empty:
+        return pd.DataFrame(columns=COLS)
+
+    chave = pd.MultiIndex.from_arrays([cli.to_numpy(), dia.to_numpy()])
+    visita, uniq = pd.factorize(chave)  # códigos na ordem da 1ª aparição
+    n = len(uniq)
+    col = lambda c: d[c] if c in d.columns else pd.Series(pd.NA, index=d.index, dtype="object")
+
+    out = pd.DataFrame({"Cliente": uniq.get_level_values(0), "Data": uniq.get_level_values(1)})
+    if isinstance(cli.dtype, pd.CategoricalDtype):
+        out["Cliente"] = pd.Categorical(out["Cliente"], dtype=cli.dtype)
+    out["Funcionário"] = pd.Series(col("Funcionário").to_numpy(), dtype="object").groupby(visita).first() \
+        .reindex(range(n)).to_numpy()
+    out["Tipo"] = _juntar_distintos(visita, col("Tipo"), n)
+    out["Combo"] = _juntar_distintos(visita, col("Combo"), n)
+
+    # moda do Período: contagem por (visita, período) → maior contagem; empate pela ordem de PERIODOS
+    per = col("Período")
+    rank = pd.Categorical(per.astype("object"), categories=PERIODOS).codes
+    c = pd.DataFrame({"v": visita, "r": rank})
+    c = c[c["r"] >= 0].value_counts().rename("n").reset_index()
+    c = c.sort_values(["v", "n", "r"], ascending=[True, False, True]).drop_duplicates("v")
+    cod = np.full(n, -1, dtype="int8")
+    cod[c["v"].to_numpy()] = c["r"].to_numpy()
+    out["Período"] = pd.Categorical.from_codes(cod, categories=PERIODOS)
+
+    out["Categoria"] = np.where(out["Combo"].str.contains(r"[+,]", regex=True), "Combo", "Simples")
+    out["Linhas"] = np.bincount(visita, minlength=n)
+    return out.sort_values(["Cliente", "Data"], kind="stable").reset_index(drop=True)